@@ -1,7 +1,7 @@
 import os
 import re
 import logging
-import sqlalchemy
+import sqlite3
 logging.basicConfig(
     filename=os.path.join(os.path.dirname(__file__), 'app.log'),
     level=logging.DEBUG,
@@ -10,12 +10,24 @@ logging.basicConfig(
 import customtkinter as ctk
 from tkinter import filedialog, messagebox, ttk
 import tkinter as tk
-import pandas as pd
 import subprocess
+import time
 import traceback
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+import multiprocessing
 from datetime import datetime, date
-from PIL import Image, ImageTk
+from background_tasks import BackgroundExecutor
+from startup import LazyModule, preload, mark_startup
+from data_versions import current_versions
+from db_watcher import DatabaseWatcher
+from dimension_cache import DIMENSION_TABLES, get_dimension_cache
+from edit_queue import DATE, NUMBER, EditQueue
+from grid_paste import describe_errors, parse_block, plan_paste
+from result_cache import QueryResultCache, estimate_size
+from warm_start import WarmStartCache
+
+# Heavy libraries are imported on first use, not at startup
+pd = LazyModule("pandas")
+sqlalchemy = LazyModule("sqlalchemy")
 
 try:
     from tkcalendar import Calendar, DateEntry
@@ -253,6 +265,179 @@ class CustomDatePicker(ctk.CTkFrame):
         # Validate after inserting
         self.validate_date()
 
+# Services of one project with foreign key display names
+PROJECT_SERVICES_QUERY = '''
+SELECT
+    s.id,
+    sb.name AS "Stick-Built",
+    m.name AS "Module",
+    s.id AS "Document Number",
+    a.name AS "Activities",
+    t.name AS "Title",
+    s.department AS "Department",
+    tu.name AS "Technical Unit",
+    e.name AS "Assigned to",
+    p.name AS "Progress",
+    s.estimated_internal_hours AS "Estimated internal",
+    s.estimated_external_hours AS "Estimated external",
+    s.start_date AS "Start date",
+    s.due_date AS "Due date",
+    s.notes AS "Notes",
+    pu.name AS "Professional Role"
+FROM service s
+LEFT JOIN stick_built sb ON s.stick_built_id = sb.id
+LEFT JOIN module m ON s.module_id = m.id
+LEFT JOIN activities a ON s.activities_id = a.id
+LEFT JOIN title t ON s.title_id = t.id
+LEFT JOIN technical_unit tu ON s.technical_unit_id = tu.id
+LEFT JOIN employee e ON s.employee_id = e.id
+LEFT JOIN progress p ON s.progress_id = p.id
+LEFT JOIN professional_unit pu ON s.professional_unit_id = pu.id
+WHERE s.project_id = :project_id
+'''
+
+# Tables whose changes invalidate a snapshot of a project's services
+PROJECT_SERVICES_TABLES = (
+    "service", "project", "stick_built", "module", "activities", "title",
+    "technical_unit", "employee", "progress", "professional_unit",
+)
+
+# Services frames of recently viewed projects - flipping back to a project is free until its tables change
+services_cache = QueryResultCache("Project services", max_bytes=64 * 1024 * 1024)
+
+def query_project_services(db_path, project_name):
+    """Run the services query for a project; None if the project is unknown"""
+    project_id = get_dimension_cache(db_path).get("project").id_for(project_name)
+    if not project_id:
+        return None
+    engine = sqlalchemy.create_engine(f'sqlite:///{db_path}')
+    try:
+        with engine.connect() as conn:
+            result = conn.execute(sqlalchemy.text(PROJECT_SERVICES_QUERY), {'project_id': project_id})
+            rows = result.fetchall()
+            columns = result.keys()
+        return pd.DataFrame(rows, columns=columns)
+    finally:
+        engine.dispose()
+
+def fetch_project_services(db_path, project_name):
+    """Load the services of a project as (table versions, DataFrame or None if the project is unknown) (runs on an I/O thread)"""
+    # Versions are read before the rows, so a concurrent write can only make them look older
+    versions = current_versions(db_path, PROJECT_SERVICES_TABLES)
+    key = QueryResultCache.key("project_services", (db_path, project_name), versions=versions)
+    cached = services_cache.get(key)
+    if cached is not None:
+        return versions, cached.copy()
+    df = query_project_services(db_path, project_name)
+    if df is not None:
+        services_cache.put(key, df.copy())
+    return versions, df
+
+# Prefetched projects may fill the services cache up to this size - they never evict projects that were viewed
+PREFETCH_BUDGET = 32 * 1024 * 1024
+MAX_RECENT_PROJECTS = 6
+
+def prefetch_project_services(task, db_path, project_names):
+    """Warm the services cache for the given projects in order, within PREFETCH_BUDGET (runs on an I/O thread)"""
+    versions = current_versions(db_path, PROJECT_SERVICES_TABLES)
+    loaded = []
+    for project_name in project_names:
+        task.check_cancelled()
+        key = QueryResultCache.key("project_services", (db_path, project_name), versions=versions)
+        if services_cache.contains(key):
+            continue
+        if services_cache.bytes >= PREFETCH_BUDGET:
+            break
+        df = query_project_services(db_path, project_name)
+        if df is None:
+            continue
+        size = estimate_size(df)
+        if services_cache.bytes + size > PREFETCH_BUDGET:
+            break
+        services_cache.put(key, df, size=size)
+        loaded.append(project_name)
+    return loaded
+
+# Dimension table behind each foreign key field of the form
+FIELD_DIMENSIONS = {
+    "Stick-Built": "stick_built",
+    "Module": "module",
+    "Activities": "activities",
+    "Title": "title",
+    "Technical Unit": "technical_unit",
+    "Assigned to": "employee",
+    "Progress": "progress",
+    "Professional Role": "professional_unit",
+}
+
+# Grid columns that can be edited in place -> (service column, kind: dimension table, NUMBER, DATE or None for text)
+SERVICE_EDIT_COLUMNS = {
+    **{field: (f"{table}_id", table) for field, table in FIELD_DIMENSIONS.items()},
+    "Department": ("department", None),
+    "Estimated internal": ("estimated_internal_hours", NUMBER),
+    "Estimated external": ("estimated_external_hours", NUMBER),
+    "Start date": ("start_date", DATE),
+    "Due date": ("due_date", DATE),
+    "Notes": ("notes", None),
+}
+
+# Table name variants accepted for each foreign key endpoint
+TABLE_NAME_VARIANTS = {
+    "stickbuilts": ["stickbuilt", "stickbuilts"],
+    "modules": ["module", "modules"],
+    "activitiess": ["activities", "activity", "activitiess"],
+    "titles": ["title", "titles"],
+    "technicalunits": ["technicalunit", "technicalunits"],
+    "employees": ["employee", "employees"],
+    "progresss": ["progress", "progresss"],
+    "professionalunits": ["professionalunit", "professionalunits"],
+    "projects": ["project", "projects"]
+}
+
+def fetch_foreign_key_options(db_path, foreign_key_fields):
+    """Read {field: [{"id", "name"}]} dropdown options and any warnings to show (runs on an I/O thread)"""
+    def normalize(name):
+        return re.sub(r'[^a-z0-9]', '', name.lower())
+
+    options = {}
+    warnings = []
+    dimensions = get_dimension_cache(db_path)
+    conn = sqlite3.connect(db_path)
+    try:
+        available_tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+        print("Available tables in database:", available_tables)
+        # Build a mapping from endpoint to actual table name in DB
+        endpoint_to_table = {}
+        for endpoint, variants in TABLE_NAME_VARIANTS.items():
+            variant_names = {normalize(v) for v in variants}
+            endpoint_to_table[endpoint] = next((t for t in available_tables if normalize(t) in variant_names), None)
+        print("Endpoint to DB table mapping:", endpoint_to_table)
+
+        for field, endpoint in foreign_key_fields:
+            try:
+                table_name = endpoint_to_table.get(endpoint)
+                if not table_name:
+                    options[field] = []
+                    print(f"No table mapping for endpoint: {endpoint}")
+                    continue
+                if table_name in DIMENSION_TABLES:
+                    rows = dimensions.get(table_name).rows
+                else:
+                    columns = [row[1] for row in conn.execute(f'PRAGMA table_info("{table_name}")')]
+                    name_column = "name" if "name" in columns else "id"
+                    rows = conn.execute(f'SELECT id, "{name_column}" FROM "{table_name}"').fetchall()
+                if not rows:
+                    print(f"No data found in table '{table_name}'.")
+                    warnings.append(("DB Table Empty", f"No data found in table '{table_name}'."))
+                options[field] = [{"id": row_id, "name": name} for row_id, name in rows]
+            except Exception as e:
+                options[field] = []
+                print(f"Error loading options for {field} ({endpoint}): {e}")
+                traceback.print_exc()
+    finally:
+        conn.close()
+    return options, warnings
+
 class ExcelActivityApp:
     def __init__(self, root):
         self.root = root
@@ -267,6 +452,16 @@ class ExcelActivityApp:
         x = (screen_width - window_width) // 2
         y = (screen_height - window_height) // 2
         self.root.geometry(f"{window_width}x{window_height}+{x}+{y}")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Database queries run in the background so the window never freezes
+        self.executor = BackgroundExecutor(self.root, on_busy_change=self.on_busy_change,
+                                           on_progress=self.on_task_progress)
+
+        # Inline cell edits are written behind, in batches
+        self.edit_queue = EditQueue(self.root, self.executor, os.path.join(os.path.dirname(__file__), 'Workload.db'),
+                                    "service", SERVICE_EDIT_COLUMNS, on_change=self.on_pending_edits_change,
+                                    on_flushed=self.on_edits_flushed, on_failed=self.on_edits_failed)
 
         self.display_columns = [
             "Select", "ID", "Stick-Built", "Module", "Document Number", "Activities", "Title", "Department",
@@ -295,97 +490,6 @@ class ExcelActivityApp:
             ("Professional Role", "professionalunits")
         ]
         self.foreign_key_options = {}
-        self.load_foreign_key_options_from_db()
-        self.setup_ui()
-    def load_foreign_key_options_from_db(self):
-        # Print all available table names for debugging
-        import sqlalchemy
-        import re
-        db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
-        engine = sqlalchemy.create_engine(f'sqlite:///{db_path}')
-        insp = sqlalchemy.inspect(engine)
-        available_tables = insp.get_table_names()
-        print("Available tables in database:", available_tables)
-        # Try to map expected table names to actual table names
-        def normalize(name):
-            return re.sub(r'[^a-z0-9]', '', name.lower())
-        # List of possible table name variants for each field
-        table_name_variants = {
-            "stickbuilts": ["stickbuilt", "stickbuilts"],
-            "modules": ["module", "modules"],
-            "activitiess": ["activities", "activity", "activitiess"],
-            "titles": ["title", "titles"],
-            "technicalunits": ["technicalunit", "technicalunits"],
-            "employees": ["employee", "employees"],
-            "progresss": ["progress", "progresss"],
-            "professionalunits": ["professionalunit", "professionalunits"],
-            "projects": ["project", "projects"]
-        }
-        # Build a mapping from endpoint to actual table name in DB
-        endpoint_to_table = {}
-        for endpoint, variants in table_name_variants.items():
-            found = None
-            for t in available_tables:
-                t_norm = normalize(t)
-                for v in variants:
-                    if t_norm == normalize(v):
-                        found = t
-                        break
-                if found:
-                    break
-            if found:
-                endpoint_to_table[endpoint] = found
-            else:
-                endpoint_to_table[endpoint] = None
-        print("Endpoint to DB table mapping:", endpoint_to_table)
-        # Fetch dropdown options directly from SQLite using SQLAlchemy models
-        from sqlalchemy.orm import sessionmaker
-        from sqlalchemy.ext.automap import automap_base
-        import traceback
-        if not os.path.exists(db_path):
-            from tkinter import messagebox
-            messagebox.showerror("DB Error", f"Database file not found: {db_path}")
-            print(f"Database file not found: {db_path}")
-            return
-        engine = sqlalchemy.create_engine(f'sqlite:///{db_path}')
-        Base = automap_base()
-        try:
-            Base.prepare(autoload_with=engine)
-        except Exception as e:
-            from tkinter import messagebox
-            messagebox.showerror("DB Error", f"Could not reflect database tables.\n{e}")
-            print("Could not reflect database tables:", e)
-            traceback.print_exc()
-            return
-        Session = sessionmaker(bind=engine)
-        session = Session()
-        for field, endpoint in self.foreign_key_fields:
-            try:
-                table_name = endpoint_to_table.get(endpoint)
-                if not table_name:
-                    self.foreign_key_options[field] = []
-                    print(f"No table mapping for endpoint: {endpoint}")
-                    continue
-                if not hasattr(Base.classes, table_name):
-                    self.foreign_key_options[field] = []
-                    print(f"Table '{table_name}' not found in database.")
-                    from tkinter import messagebox
-                    messagebox.showwarning("DB Table Missing", f"Table '{table_name}' not found in database.")
-                    continue
-                Model = getattr(Base.classes, table_name)
-                options = session.query(Model).all()
-                if not options:
-                    print(f"No data found in table '{table_name}'.")
-                    from tkinter import messagebox
-                    messagebox.showwarning("DB Table Empty", f"No data found in table '{table_name}'.")
-                self.foreign_key_options[field] = [
-                    {"id": getattr(opt, "id", None), "name": getattr(opt, "name", str(opt))} for opt in options
-                ]
-            except Exception as e:
-                self.foreign_key_options[field] = []
-                print(f"Error loading options for {field} ({endpoint}): {e}")
-                traceback.print_exc()
-        session.close()
         self.project_combobox = None
         self.current_project = None
         self.tree_edit_widgets = {}
@@ -402,10 +506,270 @@ class ExcelActivityApp:
         self.edit_popup = None
         self.dark_mode = False  # Track dark mode state
 
+        # Warm start - reopen the last project with its filters, sort and column widths
+        self.warm_start = WarmStartCache(os.path.join(os.path.dirname(__file__), 'fabsi_list_of_service'))
+        state = self.warm_start.load_state()
+        self.current_project = state.get("project")
+        self.active_column_filters = {col: list(values) for col, values in state.get("filters", {}).items()}
+        self.current_sort_column = state.get("sort_column")
+        self.current_sort_ascending = state.get("sort_ascending", True)
+        self.column_layout = state.get("column_widths", {})
+        self.recent_projects = list(state.get("recent_projects", []))[:MAX_RECENT_PROJECTS]  # most recent first
+        self.services_result = None  # (project, table versions, services DataFrame) as loaded
+        self.services_snapshot_dirty = False
+
+        self.setup_ui()
+
+        # Paint the window first, then load the dropdown options in the background
+        self.root.update()
+        mark_startup("first_paint")
+        self.load_foreign_key_options_from_db()
+        self.load_warm_start_services()
+
+        # Pick up changes other instances (or the booking app) commit, within about a second
+        db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
+        self.db_watcher = DatabaseWatcher(self.root, db_path)
+        self.db_watcher.subscribe(PROJECT_SERVICES_TABLES, self.on_services_tables_changed)
+        self.db_watcher.subscribe(DIMENSION_TABLES, self.on_dimension_tables_changed)
+        self.db_watcher.start()
+
+    def load_warm_start_services(self):
+        """Show the last project's services from the snapshot saved at exit, if there is one"""
+        if not self.current_project:
+            return
+        db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
+        self.executor.submit(
+            "project_services", self.warm_start.load_snapshot, (db_path, self.current_project),
+            on_success=self.show_cached_services,
+            on_error=lambda e: self.reload_project_services(),
+            message=f"Opening {self.current_project}..."
+        )
+
+    def show_cached_services(self, snapshot):
+        """Show the cached services, then reconcile them with the database in the background"""
+        if snapshot is None:
+            self.reload_project_services()
+            return
+        versions, df = snapshot
+        self.services_result = (self.current_project, versions, df)
+        self.services_snapshot_dirty = False
+        self.apply_project_services(df.copy())
+        self.restore_view_state()
+        self.prefetch_nearby_projects()
+
+        db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
+        self.executor.submit(
+            "project_services_check", current_versions, db_path, PROJECT_SERVICES_TABLES,
+            on_success=self.reconcile_cached_services,
+            on_error=lambda e: self.reload_project_services(),
+            message="Checking for changes..."
+        )
+
+    def reconcile_cached_services(self, versions):
+        """Reload the project if the database changed since its cached services were read"""
+        project, cached_versions, _ = self.services_result
+        if project != self.current_project:
+            return  # Another project was picked meanwhile
+        if versions == cached_versions:
+            print(f"Cached services of {project} are up to date")
+            return
+        changed = [table for table, version in versions.items() if cached_versions.get(table) != version]
+        print(f"Cached services of {project} are stale ({', '.join(changed)} changed) - reloading")
+        self.reload_project_services()
+
+    def reload_project_services(self):
+        """Load the current project from the database and re-apply the filters and sort"""
+        db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
+        project_name = self.current_project
+
+        def on_loaded(result):
+            self.on_project_services_loaded(project_name, result)
+            self.restore_view_state()
+
+        self.executor.submit(
+            "project_services", fetch_project_services, db_path, project_name,
+            on_success=on_loaded,
+            on_error=self.on_project_services_error,
+            message=f"Loading {project_name}..."
+        )
+
+    def prefetch_nearby_projects(self):
+        """Warm the cache for the projects likely to be opened next: the neighbours in the dropdown, then recent ones"""
+        project_name = self.current_project
+        if not project_name:
+            return
+        if project_name in self.recent_projects:
+            self.recent_projects.remove(project_name)
+        self.recent_projects.insert(0, project_name)
+        del self.recent_projects[MAX_RECENT_PROJECTS:]
+
+        db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
+        project_names = get_dimension_cache(db_path).get("project").sorted_names()
+        candidates = []
+        if project_name in project_names:
+            i = project_names.index(project_name)
+            candidates += [project_names[j] for j in (i + 1, i - 1) if 0 <= j < len(project_names)]
+        candidates += self.recent_projects[1:]
+        candidates = [p for p in dict.fromkeys(candidates) if p in project_names]
+        if not candidates:
+            return
+        self.executor.submit(
+            "project_prefetch", prefetch_project_services, db_path, candidates, pass_task=True,
+            on_success=lambda loaded: loaded and print(f"Prefetched services of {', '.join(loaded)}"),
+            on_error=lambda e: logging.warning(f"Prefetching project services failed: {e}")
+        )
+
+    def on_services_tables_changed(self, tables, versions):
+        """Watcher callback: reload the shown project if its services changed since they were read"""
+        if self.services_result is None or self.services_result[0] != self.current_project:
+            return
+        cached_versions = self.services_result[1]
+        if all(cached_versions.get(table) == versions.get(table) for table in PROJECT_SERVICES_TABLES):
+            return  # Already showing this data (e.g. this window made the change and reloaded)
+        if self.edit_queue.busy or (self.tree is not None
+                                    and any(isinstance(w, tk.Entry) for w in self.tree.winfo_children())):
+            # A cell is being edited or saved - try again once that is done
+            self.root.after(DatabaseWatcher.INTERVAL_MS, lambda: self.on_services_tables_changed(tables, versions))
+            return
+        print(f"{', '.join(sorted(tables))} changed in another window - reloading {self.current_project}")
+        self.reload_project_services()
+
+    def on_dimension_tables_changed(self, tables, versions):
+        """Watcher callback: drop the changed lookup tables and refresh the form dropdowns"""
+        db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
+        dimensions = get_dimension_cache(db_path)
+        for table in tables:
+            dimensions.invalidate(table)
+        self.executor.submit(
+            "foreign_key_options", fetch_foreign_key_options, db_path, self.foreign_key_fields,
+            on_success=self.refresh_dropdown_values,
+            on_error=lambda e: logging.warning(f"Refreshing dropdown options failed: {e}")
+        )
+
+    def refresh_dropdown_values(self, result):
+        """Put fresh options into the form dropdowns in place (typed values are kept)"""
+        options, _ = result
+        self.foreign_key_options.update(options)
+        for field, field_options in options.items():
+            widget = self.entries.get(field)
+            if isinstance(widget, ctk.CTkComboBox):
+                widget.configure(values=[o['name'] for o in field_options])
+        if self.project_combobox is not None and self.project_combobox.winfo_exists():
+            db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
+            self.project_combobox.configure(values=get_dimension_cache(db_path).get("project").sorted_names())
+
+    def restore_view_state(self):
+        """Re-apply the active column filters and sort after the services were (re)loaded"""
+        if self.df.empty:
+            return
+        if self.active_column_filters:
+            self.apply_all_active_filters()
+            self.update_sum_labels()
+            self.update_role_summary()
+        if self.current_sort_column in self.df.columns:
+            self.apply_sort(self.current_sort_column, self.current_sort_ascending)
+
+    def remember_column_layout(self):
+        """Keep the current table column widths (they survive re-renders and restarts)"""
+        if self.tree is not None and self.tree.winfo_exists():
+            self.column_layout.update({col: self.tree.column(col, 'width') for col in self.tree['columns']})
+
+    def save_warm_start(self):
+        """Remember the project, filters, sort, column widths and loaded services for the next launch"""
+        self.remember_column_layout()
+        self.warm_start.save_state({
+            "project": self.current_project,
+            "filters": self.active_column_filters,
+            "sort_column": self.current_sort_column,
+            "sort_ascending": self.current_sort_ascending,
+            "column_widths": self.column_layout,
+            "recent_projects": self.recent_projects,
+        })
+        if self.services_snapshot_dirty and self.services_result is not None:
+            project, versions, df = self.services_result
+            db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
+            self.warm_start.save_snapshot((db_path, project), versions, df)
+    def load_foreign_key_options_from_db(self):
+        """Load the dropdown options in the background and rebuild the form when they arrive"""
+        db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
+        if not os.path.exists(db_path):
+            messagebox.showerror("DB Error", f"Database file not found: {db_path}")
+            print(f"Database file not found: {db_path}")
+            return
+        self.executor.submit(
+            "foreign_key_options", fetch_foreign_key_options, db_path, self.foreign_key_fields,
+            on_success=self.apply_foreign_key_options,
+            on_error=self.on_foreign_key_options_error,
+            message="Loading options..."
+        )
+
+    def apply_foreign_key_options(self, result):
+        options, warnings = result
+        self.foreign_key_options.update(options)
+        for title, message in warnings:
+            messagebox.showwarning(title, message)
+        # Rebuild the form so the foreign key fields become dropdowns
+        self.build_entry_fields()
+        mark_startup("data_ready")
+
+    def on_foreign_key_options_error(self, e):
+        messagebox.showerror("DB Error", f"Could not read dropdown options from the database.\n{e}")
+        print("Could not read dropdown options:", e)
+        logging.error(f"Foreign key options loading error: {e}")
+
+    def on_busy_change(self, tasks):
+        """Show or hide the busy indicator as background tasks start and finish"""
+        if not hasattr(self, 'busy_bar'):
+            return
+        tasks = [task for task in tasks if task.key != "project_prefetch"]  # prefetching runs silently
+        if tasks:
+            self.busy_label.configure(text=tasks[-1].message or "Working...")
+            if not self.busy_bar.winfo_ismapped():
+                self.busy_bar.configure(mode="indeterminate")
+                self.busy_bar.pack(side='right', padx=5)
+                self.busy_bar.start()
+        else:
+            self.busy_bar.stop()
+            self.busy_bar.pack_forget()
+            self.busy_label.configure(text="")
+
+    def on_task_progress(self, task, done, total=None, message=None):
+        """Show determinate progress reported by a background task"""
+        if not hasattr(self, 'busy_bar'):
+            return
+        text = message or task.message or "Working..."
+        if total:
+            if self.busy_bar.cget("mode") != "determinate":
+                self.busy_bar.stop()
+                self.busy_bar.configure(mode="determinate")
+            self.busy_bar.set(min(done / total, 1.0))
+            text = f"{text} {done:,}/{total:,}"
+        self.busy_label.configure(text=text)
+
+    def on_close(self):
+        """Stop background work and close the window"""
+        try:
+            saved, conflicts, invalid = self.edit_queue.flush_now()
+            if conflicts or invalid:
+                logging.warning(f"Edits not saved on close - conflicts: {conflicts}, invalid: {invalid}")
+        except Exception as e:
+            logging.error(f"Saving pending edits on close failed: {e}")
+            messagebox.showerror("Error", f"Pending edits could not be saved: {e}")
+        try:
+            self.save_warm_start()
+        except Exception as e:
+            logging.error(f"Warm-start save error: {e}")
+        services_cache.log_stats()
+        self.db_watcher.stop()
+        self.executor.shutdown()
+        self.root.destroy()
+
     def load_logo_image(self, image_path, width, height):
         """Load and resize logo image for display"""
         try:
             if os.path.exists(image_path):
+                from PIL import Image
+
                 # Load and resize the image
                 pil_image = Image.open(image_path)
                 # Convert to RGBA if not already
@@ -522,6 +886,18 @@ class ExcelActivityApp:
                      command=self.save_to_excel,
                      fg_color="#003d52", hover_color="#255c7b",
                      width=80).pack(side='left', padx=5, pady=5)
+        ctk.CTkButton(export_frame, text="⚡ Raw Data", 
+                     command=self.export_raw_data,
+                     fg_color="#003d52", hover_color="#255c7b",
+                     width=90).pack(side='left', padx=5, pady=5)
+        ctk.CTkButton(export_frame, text="📄 PDF", 
+                     command=self.save_to_pdf,
+                     fg_color="#003d52", hover_color="#255c7b",
+                     width=70).pack(side='left', padx=5, pady=5)
+        ctk.CTkButton(export_frame, text="📄 PDF per Project", 
+                     command=self.save_project_pdfs,
+                     fg_color="#003d52", hover_color="#255c7b",
+                     width=130).pack(side='left', padx=5, pady=5)
         
         # Right side buttons
         ctk.CTkButton(button_frame, text="🧹 Clear Form", 
@@ -556,6 +932,15 @@ class ExcelActivityApp:
         )
         duplicate_info_label.pack(side='left', padx=5)
 
+        # Busy indicator for background work (hidden while idle)
+        self.busy_bar = ctk.CTkProgressBar(info_frame, width=120, mode="indeterminate", progress_color="#003d52")
+        self.busy_label = ctk.CTkLabel(info_frame, text="", font=ctk.CTkFont(family="Arial", size=11),
+                                       text_color="#22505f")
+        self.busy_label.pack(side='right', padx=5)
+        self.pending_edits_label = ctk.CTkLabel(info_frame, text="", font=ctk.CTkFont(family="Arial", size=11),
+                                                text_color="#b8860b")
+        self.pending_edits_label.pack(side='right', padx=5)
+
         # Create the main table frame (always present) - reduced padding
         self.table_frame = ctk.CTkFrame(self.root, corner_radius=10)
         self.table_frame.pack(fill='both', expand=True, padx=15, pady=(2, 0))
@@ -929,10 +1314,9 @@ class ExcelActivityApp:
             import pandas as pd
             db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
             engine = sqlalchemy.create_engine(f'sqlite:///{db_path}')
+            dimensions = get_dimension_cache(db_path)
             # Get project_id
-            with engine.connect() as conn:
-                result = conn.execute(sqlalchemy.text('SELECT id FROM project WHERE name = :name'), {'name': self.current_project}).fetchone()
-                project_id = result[0] if result else None
+            project_id = dimensions.get("project").id_for(self.current_project)
             if not project_id:
                 messagebox.showerror("Error", "Project not found in database.")
                 return
@@ -959,10 +1343,8 @@ class ExcelActivityApp:
                     "Due date": "due_date",
                     "Notes": "notes"
                 }
-                # Build foreign key name->id maps for all dropdowns
-                fk_maps = {}
-                for col, options in self.foreign_key_options.items():
-                    fk_maps[col] = {o['name']: o['id'] for o in options if o['id'] is not None}
+                # Foreign key names resolve through the dimension cache (case/whitespace insensitive)
+                fk_maps = {col: dimensions.get(table) for col, table in FIELD_DIMENSIONS.items()}
                 # Prepare rows for insert
                 rows = []
                 for _, row in df.iterrows():
@@ -970,7 +1352,7 @@ class ExcelActivityApp:
                     for col, db_col in field_to_db.items():
                         if db_col.endswith('_id'):
                             val = row.get(col, None)
-                            data[db_col] = fk_maps.get(col, {}).get(val, None) if pd.notnull(val) else None
+                            data[db_col] = fk_maps[col].id_for(val) if col in fk_maps and pd.notnull(val) else None
                         else:
                             data[db_col] = row.get(col, None)
                     rows.append(data)
@@ -1007,53 +1389,49 @@ class ExcelActivityApp:
 
     def on_project_selected(self, choice=None):
         project_name = self.project_combobox.get()
+        if project_name != self.current_project and not self.refreshing_data:
+            # Filters and sort belong to the project they were set on
+            self.active_column_filters.clear()
+            self.current_sort_column = None
         self.current_project = project_name
-        # Fetch project ID directly from DB
-        import sqlalchemy
         db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
-        engine = sqlalchemy.create_engine(f'sqlite:///{db_path}')
-        with engine.connect() as conn:
-            result = conn.execute(sqlalchemy.text('SELECT id FROM project WHERE name = :name'), {'name': project_name}).fetchone()
-            project_id = result[0] if result else None
-        # Load services for this project directly from DB
-        import pandas as pd
+        # The selected project goes first - a running prefetch would only compete with it
+        self.executor.cancel("project_prefetch")
+        
+        # Reloads after add/delete restore filters right afterwards, so they need the data now
+        if self.refreshing_data:
+            try:
+                self.on_project_services_loaded(project_name, fetch_project_services(db_path, project_name))
+            except Exception as e:
+                self.on_project_services_error(e)
+            return
+        
+        # Load in the background - selecting another project supersedes this request
+        self.executor.submit(
+            "project_services", fetch_project_services, db_path, project_name,
+            on_success=lambda result: self.on_project_services_loaded(project_name, result),
+            on_error=self.on_project_services_error,
+            message=f"Loading {project_name}..."
+        )
+
+    def on_project_services_error(self, e):
+        logging.error(f"Failed to load services for project: {e}")
+        messagebox.showerror("Error", f"Failed to load services for project: {e}")
+
+    def on_project_services_loaded(self, project_name, result):
+        """Keep the loaded services for the warm-start snapshot and show them"""
+        versions, df = result
+        if df is not None:
+            self.services_result = (project_name, versions, df.copy())
+            self.services_snapshot_dirty = True
+        self.apply_project_services(df)
+        if df is not None:
+            self.prefetch_nearby_projects()
+
+    def apply_project_services(self, df):
+        """Show the services loaded for the selected project"""
         try:
-            if project_id:
-                # Join foreign key tables to get display names
-                query = '''
-                SELECT
-                    s.id,
-                    sb.name AS "Stick-Built",
-                    m.name AS "Module",
-                    s.id AS "Document Number",
-                    a.name AS "Activities",
-                    t.name AS "Title",
-                    s.department AS "Department",
-                    tu.name AS "Technical Unit",
-                    e.name AS "Assigned to",
-                    p.name AS "Progress",
-                    s.estimated_internal_hours AS "Estimated internal",
-                    s.estimated_external_hours AS "Estimated external",
-                    s.start_date AS "Start date",
-                    s.due_date AS "Due date",
-                    s.notes AS "Notes",
-                    pu.name AS "Professional Role"
-                FROM service s
-                LEFT JOIN stick_built sb ON s.stick_built_id = sb.id
-                LEFT JOIN module m ON s.module_id = m.id
-                LEFT JOIN activities a ON s.activities_id = a.id
-                LEFT JOIN title t ON s.title_id = t.id
-                LEFT JOIN technical_unit tu ON s.technical_unit_id = tu.id
-                LEFT JOIN employee e ON s.employee_id = e.id
-                LEFT JOIN progress p ON s.progress_id = p.id
-                LEFT JOIN professional_unit pu ON s.professional_unit_id = pu.id
-                WHERE s.project_id = :project_id
-                '''
-                with engine.connect() as conn:
-                    result = conn.execute(sqlalchemy.text(query), {'project_id': project_id})
-                    rows = result.fetchall()
-                    columns = result.keys()
-                df = pd.DataFrame(rows, columns=columns)
+            if df is not None:
                 # Store original data WITHOUT Select and ID columns for filtering
                 if not df.empty:
                     # Store clean original data
@@ -1092,10 +1470,7 @@ class ExcelActivityApp:
 
         # Get project names from database
         db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
-        engine = sqlalchemy.create_engine(f'sqlite:///{db_path}')
-        with engine.connect() as conn:
-            result = conn.execute(sqlalchemy.text('SELECT name FROM project')).fetchall()
-            project_names = [row[0] for row in result]
+        project_names = get_dimension_cache(db_path).get("project").sorted_names()
 
         # Keep the existing project selection if it exists
         existing_project = None
@@ -1280,6 +1655,8 @@ class ExcelActivityApp:
 
     def render_table(self):
         """Render the main table with data"""
+        self.remember_column_layout()
+
         # Clear existing widgets
         for widget in self.table_frame.winfo_children():
             widget.destroy()
@@ -1357,7 +1734,7 @@ class ExcelActivityApp:
                 header_text = header_map.get(col, col)
                 self.tree.heading(col, text=header_text)
             
-            width = column_widths.get(col, 100)
+            width = self.column_layout.get(col, column_widths.get(col, 100))
             anchor = 'w' if col in ["Activities", "Title", "Notes", "Technical Unit", 
                                   "Assigned to", "Professional Role", "Department"] else 'center'
             self.tree.column(col, width=width, minwidth=40, stretch=True, anchor=anchor)
@@ -1406,6 +1783,8 @@ class ExcelActivityApp:
         # Bind events
         self.tree.bind("<Double-1>", self.edit_cell)
         self.tree.bind("<Button-1>", self.on_checkbox_click)
+        self.tree.bind("<ButtonRelease-1>", self.remember_paste_column)
+        self.tree.bind("<Control-v>", self.paste_into_table)
         
         # Update the totals after rendering the table
         self.update_sum_labels()
@@ -1797,6 +2176,8 @@ class ExcelActivityApp:
         
         self.tree.bind("<Double-1>", self.edit_cell)
         self.tree.bind("<Button-1>", self.on_checkbox_click)
+        self.tree.bind("<ButtonRelease-1>", self.remember_paste_column)
+        self.tree.bind("<Control-v>", self.paste_into_table)
         
         # Column widths (optimized for better table fit)
         column_widths = {
@@ -2047,6 +2428,8 @@ class ExcelActivityApp:
                     sorted_df = self.df.sort_values(by=column, ascending=ascending)
                 
                 self.df = sorted_df.reset_index(drop=True)
+                self.current_sort_column = column
+                self.current_sort_ascending = ascending
                 # Update ID column after sorting
                 if 'ID' in self.df.columns:
                     self.df['ID'] = range(1, len(self.df) + 1)
@@ -2082,7 +2465,10 @@ class ExcelActivityApp:
             if not selected_values:
                 # If nothing selected, show empty dataframe
                 self.df = pd.DataFrame(columns=self.df.columns)
+                self.active_column_filters.pop(column, None)
             else:
+                # This filter starts from the original data, so it replaces any other column filter
+                self.active_column_filters = {column: selected_values}
                 # Filter the original data
                 if hasattr(self, 'original_df') and column in self.original_df.columns:
                     # Start with original data (without Select and ID columns)
@@ -2125,6 +2511,8 @@ class ExcelActivityApp:
     def clear_filter(self, column):
         """Clear filter and restore original data"""
         try:
+            self.active_column_filters.pop(column, None)
+
             # Restore original data
             if hasattr(self, 'original_df'):
                 # Recreate the full dataframe with Select and ID columns
@@ -2253,8 +2641,9 @@ class ExcelActivityApp:
             for col, var in self.filter_vars.items():
                 var.set("Todos")
         
-        # Clear all column filters
+        # Clear all column filters and the sort order
         self.active_column_filters.clear()
+        self.current_sort_column = None
         print("Cleared all filters")  # Debug
         
         # Clear row selections
@@ -2312,19 +2701,19 @@ class ExcelActivityApp:
                 print(f"Error sorting column {column}: {e}")
 
     def edit_cell(self, event):
-        """Handle cell editing on double-click"""
+        """Handle cell editing on double-click - the edit is saved to the service table in the background"""
         item = self.tree.identify('item', event.x, event.y)
         column = self.tree.identify('column', event.x, event.y)
         
-        if not item or not column or not column.startswith('#'):
+        if not item or not item.isdigit() or not column or not column.startswith('#'):
             return
             
         # Get column name from index
         col_idx = int(column.replace('#', '')) - 1
         col_name = self.df.columns[col_idx]
         
-        # Don't edit checkbox column
-        if col_name == 'Select':
+        # Only columns stored on the service row can be edited (not the checkbox or the ids)
+        if col_name not in SERVICE_EDIT_COLUMNS:
             return
             
         # Create and position the edit entry
@@ -2334,19 +2723,28 @@ class ExcelActivityApp:
         entry.select_range(0, tk.END)
         
         def on_edit_done(event=None):
-            """Complete the edit and update data"""
+            """Complete the edit, update data and queue it for saving"""
+            if not entry.winfo_exists():
+                return  # Already handled (Return followed by FocusOut)
             new_value = entry.get()
             row_idx = int(item)  # Get numerical index
+            original = self.df.at[row_idx, col_name]
+            entry.destroy()
+            if str(new_value) == ("" if pd.isna(original) else str(original)):
+                return
             
-            # Update DataFrame
+            # Update DataFrame (and the unfiltered copy, so re-filtering keeps the edit)
             self.df.at[row_idx, col_name] = new_value
+            if row_idx in self.original_df.index and col_name in self.original_df.columns:
+                self.original_df.at[row_idx, col_name] = new_value
             
             # Update tree
             values = list(self.tree.item(item)['values'])
             values[col_idx] = new_value
             self.tree.item(item, values=values)
             
-            entry.destroy()
+            service_id = self.df.at[row_idx, 'Document Number']
+            self.edit_queue.record(int(service_id), col_name, new_value, None if pd.isna(original) else original)
             
             # Update summaries if needed
             if col_name in ["Estimated internal", "Estimated external"]:
@@ -2361,6 +2759,111 @@ class ExcelActivityApp:
         entry.bind("<Escape>", lambda e: entry.destroy())
         entry.bind("<FocusOut>", on_edit_done)
 
+    def remember_paste_column(self, event):
+        """Keep the clicked column as the left edge for the next paste"""
+        column = self.tree.identify('column', event.x, event.y)
+        if column.startswith('#') and column[1:].isdigit():
+            col_idx = int(column[1:]) - 1
+            if 0 <= col_idx < len(self.df.columns):
+                self.paste_anchor_column = self.df.columns[col_idx]
+
+    def paste_into_table(self, event=None):
+        """Paste a TSV block from the clipboard (e.g. copied in Excel) into the table as one batch of edits
+
+        The block starts at the first selected row and the last clicked column;
+        a single value is pasted into every selected row.
+        """
+        started = time.perf_counter()
+        try:
+            block = parse_block(self.root.clipboard_get())
+        except tk.TclError:
+            return "break"
+        selection = [item for item in self.tree.selection() if item.isdigit()]
+        anchor = getattr(self, 'paste_anchor_column', None)
+        if not block or not selection or anchor not in SERVICE_EDIT_COLUMNS:
+            messagebox.showinfo("Paste", "Click a cell of an editable column to paste at, then press Ctrl+V.")
+            return "break"
+
+        items = [item for item in self.tree.get_children() if item.isdigit()]  # skips the totals row
+        if len(block) == 1 and len(block[0]) == 1:
+            target_items = [item for item in items if item in set(selection)]
+        else:
+            target_items = items[items.index(selection[0]):]
+        rows = [int(item) for item in target_items]
+        columns = list(self.df.columns)
+        cells, errors, skipped = plan_paste(block, rows, columns[columns.index(anchor):],
+                                            SERVICE_EDIT_COLUMNS, self.edit_queue.db_path)
+
+        # One batch of edits, with the loaded values for conflict detection
+        edits = {}
+        service_ids = self.df['Document Number']
+        for col_name, (row_idx, typed, display) in cells.items():
+            stored = typed if SERVICE_EDIT_COLUMNS[col_name][1] == NUMBER else display
+            originals = self.df.loc[row_idx, col_name]
+            for idx, value, shown, original in zip(row_idx, typed, display, originals):
+                edits[(int(service_ids[idx]), col_name)] = (shown, None if pd.isna(original) else original)
+            # Update DataFrame (and the unfiltered copy, so re-filtering keeps the edit)
+            new_values = ["" if v is None else v for v in stored]
+            self.df.loc[row_idx, col_name] = new_values
+            present = [i for i in row_idx if i in self.original_df.index]
+            if col_name in self.original_df.columns and present:
+                self.original_df.loc[present, col_name] = [v for i, v in zip(row_idx, new_values)
+                                                          if i in self.original_df.index]
+
+        # One update per table row
+        changed_rows = sorted({idx for row_idx, _, _ in cells.values() for idx in row_idx})
+        for idx in changed_rows:
+            values = list(self.tree.item(str(idx))['values'])
+            for col_name in cells:
+                values[columns.index(col_name)] = self.df.at[idx, col_name]
+            self.tree.item(str(idx), values=values)
+
+        if edits:
+            self.edit_queue.record_many(edits)
+            if {"Estimated internal", "Estimated external"} & set(cells):
+                self.update_sum_labels()
+                self.update_role_summary()
+        print(f"Pasted {len(edits)} cells in {time.perf_counter() - started:.2f}s")
+        if errors or skipped:
+            message = f"Pasted {len(edits)} cells."
+            if errors:
+                message += f"\n\n{len(errors)} cells were not pasted (wrong type or unknown name):\n{describe_errors(errors)}"
+            if skipped:
+                message += f"\n\n{skipped} cells fell outside the table or on read-only columns."
+            messagebox.showwarning("Paste", message)
+        return "break"
+
+    def on_pending_edits_change(self, pending, saving):
+        """Show how many inline edits are not in the database yet"""
+        if not hasattr(self, 'pending_edits_label'):
+            return
+        total = pending + saving
+        if not total:
+            text = ""
+        elif saving:
+            text = f"✎ Saving {total} edit{'s' if total != 1 else ''}..."
+        else:
+            text = f"✎ {total} unsaved edit{'s' if total != 1 else ''}"
+        self.pending_edits_label.configure(text=text)
+
+    def on_edits_flushed(self, saved, conflicts, invalid):
+        """Report edits that could not be applied and show the stored values again"""
+        if saved:
+            print(f"Saved {len(saved)} inline edits")
+        if not conflicts and not invalid:
+            return
+        lines = [f"- Service {row_id}, {column}: changed by someone else" for row_id, column in conflicts]
+        lines += [f"- Service {row_id}, {column}: {message}" for (row_id, column), message in invalid.items()]
+        messagebox.showwarning("Edits not saved", f"{len(lines)} edits were not saved:\n\n" + "\n".join(lines[:15])
+                               + ("\n..." if len(lines) > 15 else "") + "\n\nThe table is reloaded with the stored values.")
+        if not self.edit_queue.busy:
+            self.reload_project_services()  # otherwise the watcher reloads once the queue is empty
+
+    def on_edits_failed(self, e):
+        """Saving kept failing - the edits stay queued for the next edit or closing"""
+        messagebox.showerror("Error", f"{len(self.edit_queue)} edits could not be saved yet: {e}\n\n"
+                                      "They are kept and saved again with the next edit or when closing.")
+
     def clear_form(self):
         """Clear all form fields for easy data entry"""
         if messagebox.askyesno("Clear Form", "Are you sure you want to clear all form fields?"):
@@ -2391,10 +2894,9 @@ class ExcelActivityApp:
         db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
         logging.debug(f"Using DB file for insert: {os.path.abspath(db_path)}")
         engine = sqlalchemy.create_engine(f'sqlite:///{db_path}')
+        dimensions = get_dimension_cache(db_path)
         # Get project_id
-        with engine.connect() as conn:
-            result = conn.execute(sqlalchemy.text('SELECT id FROM project WHERE name = :name'), {'name': self.current_project}).fetchone()
-            project_id = result[0] if result else None
+        project_id = dimensions.get("project").id_for(self.current_project)
         if not project_id:
             messagebox.showerror("Error", "Project not found in database.")
             return
@@ -2426,9 +2928,8 @@ class ExcelActivityApp:
                 continue  # Skip fields not mapped
             # Foreign key fields (those ending with _id)
             if db_col.endswith('_id'):
-                options = self.foreign_key_options.get(col, [])
-                match = next((o for o in options if o['name'] == val), None)
-                data[db_col] = match['id'] if match else None
+                table = FIELD_DIMENSIONS.get(col)
+                data[db_col] = dimensions.get(table).id_for(val) if table and val else None
             else:
                 data[db_col] = val
         # Insert into DB
@@ -2623,6 +3124,35 @@ class ExcelActivityApp:
                 else:
                     messagebox.showwarning("Warning", "No valid activities found to delete.")
 
+    def export_raw_data(self):
+        """Export the services of the selected project (or all services) for analytics"""
+        from data_export import export_data, export_filetypes, format_for_path
+
+        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=export_filetypes())
+        if not path:
+            return
+        fmt = format_for_path(path)
+        if fmt is None:
+            messagebox.showerror("Error", "Unsupported file type - use .csv, .ndjson, .parquet or .npz")
+            return
+        db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
+        project_name = self.current_project or None
+
+        def run_export(task):
+            return export_data(db_path, "services", fmt, path, project_name=project_name,
+                               progress=task.report_progress, check_cancelled=task.check_cancelled)
+
+        def on_error(e):
+            logging.error(f"Raw data export failed: {e}")
+            messagebox.showerror("Error", f"Failed to export data: {e}")
+
+        self.executor.submit(
+            "export_raw_data", run_export, pass_task=True,
+            on_success=lambda rows: messagebox.showinfo("Export", f"Exported {rows} services to:\n{path}"),
+            on_error=on_error,
+            message="Exporting raw data..."
+        )
+
     def save_to_excel(self):
         if self.df.empty:
             messagebox.showerror("Error", "No selected data to save.")
@@ -2630,6 +3160,7 @@ class ExcelActivityApp:
         path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel", "*.xlsx")])
         if not path:
             return
+        from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
         with pd.ExcelWriter(path, engine='openpyxl') as writer:
             self.df.to_excel(writer, index=False, sheet_name='List of Service')
             ws = writer.sheets['List of Service']
@@ -2660,126 +3191,76 @@ class ExcelActivityApp:
             return
 
         try:
-            from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-            from reportlab.lib.pagesizes import A3, landscape
-            from reportlab.lib import colors
-            from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-            from reportlab.lib.units import inch
-            
-            # Ask for save location
-            path = filedialog.asksaveasfilename(
-                defaultextension=".pdf",
-                filetypes=[("PDF", "*.pdf")]
-            )
-            if not path:
-                return
-                
-            # Configure document
-            doc = SimpleDocTemplate(
-                path,
-                pagesize=landscape(A3),  # Using A3 for more space
-                rightMargin=30,
-                leftMargin=30,
-                topMargin=30,
-                bottomMargin=30
-            )
-            
-            # Styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-                alignment=1  # Center alignment
-            )
-            
-            # Prepare data
-            # Filter out unwanted columns and rename them
-            export_columns = [col for col in self.df.columns if col not in ['Select', 'Document Number']]
-            df_export = self.df[export_columns].copy()
-            
-            # Convert DataFrame to list of lists for the table
-            header = [col for col in df_export.columns]  # Use column names directly
-            data = [header]
-            
-            # Convert DataFrame values to strings and handle None/NaN
-            for _, row in df_export.iterrows():
-                row_data = []
-                for value in row:
-                    if pd.isna(value):
-                        row_data.append("")
-                    else:
-                        row_data.append(str(value))
-                data.append(row_data)
-            
-            # Calculate column widths based on content
-            col_widths = []
-            for idx in range(len(header)):
-                max_width = max(
-                    len(str(row[idx])) for row in data
-                ) * 6  # 6 points per character
-                col_widths.append(min(max_width, 150))  # Cap at 150 points for better fit
-                
-            # Create table
-            table = Table(data, colWidths=col_widths, repeatRows=1)
-            
-            # Table style
-            table_style = TableStyle([
-                # Header style
-                ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#5b93a4')),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
-                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('TOPPADDING', (0, 0), (-1, 0), 12),
-                
-                # Cell style
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
-                ('TOPPADDING', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                
-                # Text alignment
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ])
-            
-            # Alternate row colors
-            for row in range(1, len(data)):
-                if row % 2 == 0:
-                    table_style.add('BACKGROUND', (0, row), (-1, row), colors.HexColor('#255c7b'))
-                else:
-                    table_style.add('BACKGROUND', (0, row), (-1, row), colors.white)
-            
-            table.setStyle(table_style)
-            
-            # Build document
-            elements = []
-            
-            # Add title
-            title = Paragraph(f"FABSI - List of Service: {self.current_project}", title_style)
-            elements.append(title)
-            elements.append(Spacer(1, 20))  # Add some space after title
-            
-            # Add table
-            elements.append(table)
-            
-            # Generate PDF
-            doc.build(elements)
-            
+            from pdf_report import write_pdf_report
+        except ImportError as e:
+            messagebox.showerror("Error", f"PDF export needs reportlab: {e}")
+            return
+
+        # Ask for save location
+        path = filedialog.asksaveasfilename(
+            defaultextension=".pdf",
+            filetypes=[("PDF", "*.pdf")]
+        )
+        if not path:
+            return
+
+        # Filter out unwanted columns; rows are streamed page by page from the current view
+        df_export = self.df
+        export_columns = [col for col in df_export.columns if col not in ['Select', 'Document Number']]
+        title = f"FABSI - List of Service: {self.current_project}"
+
+        def run_export(task):
+            rows = df_export[export_columns].itertuples(index=False, name=None)
+            write_pdf_report(path, title, export_columns, rows,
+                             progress=task.report_progress, check_cancelled=task.check_cancelled)
+            return path
+
+        def on_saved(path):
             # Open the generated PDF
             subprocess.Popen(['start', '', path], shell=True)
             messagebox.showinfo("Success", f"PDF file saved successfully:\n{path}")
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to create PDF: {str(e)}")
-            logging.error(f"PDF creation error: {str(e)}")
-            logging.error(traceback.format_exc())
+
+        self.executor.submit("save_to_pdf", run_export, pass_task=True,
+                             on_success=on_saved, on_error=self.on_pdf_error,
+                             message="Creating PDF...")
+
+    def save_project_pdfs(self):
+        """Write one PDF per project into a folder, in parallel"""
+        try:
+            from pdf_report import write_project_pdfs
+        except ImportError as e:
+            messagebox.showerror("Error", f"PDF export needs reportlab: {e}")
+            return
+
+        out_dir = filedialog.askdirectory(title="Folder for the project PDFs")
+        if not out_dir:
+            return
+
+        db_path = os.path.join(os.path.dirname(__file__), 'Workload.db')
+        columns = [col for col in self.display_columns if col not in ['Select', 'ID', 'Document Number']]
+
+        def run_export(task):
+            projects = get_dimension_cache(db_path).get("project").rows
+            return write_project_pdfs(db_path, PROJECT_SERVICES_QUERY, projects,
+                                      out_dir, columns, "FABSI - List of Service: ",
+                                      progress=task.report_progress, check_cancelled=task.check_cancelled)
+
+        self.executor.submit(
+            "save_project_pdfs", run_export, pass_task=True,
+            on_success=lambda paths: messagebox.showinfo("Success", f"Saved {len(paths)} project PDFs to:\n{out_dir}"),
+            on_error=self.on_pdf_error,
+            message="Creating project PDFs..."
+        )
+
+    def on_pdf_error(self, e):
+        messagebox.showerror("Error", f"Failed to create PDF: {str(e)}")
+        logging.error(f"PDF creation error: {str(e)}")
+        logging.error("".join(traceback.format_exception(type(e), e, e.__traceback__)))
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Worker processes in the packaged executable
+    # Start importing pandas while the window is being built
+    preload("pandas")
     root = ctk.CTk()
     screen_width = root.winfo_screenwidth()
     screen_height = root.winfo_screenheight()
@@ -0,0 +1,213 @@
+"""
+Background task executor that keeps database I/O and heavy pandas work off the Tk main thread
+"""
+
+import logging
+import queue
+import threading
+import traceback
+from concurrent.futures import CancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task when its request has been cancelled or superseded"""
+
+
+class Task:
+    """Handle for one submitted unit of work.
+
+    Thread-pool task bodies that accept the task (``pass_task=True``) can call
+    ``check_cancelled()`` between steps and ``report_progress()`` to update the
+    busy indicator.
+    """
+
+    def __init__(self, executor, key, message=None):
+        self.executor = executor
+        self.key = key
+        self.message = message
+        self.future = None
+        self.on_success = None
+        self.on_error = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """Ask the task to stop; its result will never be delivered"""
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def check_cancelled(self):
+        """Raise TaskCancelled if the task has been cancelled"""
+        if self._cancel_event.is_set():
+            raise TaskCancelled(self.key)
+
+    def report_progress(self, done, total=None, message=None):
+        """Send a progress update to the UI thread (safe to call from a worker)"""
+        self.executor._events.put((self, "progress", (done, total, message)))
+
+
+class BackgroundExecutor:
+    """Runs work on a thread pool (I/O) or process pool (CPU) and delivers results on the Tk thread.
+
+    Every task is submitted under a key. Submitting a new task with the same key
+    cancels the previous one, so a fast project switch never paints stale data.
+    Results are handed back from a ``root.after`` poll loop, which makes it safe
+    to touch widgets in ``on_success``/``on_error`` callbacks.
+    """
+
+    POLL_MS = 50
+
+    def __init__(self, root, io_workers=4, cpu_workers=None, on_busy_change=None, on_progress=None):
+        self.root = root
+        self.on_busy_change = on_busy_change  # callback(list of running tasks)
+        self.on_progress = on_progress        # callback(task, done, total, message)
+        self._io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="background-io")
+        self._cpu_pool = None                 # created on first CPU task - spawning processes is slow
+        self._cpu_workers = cpu_workers
+        self._events = queue.Queue()
+        self._latest = {}                     # key -> most recent task
+        self._active = []
+        self._polling = False
+        self._closed = False
+
+    def _get_cpu_pool(self):
+        if self._cpu_pool is None:
+            self._cpu_pool = ProcessPoolExecutor(max_workers=self._cpu_workers)
+        return self._cpu_pool
+
+    def submit(self, key, func, *args, on_success=None, on_error=None, cpu=False,
+               pass_task=False, message=None, **kwargs):
+        """Run func(*args, **kwargs) in the background under key.
+
+        ``cpu=True`` sends the call to the process pool; func and its arguments
+        must then be picklable (module-level function, plain data).
+        ``pass_task=True`` passes the Task as the first argument (thread pool only).
+        """
+        if self._closed:
+            raise RuntimeError("Background executor has been shut down")
+
+        previous = self._latest.get(key)
+        if previous is not None:
+            previous.cancel()
+
+        task = Task(self, key, message)
+        task.on_success = on_success
+        task.on_error = on_error
+        self._latest[key] = task
+
+        future = None
+        if cpu:
+            try:
+                future = self._get_cpu_pool().submit(func, *args, **kwargs)
+            except Exception as e:
+                # Broken or unavailable process pool - fall back to a thread
+                logging.warning(f"Process pool unavailable, running '{key}' on a thread: {e}")
+                self._cpu_pool = None
+        if future is None:
+            call_args = (task,) + args if pass_task and not cpu else args
+            future = self._io_pool.submit(func, *call_args, **kwargs)
+
+        task.future = future
+        self._active.append(task)
+        future.add_done_callback(lambda f, t=task: self._events.put((t, "done", f)))
+
+        self._notify_busy()
+        self._ensure_polling()
+        return task
+
+    def cancel(self, key):
+        """Cancel the current task for key, if any"""
+        task = self._latest.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def cancel_all(self):
+        """Cancel every task that is still pending or running"""
+        for key in list(self._latest):
+            self.cancel(key)
+
+    def is_current(self, task):
+        """True while task is the latest request for its key and not cancelled"""
+        return not task.cancelled and self._latest.get(task.key) is task
+
+    @property
+    def busy(self):
+        return bool(self._active)
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_MS, self._poll)
+
+    def _poll(self):
+        """Drain worker events on the Tk thread"""
+        finished = False
+        try:
+            while True:
+                try:
+                    task, kind, payload = self._events.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "progress":
+                    if self.is_current(task) and self.on_progress:
+                        self.on_progress(task, *payload)
+                else:
+                    self._finish(task, payload)
+                    finished = True
+        finally:
+            # Notify once per drain so chained stages don't flicker the indicator
+            if finished:
+                self._notify_busy()
+            if self._active and not self._closed:
+                self.root.after(self.POLL_MS, self._poll)
+            else:
+                self._polling = False
+
+    def _finish(self, task, future):
+        if task in self._active:
+            self._active.remove(task)
+        current = self.is_current(task)
+        if self._latest.get(task.key) is task:
+            del self._latest[task.key]
+
+        if not current:
+            return  # superseded or cancelled - drop the result
+
+        try:
+            result = future.result()
+        except (CancelledError, TaskCancelled):
+            return
+        except Exception as e:
+            if task.on_error:
+                task.on_error(e)
+            else:
+                logging.error(f"Background task '{task.key}' failed: {e}")
+                traceback.print_exception(type(e), e, e.__traceback__)
+            return
+
+        if task.on_success:
+            try:
+                task.on_success(result)
+            except Exception as e:
+                logging.error(f"Background task '{task.key}' callback failed: {e}")
+                traceback.print_exc()
+
+    def _notify_busy(self):
+        if self.on_busy_change:
+            try:
+                self.on_busy_change(list(self._active))
+            except Exception as e:
+                logging.error(f"Busy indicator update failed: {e}")
+
+    def shutdown(self):
+        """Cancel pending work and stop the pools without waiting for running tasks"""
+        self._closed = True
+        for task in list(self._active):
+            task.cancel()
+        self._io_pool.shutdown(wait=False, cancel_futures=True)
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
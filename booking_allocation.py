@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Monthly allocation of booked hours and employee utilization.
+
+Each booking's ``booking_hours`` are spread over its period (booking period
+dates, else start/end date, see booking_periods) in proportion to the
+working days (Mon-Fri) of every month it touches. ``booking_allocation``
+holds the share per (booking, month); ``employee_month_load`` the total per
+(employee, month) - the compact table utilization is read from.
+
+Both are maintained incrementally: ``refresh_allocation`` reads the
+project_bookings changes from the change log since its last run and
+re-spreads only those bookings, then re-sums only the employee-months they
+touched. When the log no longer reaches back that far, everything is rebuilt.
+
+``Utilization`` holds load and capacity (employee_extended.monthly_hours) as
+employees x months arrays, so "who is over 100% in Q3" is one vectorized
+comparison.
+
+    python booking_allocation.py --period 2025-Q3          # over 100% in any month of Q3
+    python booking_allocation.py --period 2025-Q3 --average --threshold 90
+    python booking_allocation.py --rebuild
+"""
+
+import argparse
+import sqlite3
+import time
+
+from booking_periods import parse_period
+from change_log import ensure_change_log, latest_seq, read_changes
+from startup import LazyModule
+
+np = LazyModule("numpy")
+
+BOOKINGS_TABLE = "project_bookings"
+ALLOCATION_TABLE = "booking_allocation"
+LOAD_TABLE = "employee_month_load"
+STATE_TABLE = "booking_allocation_state"
+CAPACITY_COLUMN = "monthly_hours"
+
+MAX_MONTHS = 120  # longer periods are taken for data errors and not allocated
+
+# A booking's period: the parsed booking period, else its start/end date (shared by overbooking and cost_cube)
+PERIOD_START = "COALESCE(booking_period_from, start_date)"
+PERIOD_END = "COALESCE(booking_period_to, end_date)"
+
+BOOKING_SOURCE = f"""
+    SELECT id, employee_id, booking_hours, {PERIOD_START}, {PERIOD_END}
+    FROM {BOOKINGS_TABLE}
+    WHERE employee_id IS NOT NULL AND booking_hours IS NOT NULL AND booking_hours != 0
+"""
+
+
+def ensure_booking_allocation(conn):
+    """Create the allocation tables and bring them up to date"""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (BOOKINGS_TABLE,)).fetchone():
+        return
+    ensure_change_log(conn)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ALLOCATION_TABLE} (
+            booking_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            employee_id INTEGER NOT NULL,
+            hours REAL NOT NULL,
+            PRIMARY KEY (booking_id, month)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {LOAD_TABLE} (
+            employee_id INTEGER NOT NULL,
+            month TEXT NOT NULL,
+            hours REAL NOT NULL,
+            PRIMARY KEY (employee_id, month)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{ALLOCATION_TABLE}_employee_month "
+                 f"ON {ALLOCATION_TABLE}(employee_id, month)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{LOAD_TABLE}_month ON {LOAD_TABLE}(month, employee_id)")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} (id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER)")
+    conn.commit()
+    refresh_allocation(conn)
+
+
+def working_days(starts, ends):
+    """Working days (Mon-Fri) from starts up to ends (exclusive), as datetime64[D]; negative when reversed"""
+    return np.busday_count(np.asarray(starts, dtype='datetime64[D]'), np.asarray(ends, dtype='datetime64[D]'))
+
+
+def spread_hours(hours, starts, ends):
+    """Split hours over the months of [start, end] (inclusive days) by working days.
+
+    Returns (row, month, hours) arrays - row indexing the inputs, month as
+    datetime64[M]. A period without working days is split by calendar days;
+    rows with a missing, reversed or overlong period are left out.
+    """
+    hours = np.asarray(hours, dtype=float)
+    starts = np.asarray(starts, dtype='datetime64[D]')
+    ends = np.asarray(ends, dtype='datetime64[D]')
+    first = starts.astype('datetime64[M]')
+    counts = (ends.astype('datetime64[M]') - first).astype(np.int64) + 1
+    valid = ~np.isnat(starts) & ~np.isnat(ends) & (ends >= starts) & (counts <= MAX_MONTHS) & ~np.isnan(hours)
+    rows = np.flatnonzero(valid)
+    counts = counts[rows]
+    # One entry per (row, month): repeat the row, count the months up from its first one
+    row = np.repeat(rows, counts)
+    offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    month = first[row] + offset
+    segment_start = np.maximum(month.astype('datetime64[D]'), starts[row])
+    segment_end = np.minimum((month + 1).astype('datetime64[D]'), ends[row] + 1)  # exclusive
+    weight = working_days(segment_start, segment_end).astype(float)
+    total = working_days(starts[row], ends[row] + 1).astype(float)
+    no_workdays = total == 0
+    weight[no_workdays] = (segment_end - segment_start)[no_workdays].astype(float)
+    total[no_workdays] = (ends[row] + 1 - starts[row])[no_workdays].astype(float)
+    return row, month, hours[row] * weight / total
+
+
+def _allocate(conn, bookings):
+    """Insert the monthly shares of bookings [(id, employee id, hours, from, to)]; returns their (employee, month) keys"""
+    if not bookings:
+        return []
+    booking_ids, employee_ids, hours, starts, ends = zip(*bookings)
+    row, month, shares = spread_hours(
+        hours, [str(day)[:10] if day else 'NaT' for day in starts], [str(day)[:10] if day else 'NaT' for day in ends])
+    booking_ids = np.asarray(booking_ids, dtype=np.int64)[row].tolist()
+    employee_ids = np.asarray(employee_ids, dtype=np.int64)[row].tolist()
+    months = month.astype(str).tolist()
+    conn.executemany(f"INSERT INTO {ALLOCATION_TABLE} (booking_id, month, employee_id, hours) VALUES (?, ?, ?, ?)",
+                     zip(booking_ids, months, employee_ids, shares.tolist()))
+    return list(zip(employee_ids, months))
+
+
+def rebuild_allocation(conn):
+    """Re-spread every booking and re-sum every employee-month (not committed)"""
+    conn.execute(f"DELETE FROM {ALLOCATION_TABLE}")
+    conn.execute(f"DELETE FROM {LOAD_TABLE}")
+    _allocate(conn, conn.execute(BOOKING_SOURCE).fetchall())
+    conn.execute(f"INSERT INTO {LOAD_TABLE} (employee_id, month, hours) "
+                 f"SELECT employee_id, month, SUM(hours) FROM {ALLOCATION_TABLE} GROUP BY employee_id, month")
+
+
+def reallocate_bookings(conn, booking_ids):
+    """Re-spread the given bookings (deleted ones drop out) and re-sum the employee-months they touch (not committed)"""
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS allocation_ids (id INTEGER PRIMARY KEY)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS allocation_keys "
+                 "(employee_id INTEGER, month TEXT, PRIMARY KEY (employee_id, month)) WITHOUT ROWID")
+    conn.execute("DELETE FROM temp.allocation_ids")
+    conn.execute("DELETE FROM temp.allocation_keys")
+    conn.executemany("INSERT OR IGNORE INTO temp.allocation_ids VALUES (?)", ((i,) for i in booking_ids))
+    conn.execute(f"INSERT OR IGNORE INTO temp.allocation_keys SELECT employee_id, month FROM {ALLOCATION_TABLE} "
+                 f"WHERE booking_id IN (SELECT id FROM temp.allocation_ids)")
+    conn.execute(f"DELETE FROM {ALLOCATION_TABLE} WHERE booking_id IN (SELECT id FROM temp.allocation_ids)")
+    keys = _allocate(conn, conn.execute(
+        f"{BOOKING_SOURCE} AND id IN (SELECT id FROM temp.allocation_ids)").fetchall())
+    conn.executemany("INSERT OR IGNORE INTO temp.allocation_keys VALUES (?, ?)", keys)
+    conn.execute(f"DELETE FROM {LOAD_TABLE} WHERE (employee_id, month) IN (SELECT employee_id, month FROM temp.allocation_keys)")
+    conn.execute(f"""
+        INSERT INTO {LOAD_TABLE} (employee_id, month, hours)
+        SELECT a.employee_id, a.month, SUM(a.hours)
+        FROM temp.allocation_keys k JOIN {ALLOCATION_TABLE} a ON a.employee_id = k.employee_id AND a.month = k.month
+        GROUP BY a.employee_id, a.month
+    """)
+    conn.execute("DROP TABLE temp.allocation_ids")
+    conn.execute("DROP TABLE temp.allocation_keys")
+
+
+def refresh_allocation(conn):
+    """Apply the booking changes logged since the last refresh; returns the bookings re-spread (None = rebuilt)"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(f"SELECT seq FROM {STATE_TABLE} WHERE id = 1").fetchone()
+        pending = read_changes(conn, row[0]) if row and row[0] is not None else None
+        if pending is None:
+            seq, count = latest_seq(conn), None
+            rebuild_allocation(conn)
+        else:
+            seq, changes = pending
+            booking_ids = list(changes.get(BOOKINGS_TABLE, {}))
+            count = len(booking_ids)
+            if booking_ids:
+                reallocate_bookings(conn, booking_ids)
+        # The own writes above are not logged (the allocation tables are not tracked)
+        conn.execute(f"INSERT OR REPLACE INTO {STATE_TABLE} (id, seq) VALUES (1, ?)", (seq,))
+        conn.commit()
+        return count
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def sync_booking_allocation(db_path):
+    """refresh_allocation on its own connection (runs on an I/O thread)"""
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        return refresh_allocation(conn)
+    finally:
+        conn.close()
+
+
+def month_range(period):
+    """(first month, last month) as YYYY-MM of a period text such as "2025-Q3" or "from Jan to Dec 2025\""""
+    dates = parse_period(period)
+    if not dates:
+        raise ValueError(f"Unknown period '{period}'")
+    return dates[0][:7], dates[1][:7]
+
+
+class Utilization:
+    """Booked hours and capacity per employee and month as arrays.
+
+    ``hours`` is employees x months, ``capacity`` the monthly hours per
+    employee (NaN when unknown or 0, which makes its ratios NaN).
+    """
+
+    def __init__(self, employee_ids, months, hours, capacity):
+        self.employee_ids = np.asarray(employee_ids, dtype=np.int64)
+        self.months = np.asarray(months, dtype='datetime64[M]')
+        self.hours = np.asarray(hours, dtype=float)
+        capacity = np.asarray(capacity, dtype=float)
+        self.capacity = np.where(capacity > 0, capacity, np.nan)
+
+    @classmethod
+    def load(cls, conn, first_month, last_month):
+        """Read the load of the months first_month..last_month (YYYY-MM) of every employee"""
+        months = np.arange(np.datetime64(first_month, 'M'), np.datetime64(last_month, 'M') + 1)
+        load = conn.execute(f"SELECT employee_id, month, hours FROM {LOAD_TABLE} WHERE month BETWEEN ? AND ?",
+                            (first_month, last_month)).fetchall()
+        has_employees = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='employee_extended'").fetchone()
+        capacities = dict(conn.execute(f"SELECT id, {CAPACITY_COLUMN} FROM employee_extended")) if has_employees else {}
+        employee_ids = np.unique(np.fromiter(
+            list(capacities) + [row[0] for row in load], dtype=np.int64, count=len(capacities) + len(load)))
+        hours = np.zeros((len(employee_ids), len(months)))
+        if load:
+            load_employees, load_months, load_hours = zip(*load)
+            hours[np.searchsorted(employee_ids, load_employees),
+                  (np.asarray(load_months, dtype='datetime64[M]') - months[0]).astype(np.int64)] = load_hours
+        capacity = [np.nan if capacities.get(e) is None else capacities[e] for e in employee_ids.tolist()]
+        return cls(employee_ids, months, hours, capacity)
+
+    @property
+    def ratios(self):
+        """Load / capacity per employee and month"""
+        return self.hours / self.capacity[:, None]
+
+    def over(self, threshold=1.0):
+        """[(employee id, month, hours, capacity, ratio)] of every employee-month above threshold, highest first"""
+        ratios = self.ratios
+        rows, columns = np.nonzero(ratios > threshold)
+        order = np.argsort(-ratios[rows, columns], kind='stable')
+        rows, columns = rows[order], columns[order]
+        return list(zip(self.employee_ids[rows].tolist(), self.months[columns].astype(str).tolist(),
+                        self.hours[rows, columns].tolist(), self.capacity[rows].tolist(),
+                        ratios[rows, columns].tolist()))
+
+    def over_average(self, threshold=1.0):
+        """[(employee id, hours, capacity, ratio)] of employees above threshold over all months together"""
+        hours = self.hours.sum(axis=1)
+        capacity = self.capacity * len(self.months)
+        ratios = hours / capacity
+        rows = np.flatnonzero(ratios > threshold)
+        rows = rows[np.argsort(-ratios[rows], kind='stable')]
+        return list(zip(self.employee_ids[rows].tolist(), hours[rows].tolist(),
+                        capacity[rows].tolist(), ratios[rows].tolist()))
+
+
+def benchmark(employees=5000, months=36, runs=5, seed=1):
+    """Seconds to find the employee-months over capacity in a synthetic load (fastest of runs)"""
+    rng = np.random.default_rng(seed)
+    utilization = Utilization(np.arange(1, employees + 1), np.datetime64("2025-01") + np.arange(months),
+                              rng.uniform(0, 200, size=(employees, months)), rng.choice([120, 160, 168], employees))
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        found = utilization.over(1.0)
+        timings.append(time.perf_counter() - started)
+    return min(timings), len(found)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Update the monthly allocation and list employees over capacity")
+    parser.add_argument("db_path", nargs="?", default="workload.db", help="database (default: workload.db)")
+    parser.add_argument("--period", default=None, help='period to check, e.g. "2025-Q3" (default: this year)')
+    parser.add_argument("--threshold", type=float, default=100, help="utilization in percent (default: 100)")
+    parser.add_argument("--average", action="store_true", help="compare the period as a whole, not each month")
+    parser.add_argument("--rebuild", action="store_true", help="re-spread every booking")
+    parser.add_argument("--benchmark", action="store_true", help="time the check on synthetic data")
+    parser.add_argument("--employees", type=int, default=5000)
+    parser.add_argument("--months", type=int, default=36)
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        seconds, found = benchmark(args.employees, args.months)
+        print(f"Checked {args.employees:,} employees x {args.months} months in {seconds * 1000:.1f} ms "
+              f"({found:,} over capacity)")
+        return 0
+    first_month, last_month = month_range(args.period or time.strftime("%Y"))
+    conn = sqlite3.connect(args.db_path)
+    try:
+        ensure_booking_allocation(conn)
+        if args.rebuild:
+            conn.execute(f"DELETE FROM {STATE_TABLE}")
+            conn.commit()
+            refresh_allocation(conn)
+        utilization = Utilization.load(conn, first_month, last_month)
+    finally:
+        conn.close()
+    threshold = args.threshold / 100
+    if args.average:
+        over = utilization.over_average(threshold)
+        print(f"{len(over)} employees over {args.threshold:g}% in {first_month}..{last_month}")
+        for employee_id, hours, capacity, ratio in over:
+            print(f"  employee {employee_id}: {hours:.1f} h of {capacity:.0f} h ({ratio:.0%})")
+    else:
+        over = utilization.over(threshold)
+        print(f"{len(over)} employee-months over {args.threshold:g}% in {first_month}..{last_month}")
+        for employee_id, month, hours, capacity, ratio in over:
+            print(f"  employee {employee_id} {month}: {hours:.1f} h of {capacity:.0f} h ({ratio:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
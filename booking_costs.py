@@ -0,0 +1,88 @@
+"""
+Derived cost and hour columns of project_bookings, maintained by SQLite.
+
+``total_cost`` (actual hours x hourly rate) and ``booking_cost_forecast``
+(booking hours x unit rate) are stored columns kept current by triggers, so
+every writer - grid edits, imports, bulk updates, other programs - leaves
+them consistent without Python recomputing them per row. Remaining and
+overrun hours are virtual generated columns that every query can read.
+"""
+
+import logging
+
+BOOKINGS_TABLE = "project_bookings"
+
+# Stored derived column -> expression; a side that is NULL keeps the current value (e.g. imported costs)
+DERIVED_COSTS = {
+    "total_cost": "ROUND(actual_hours * hourly_rate, 2)",
+    # The unit rate is kept in the booking's employee snapshot (see booking_storage)
+    "booking_cost_forecast": "ROUND(booking_hours * COALESCE(unit_rate_usd, "
+                             "(SELECT es.unit_rate_usd FROM employee_snapshot es WHERE es.id = employee_snapshot_id)), 2)",
+}
+COST_INPUTS = ("actual_hours", "hourly_rate", "booking_hours", "unit_rate_usd", "employee_snapshot_id")
+
+# Generated (virtual) columns -> expression
+DERIVED_HOURS = {
+    "remaining_hours": "MAX(COALESCE(booking_hours, 0) - COALESCE(actual_hours, 0), 0)",
+    "overrun_hours": "MAX(COALESCE(actual_hours, 0) - COALESCE(booking_hours_accepted, booking_hours, 0), 0)",
+}
+
+
+def cost_assignments():
+    """SET clause recomputing every derived cost from its inputs"""
+    return ", ".join(f"{column} = COALESCE({expression}, {column})"
+                     for column, expression in DERIVED_COSTS.items())
+
+
+def ensure_hour_columns(conn):
+    """Add the generated hour columns that are missing"""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_xinfo({BOOKINGS_TABLE})")}
+    for column, expression in DERIVED_HOURS.items():
+        if column not in columns:
+            conn.execute(f"ALTER TABLE {BOOKINGS_TABLE} ADD COLUMN {column} DECIMAL(10,2) "
+                         f"GENERATED ALWAYS AS ({expression}) VIRTUAL")
+
+
+def ensure_booking_costs(conn):
+    """Create the cost triggers and the generated hour columns; recompute all costs when a trigger changed
+
+    Needs the snapshot storage (booking_storage.ensure_booking_storage) to be set up first.
+    """
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_xinfo({BOOKINGS_TABLE})")}
+    if not set(COST_INPUTS) | set(DERIVED_COSTS) <= columns:
+        logging.warning(f"{BOOKINGS_TABLE} lacks cost columns, derived costs are not maintained")
+        return
+    ensure_hour_columns(conn)
+    definitions = {
+        "trg_project_bookings_costs_insert": f"""
+            CREATE TRIGGER trg_project_bookings_costs_insert AFTER INSERT ON {BOOKINGS_TABLE}
+            BEGIN
+                UPDATE {BOOKINGS_TABLE} SET {cost_assignments()} WHERE id = NEW.id;
+            END""",
+        # Fires only when an input changes; the costs it writes are not inputs, so it never recurses
+        "trg_project_bookings_costs_update": f"""
+            CREATE TRIGGER trg_project_bookings_costs_update
+            AFTER UPDATE OF {', '.join(COST_INPUTS)} ON {BOOKINGS_TABLE}
+            BEGIN
+                UPDATE {BOOKINGS_TABLE} SET {cost_assignments()} WHERE id = NEW.id;
+            END""",
+    }
+    existing = dict(conn.execute("SELECT name, sql FROM sqlite_master WHERE type='trigger'"))
+    changed = [name for name, sql in definitions.items() if existing.get(name) != sql.strip()]
+    for name in changed:
+        # New or with an older definition
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+        conn.execute(definitions[name].strip())
+    if changed:
+        updated = recompute_booking_costs(conn)
+        logging.info(f"Derived booking costs set up, {updated} bookings recomputed")
+    conn.commit()
+
+
+def recompute_booking_costs(conn, where="1", params=()):
+    """Recompute the derived costs of the bookings matching where in one statement; returns rows changed"""
+    changed = " OR ".join(f"{column} IS NOT COALESCE({expression}, {column})"
+                          for column, expression in DERIVED_COSTS.items())
+    cursor = conn.execute(f"UPDATE {BOOKINGS_TABLE} SET {cost_assignments()} WHERE ({where}) AND ({changed})",
+                          params)
+    return cursor.rowcount
@@ -0,0 +1,88 @@
+"""
+Query and columns of the project bookings grid.
+
+Kept apart from the GUI so command-line tools (the booking_storage
+benchmark) run the same query without importing Tk.
+"""
+
+
+# Columns shown in the project bookings grid (with Select checkbox)
+BOOKING_GRID_COLUMNS = (
+    "Select", "ID", "Cost Center", "GHRS ID", "Employee Name", "Department",
+    "Hub", "Work Location", "Business Unit", "Tipo", "Tipo Description", "SAP Tipo",
+    "SAABU Rate (EUR)", "SAABU Rate (USD)", "Local Agency Rate (USD)", "Unit Rate (USD)",
+    "Monthly Hours", "Annual Hours", "Workload 2025_Planned", "Workload 2025_Actual",
+    "Remark", "Project", "Item", "Technical Unit", "Activities", 
+    "Booking Period From", "Booking Period To",
+    "Actual Hours", "Hourly Rate", "Total Cost", "Status",
+    "Booking Date", "Start Date", "End Date"
+)
+
+# Grid columns shown through COALESCE with a joined table -> the booking column actually stored.
+# The stored values follow the grid columns in BOOKING_GRID_SELECT (in this order) and are kept
+# as hidden DataFrame columns, so edits are checked for conflicts against what is in the database.
+BOOKING_STORED_COLUMNS = {
+    "GHRS ID": "ghrs_id",
+    "Employee Name": "employee_name",
+    "Project": "project_name",
+    "Technical Unit": "technical_unit_name",
+    "Activities": "activities_name",
+}
+
+
+def stored_column(column):
+    """Hidden DataFrame column holding the stored value of a COALESCE-displayed grid column"""
+    return f"{column} (stored)"
+
+
+BOOKING_GRID_SELECT = """
+    SELECT 
+        pb.id,
+        pb.cost_center,
+        COALESCE(e.ghrs_id, pb.ghrs_id, 'N/A') as ghrs_id,
+        COALESCE(e.name, pb.employee_name, 'N/A') as employee_name,
+        COALESCE(d.name, pb.dept_description, 'N/A') as department_name,
+        COALESCE(h.name, 'N/A') as hub_name,
+        pb.work_location,
+        pb.business_unit,
+        pb.tipo,
+        pb.tipo_description,
+        pb.sap_tipo,
+        pb.saabu_rate_eur,
+        pb.saabu_rate_usd,
+        pb.local_agency_rate_usd,
+        pb.unit_rate_usd,
+        pb.monthly_hours,
+        pb.annual_hours,
+        pb.workload_2025_planned,
+        pb.workload_2025_actual,
+        pb.remark,
+        COALESCE(pb.project_name, p.name, 'N/A') as project,
+        pb.item,
+        COALESCE(pb.technical_unit_name, tu.name, 'N/A') as technical_unit,
+        COALESCE(pb.activities_name, a.name, 'N/A') as activities,
+        pb.booking_period_from,
+        pb.booking_period_to,
+        pb.actual_hours,
+        pb.hourly_rate,
+        pb.total_cost,
+        pb.booking_status,
+        pb.booking_date,
+        pb.start_date,
+        pb.end_date,
+        pb.ghrs_id,
+        pb.employee_name,
+        pb.project_name,
+        pb.technical_unit_name,
+        pb.activities_name
+    FROM project_bookings_full pb
+    LEFT JOIN employee e ON pb.employee_id = e.id
+    LEFT JOIN technical_unit tu ON pb.technical_unit_id = tu.id
+    LEFT JOIN project p ON pb.project_id = p.id
+    LEFT JOIN service s ON pb.service_id = s.id
+    LEFT JOIN title t ON s.title_id = t.id
+    LEFT JOIN activities a ON s.activities_id = a.id
+    LEFT JOIN department d ON pb.department_id = d.id
+    LEFT JOIN hub h ON pb.hub_id = h.id
+"""
+BOOKING_GRID_QUERY = BOOKING_GRID_SELECT + "    ORDER BY pb.id\n"
@@ -0,0 +1,177 @@
+"""
+Structured booking periods.
+
+``booking_period`` (and ``booking_period_accepted``) are free text such as
+"from Jan to Dec 2025", "2025-Q1" or "Mar 2025 - Feb 2026". The parsed
+first and last day are kept in ``booking_period_from`` / ``booking_period_to``
+(indexed), so date-range filters and monthly rollups are range scans.
+
+Changing the text clears the dates through a trigger, whichever program made
+the change; ``normalize_booking_periods`` then fills in every booking
+without dates, parsing each distinct text once and writing all rows in one
+statement. Dates entered directly are kept until the text changes.
+"""
+
+import calendar
+import logging
+import re
+import sqlite3
+from functools import lru_cache
+
+BOOKINGS_TABLE = "project_bookings"
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+    # Spanish abbreviations that differ
+    "ene": 1, "abr": 4, "ago": 8, "dic": 12,
+}
+_MONTH = r"(jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec|ene|abr|ago|dic)[a-z]*\.?"
+_SEP = r"(?:\s*[-–—/]\s*|\s+(?:to|until|till|through|thru|a|al|hasta)\s+)"
+_PREFIX = re.compile(r"^(?:from|de|del|desde)\s+")
+
+_ISO_RANGE = re.compile(rf"^(\d{{4}}-\d{{2}}-\d{{2}}){_SEP}(\d{{4}}-\d{{2}}-\d{{2}})$")
+_MONTH_RANGE = re.compile(rf"^{_MONTH}\s*(\d{{4}})?{_SEP}{_MONTH}\s*(\d{{4}})$")
+_MONTH_SINGLE = re.compile(rf"^{_MONTH}[\s'-]*(\d{{4}})$")
+_YEAR_MONTH_RANGE = re.compile(rf"^(\d{{4}})-(\d{{1,2}}){_SEP}(\d{{4}})-(\d{{1,2}})$")
+_YEAR_MONTH = re.compile(r"^(\d{4})-(\d{1,2})$")
+_QUARTER_FIRST = re.compile(r"\b(\d{4})[- ]?q([1-4])\b")  # "2025-Q1" / "2025 Q1" -> "q1 2025"
+_QUARTER_RANGE = re.compile(rf"^q([1-4])\s*(\d{{4}})?(?:{_SEP}q([1-4])\s*(\d{{4}})?)?$")
+_YEAR = re.compile(r"^(?:fy\s*)?(\d{4})$")
+
+
+def _first_day(year, month):
+    return f"{year:04d}-{month:02d}-01"
+
+
+def _last_day(year, month):
+    return f"{year:04d}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
+
+
+def _range(first, last):
+    """(first, last), or None for an inverted range"""
+    return (first, last) if first <= last else None
+
+
+@lru_cache(maxsize=4096)
+def parse_period(text):
+    """Return (first day, last day) as YYYY-MM-DD for a period text, or None if it is not understood"""
+    if not text:
+        return None
+    s = _PREFIX.sub("", re.sub(r"\s+", " ", str(text)).strip().lower())
+    try:
+        m = _ISO_RANGE.match(s)
+        if m:
+            return _range(m.group(1), m.group(2))
+        m = _MONTH_RANGE.match(s)
+        if m:
+            start_month, end_month = MONTHS[m.group(1)], MONTHS[m.group(3)]
+            end_year = int(m.group(4))
+            # "Nov to Feb 2026" starts in the previous year
+            start_year = int(m.group(2)) if m.group(2) else end_year - (start_month > end_month)
+            return _range(_first_day(start_year, start_month), _last_day(end_year, end_month))
+        m = _MONTH_SINGLE.match(s)
+        if m:
+            month, year = MONTHS[m.group(1)], int(m.group(2))
+            return _first_day(year, month), _last_day(year, month)
+        m = _YEAR_MONTH_RANGE.match(s)
+        if m:
+            return _range(_first_day(int(m.group(1)), int(m.group(2))), _last_day(int(m.group(3)), int(m.group(4))))
+        m = _YEAR_MONTH.match(s)
+        if m:
+            year, month = int(m.group(1)), int(m.group(2))
+            return _first_day(year, month), _last_day(year, month)
+        m = _QUARTER_RANGE.match(_QUARTER_FIRST.sub(r"q\2 \1", s))
+        if m:
+            start_q, start_year, end_q, end_year = m.groups()
+            end_q = end_q or start_q
+            end_year = end_year or start_year
+            start_year = start_year or end_year
+            if not end_year:
+                return None
+            return _range(_first_day(int(start_year), int(start_q) * 3 - 2),
+                          _last_day(int(end_year), int(end_q) * 3))
+        m = _YEAR.match(s)
+        if m:
+            return _first_day(int(m.group(1)), 1), _last_day(int(m.group(1)), 12)
+    except ValueError:  # month 13 and the like
+        return None
+    return None
+
+
+def ensure_booking_periods(conn):
+    """Create the period indexes and the trigger clearing parsed dates when the text changes; backfill"""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({BOOKINGS_TABLE})")}
+    if not {"booking_period", "booking_period_accepted", "booking_period_from", "booking_period_to"} <= columns:
+        return 0
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{BOOKINGS_TABLE}_period "
+                 f"ON {BOOKINGS_TABLE}(booking_period_from, booking_period_to)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{BOOKINGS_TABLE}_employee_period "
+                 f"ON {BOOKINGS_TABLE}(employee_id, booking_period_from, booking_period_to)")
+    # Only bookings still waiting for dates, so finding them stays cheap
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{BOOKINGS_TABLE}_period_pending "
+                 f"ON {BOOKINGS_TABLE}(booking_period, booking_period_accepted) "
+                 f"WHERE booking_period_from IS NULL OR booking_period_to IS NULL")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{BOOKINGS_TABLE}_period_text
+        AFTER UPDATE OF booking_period, booking_period_accepted ON {BOOKINGS_TABLE}
+        WHEN NEW.booking_period IS NOT OLD.booking_period
+          OR NEW.booking_period_accepted IS NOT OLD.booking_period_accepted
+        BEGIN
+            UPDATE {BOOKINGS_TABLE} SET booking_period_from = NULL, booking_period_to = NULL WHERE id = NEW.id;
+        END
+    """)
+    updated = normalize_booking_periods(conn)
+    conn.commit()
+    return updated
+
+
+def normalize_booking_periods(conn):
+    """Fill in the dates of bookings that have none from their period text; returns rows updated (not committed)
+
+    The booking period is used, or the accepted period when that one cannot
+    be parsed. A date that is already set is kept.
+    """
+    pending = conn.execute(f"""
+        SELECT DISTINCT booking_period, booking_period_accepted FROM {BOOKINGS_TABLE}
+        WHERE (booking_period_from IS NULL OR booking_period_to IS NULL)
+          AND (booking_period IS NOT NULL OR booking_period_accepted IS NOT NULL)
+    """).fetchall()
+    parsed = []
+    for period, accepted in pending:
+        dates = parse_period(period) or parse_period(accepted)
+        if dates:
+            parsed.append((period, accepted) + dates)
+    if not parsed:
+        return 0
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS parsed_periods "
+                 "(booking_period TEXT, booking_period_accepted TEXT, date_from DATE, date_to DATE)")
+    conn.execute("DELETE FROM temp.parsed_periods")
+    conn.executemany("INSERT INTO temp.parsed_periods VALUES (?, ?, ?, ?)", parsed)
+    cursor = conn.execute(f"""
+        UPDATE {BOOKINGS_TABLE} AS pb SET
+            booking_period_from = COALESCE(pb.booking_period_from, p.date_from),
+            booking_period_to = COALESCE(pb.booking_period_to, p.date_to)
+        FROM temp.parsed_periods p
+        WHERE (pb.booking_period_from IS NULL OR pb.booking_period_to IS NULL)
+          AND pb.booking_period IS p.booking_period AND pb.booking_period_accepted IS p.booking_period_accepted
+    """)
+    conn.execute("DROP TABLE temp.parsed_periods")
+    return cursor.rowcount
+
+
+def sync_booking_periods(db_path):
+    """normalize_booking_periods in its own transaction (runs on an I/O thread); returns rows updated"""
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        updated = normalize_booking_periods(conn)
+        conn.commit()
+        if updated:
+            logging.info(f"Booking period dates filled in for {updated} bookings")
+        return updated
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
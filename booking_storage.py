@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Normalized storage of the employee attributes copied into bookings.
+
+Every booking used to carry its own copy of the employee's cost center,
+rates, hours and so on. These attribute sets now live once per distinct
+version in ``employee_snapshot`` and bookings point at one by
+``employee_snapshot_id``; the copies in ``project_bookings`` are left NULL.
+
+``project_bookings_full`` is a view with the original column names and
+values, so queries only swap the table name. Updates through the view go
+to the right place (an INSTEAD OF trigger finds or adds the snapshot
+version), and rows written straight into the table - by the insert paths
+of both apps or by other programs - are folded into a snapshot by triggers
+on the table.
+
+    python booking_storage.py                      # migrate workload.db
+    python booking_storage.py --benchmark --rows 50000
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+
+from booking_costs import ensure_hour_columns
+from booking_grid import BOOKING_GRID_QUERY
+
+BOOKINGS_TABLE = "project_bookings"
+BOOKINGS_VIEW = "project_bookings_full"
+SNAPSHOT_TABLE = "employee_snapshot"
+
+# Booking columns holding employee attributes, stored per snapshot version
+SNAPSHOT_COLUMNS = (
+    "cost_center", "ghrs_id", "employee_name", "dept_description", "work_location", "business_unit",
+    "tipo", "tipo_description", "sap_tipo", "saabu_rate_eur", "saabu_rate_usd", "local_agency_rate_usd",
+    "unit_rate_usd", "monthly_hours", "annual_hours", "workload_2025_planned", "workload_2025_actual", "remark",
+)
+
+
+def _table_columns(conn):
+    """[(name, declared type, hidden)] of project_bookings; hidden is non-zero for generated columns"""
+    return [(row[1], row[2], row[6]) for row in conn.execute(f"PRAGMA table_xinfo({BOOKINGS_TABLE})")]
+
+
+def _matches(values):
+    """Condition selecting the snapshot of NEW.employee_id whose attributes equal values (column -> expression)"""
+    return " AND ".join([f"es.employee_id IS NEW.employee_id"] +
+                        [f"es.{column} IS {values[column]}" for column in SNAPSHOT_COLUMNS])
+
+
+def _snapshot_statements(values):
+    """Statements adding the snapshot version with values (if new) and pointing the booking NEW.id at it"""
+    columns = ", ".join(SNAPSHOT_COLUMNS)
+    selected = ", ".join(values[column] for column in SNAPSHOT_COLUMNS)
+    cleared = ", ".join(f"{column} = NULL" for column in SNAPSHOT_COLUMNS)
+    return f"""
+        INSERT INTO {SNAPSHOT_TABLE} (employee_id, version, {columns})
+        SELECT NEW.employee_id,
+               COALESCE((SELECT MAX(version) FROM {SNAPSHOT_TABLE} WHERE employee_id IS NEW.employee_id), 0) + 1,
+               {selected}
+        WHERE NOT EXISTS (SELECT 1 FROM {SNAPSHOT_TABLE} es WHERE {_matches(values)});
+        UPDATE {BOOKINGS_TABLE} SET
+            employee_snapshot_id = (SELECT es.id FROM {SNAPSHOT_TABLE} es WHERE {_matches(values)} LIMIT 1),
+            {cleared}
+        WHERE id = NEW.id;
+    """
+
+
+def ensure_booking_storage(conn):
+    """Create the snapshot table, triggers and compatibility view; migrate rows not normalized yet"""
+    columns = _table_columns(conn)
+    names = {name for name, _, _ in columns}
+    if not set(SNAPSHOT_COLUMNS) <= names:
+        return 0
+    ensure_hour_columns(conn)  # part of the view
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SNAPSHOT_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER,
+            version INTEGER NOT NULL,
+            {', '.join(f'{name} {decl}' for name, decl, _ in columns if name in SNAPSHOT_COLUMNS)},
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{SNAPSHOT_TABLE}_employee ON {SNAPSHOT_TABLE}(employee_id)")
+    if "employee_snapshot_id" not in names:
+        conn.execute(f"ALTER TABLE {BOOKINGS_TABLE} ADD COLUMN employee_snapshot_id INTEGER "
+                     f"REFERENCES {SNAPSHOT_TABLE}(id)")
+    columns = _table_columns(conn)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{BOOKINGS_TABLE}_snapshot ON {BOOKINGS_TABLE}(employee_snapshot_id)")
+
+    # Rows written to the table: attributes left NULL keep the booking's current snapshot value
+    inherited = {column: f"COALESCE(NEW.{column}, (SELECT {column} FROM {SNAPSHOT_TABLE} "
+                         f"WHERE id = NEW.employee_snapshot_id))" for column in SNAPSHOT_COLUMNS}
+    any_set = " OR ".join(f"NEW.{column} IS NOT NULL" for column in SNAPSHOT_COLUMNS)
+    view_columns = ", ".join(
+        f"COALESCE(pb.{name}, es.{name}) AS {name}" if name in SNAPSHOT_COLUMNS else f"pb.{name}"
+        for name, _, _ in columns if name != "employee_snapshot_id")
+    # Updates through the view carry the full new values, so NULL clears an attribute
+    written = ", ".join(f"{name} = NEW.{name}" for name, _, hidden in columns
+                        if not hidden and name not in SNAPSHOT_COLUMNS and name not in ("id", "employee_snapshot_id"))
+    definitions = {
+        ("trigger", f"trg_{BOOKINGS_TABLE}_snapshot_insert"): f"""
+            CREATE TRIGGER trg_{BOOKINGS_TABLE}_snapshot_insert AFTER INSERT ON {BOOKINGS_TABLE}
+            BEGIN
+                {_snapshot_statements(inherited)}
+            END""",
+        ("trigger", f"trg_{BOOKINGS_TABLE}_snapshot_update"): f"""
+            CREATE TRIGGER trg_{BOOKINGS_TABLE}_snapshot_update
+            AFTER UPDATE OF employee_id, {', '.join(SNAPSHOT_COLUMNS)} ON {BOOKINGS_TABLE}
+            WHEN {any_set} OR NEW.employee_id IS NOT OLD.employee_id
+            BEGIN
+                {_snapshot_statements(inherited)}
+            END""",
+        ("view", BOOKINGS_VIEW): f"""
+            CREATE VIEW {BOOKINGS_VIEW} AS
+            SELECT {view_columns}
+            FROM {BOOKINGS_TABLE} pb LEFT JOIN {SNAPSHOT_TABLE} es ON es.id = pb.employee_snapshot_id""",
+        ("trigger", f"trg_{BOOKINGS_VIEW}_update"): f"""
+            CREATE TRIGGER trg_{BOOKINGS_VIEW}_update INSTEAD OF UPDATE ON {BOOKINGS_VIEW}
+            BEGIN
+                UPDATE {BOOKINGS_TABLE} SET {written} WHERE id = OLD.id;
+                {_snapshot_statements({column: f'NEW.{column}' for column in SNAPSHOT_COLUMNS})}
+            END""",
+    }
+    existing = {(row[0], row[1]): row[2] for row in conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE type IN ('trigger', 'view')")}
+    for (kind, name), sql in definitions.items():
+        # Recreated when the table's columns (and with them the definition) changed
+        if existing.get((kind, name)) != sql.strip():
+            conn.execute(f"DROP {kind.upper()} IF EXISTS {name}")
+            conn.execute(sql.strip())
+    migrated = migrate_bookings(conn)
+    conn.commit()
+    return migrated
+
+
+def migrate_bookings(conn):
+    """Move the attributes of bookings without a snapshot into snapshot versions (set-based); returns rows moved"""
+    columns = ", ".join(SNAPSHOT_COLUMNS)
+    pending = f"SELECT 1 FROM {BOOKINGS_TABLE} WHERE employee_snapshot_id IS NULL"
+    if conn.execute(pending + " LIMIT 1").fetchone() is None:
+        return 0
+    matches = " AND ".join([f"es.employee_id IS pb.employee_id"] +
+                           [f"es.{column} IS pb.{column}" for column in SNAPSHOT_COLUMNS])
+    conn.execute(f"""
+        INSERT INTO {SNAPSHOT_TABLE} (employee_id, version, {columns})
+        SELECT employee_id,
+               COALESCE((SELECT MAX(version) FROM {SNAPSHOT_TABLE} s WHERE s.employee_id IS pb.employee_id), 0)
+                   + ROW_NUMBER() OVER (PARTITION BY employee_id ORDER BY MIN(id)),
+               {columns}
+        FROM {BOOKINGS_TABLE} pb
+        WHERE employee_snapshot_id IS NULL
+          AND NOT EXISTS (SELECT 1 FROM {SNAPSHOT_TABLE} es WHERE {matches})
+        GROUP BY employee_id, {columns}
+    """)
+    cleared = ", ".join(f"{column} = NULL" for column in SNAPSHOT_COLUMNS)
+    cursor = conn.execute(f"""
+        UPDATE {BOOKINGS_TABLE} AS pb SET
+            employee_snapshot_id = (SELECT es.id FROM {SNAPSHOT_TABLE} es WHERE {matches} LIMIT 1),
+            {cleared}
+        WHERE employee_snapshot_id IS NULL
+    """)
+    return cursor.rowcount
+
+
+def benchmark(db_path, rows=None, runs=5):
+    """File size and grid-query scan time before and after migrating a copy of db_path"""
+    workdir = tempfile.mkdtemp(prefix="booking_storage_")
+    results = {}
+    try:
+        for label in ("denormalized", "normalized"):
+            copy = os.path.join(workdir, f"{label}.db")
+            shutil.copyfile(db_path, copy)
+            conn = sqlite3.connect(copy)
+            table_columns = [name for name, _, hidden in _table_columns(conn) if not hidden and name != "id"]
+            current = conn.execute(f"SELECT COUNT(*) FROM {BOOKINGS_TABLE}").fetchone()[0]
+            if rows and 0 < current < rows:
+                # Grow the copy by repeating the existing bookings
+                copies = -(-(rows - current) // current)
+                conn.execute(f"""
+                    INSERT INTO {BOOKINGS_TABLE} ({', '.join(table_columns)})
+                    SELECT {', '.join(table_columns)} FROM {BOOKINGS_TABLE},
+                         (WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < ?) SELECT i FROM n)
+                    LIMIT ?
+                """, (copies, rows - current))
+                conn.commit()
+            if label == "normalized":
+                ensure_booking_storage(conn)
+                query = BOOKING_GRID_QUERY
+            else:
+                query = BOOKING_GRID_QUERY.replace(f"FROM {BOOKINGS_VIEW} pb", f"FROM {BOOKINGS_TABLE} pb")
+            conn.execute("VACUUM")
+            timings = []
+            for _ in range(runs):
+                started = time.perf_counter()
+                count = len(conn.execute(query).fetchall())
+                timings.append(time.perf_counter() - started)
+            conn.close()
+            results[label] = {"rows": count, "bytes": os.path.getsize(copy), "scan_s": min(timings)}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Normalize the employee attributes of project_bookings")
+    parser.add_argument("db_path", nargs="?", default="workload.db", help="database (default: workload.db)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="measure size and scan time on copies instead of migrating")
+    parser.add_argument("--rows", type=int, help="grow the benchmark copies to this many bookings")
+    parser.add_argument("--runs", type=int, default=5, help="scans per copy (fastest is reported)")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        results = benchmark(args.db_path, args.rows, args.runs)
+        for label, result in results.items():
+            print(f"{label:>13}: {result['rows']:,} bookings, {result['bytes'] / 1e6:.2f} MB, "
+                  f"grid query {result['scan_s'] * 1000:.1f} ms")
+        before, after = results["denormalized"], results["normalized"]
+        print(f"size {1 - after['bytes'] / before['bytes']:.0%} smaller, "
+              f"scan {before['scan_s'] / after['scan_s']:.2f}x")
+        return 0
+
+    conn = sqlite3.connect(args.db_path)
+    try:
+        moved = ensure_booking_storage(conn)
+        conn.execute("VACUUM")  # give the space of the cleared copies back
+    finally:
+        conn.close()
+    print(f"{moved} bookings moved to employee snapshots")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
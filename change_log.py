@@ -0,0 +1,88 @@
+"""
+Row-level change log maintained by SQLite triggers.
+
+Every insert, update or delete on a logged table appends (table, row id,
+operation) to ``change_log`` under a monotonically increasing ``seq``
+(AUTOINCREMENT never reuses a number, even after pruning). A reader keeps the
+last seq it has applied and asks only for what came after it, so refreshing
+costs O(changes) instead of a full reload - whichever program made the change.
+"""
+
+import os
+
+from data_versions import TRACKED_TABLES
+
+CHANGE_LOG_TABLE = "change_log"
+
+# Entries kept when the log is pruned; a reader that fell further behind reloads in full
+KEEP_ENTRIES = 50000
+
+OPERATIONS = {"INSERT": "I", "UPDATE": "U", "DELETE": "D"}
+
+_logged_databases = set()  # databases already set up by this process
+
+
+def ensure_change_log(conn, tables=TRACKED_TABLES):
+    """Create the change log and its triggers for every table that exists, and prune old entries"""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CHANGE_LOG_TABLE} (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER,
+            op TEXT NOT NULL
+        )
+    """)
+    for table in tables:
+        if table not in existing:
+            continue
+        for event, op in OPERATIONS.items():
+            row = "OLD" if event == "DELETE" else "NEW"
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_changelog_{event.lower()}
+                AFTER {event} ON "{table}"
+                BEGIN
+                    INSERT INTO {CHANGE_LOG_TABLE} (table_name, row_id, op) VALUES ('{table}', {row}.id, '{op}');
+                END
+            """)
+    conn.execute(f"DELETE FROM {CHANGE_LOG_TABLE} WHERE seq <= (SELECT MAX(seq) FROM {CHANGE_LOG_TABLE}) - ?",
+                 (KEEP_ENTRIES,))
+    conn.commit()
+
+
+def ensure_logged(conn, db_path):
+    """ensure_change_log once per database and process"""
+    key = os.path.abspath(db_path)
+    if key not in _logged_databases:
+        ensure_change_log(conn)
+        _logged_databases.add(key)
+
+
+def latest_seq(conn):
+    """Sequence number of the newest entry (0 for an empty log)"""
+    return conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {CHANGE_LOG_TABLE}").fetchone()[0]
+
+
+def read_changes(conn, since, limit=None):
+    """Return (last seq, {table: {row_id: last op}}) for entries after since, or None if they were pruned.
+
+    With limit, None is also returned when more entries than that are pending -
+    the caller is then better off reloading in full.
+    """
+    oldest = conn.execute(f"SELECT MIN(seq) FROM {CHANGE_LOG_TABLE}").fetchone()[0]
+    if oldest is not None and since < oldest - 1:
+        return None
+    query = f"SELECT seq, table_name, row_id, op FROM {CHANGE_LOG_TABLE} WHERE seq > ? ORDER BY seq"
+    params = (since,)
+    if limit is not None:
+        query += " LIMIT ?"
+        params += (limit + 1,)
+    rows = conn.execute(query, params).fetchall()
+    if limit is not None and len(rows) > limit:
+        return None
+    changes = {}
+    for seq, table, row_id, op in rows:
+        changes.setdefault(table, {})[row_id] = op
+        since = seq
+    return since, changes
+
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Pre-aggregated hours and cost cube: project x technical unit x department x month.
+
+``cost_cube`` holds the sums of booked hours, actual hours, total cost and
+forecast cost per cell. A booking with a period (the same one as in
+booking_allocation: booking period, else start/end date) is spread over its
+months by working days; one without a period counts in the month of its
+booking (else creation) date. ``cost_cube_booking`` keeps each booking's
+share per month, so ``refresh_cost_cube`` - fed by the change log - only
+replaces the shares of changed bookings and re-sums the cells they touch.
+A missing project, technical unit or department is stored as 0.
+
+``CubeQuery`` answers from the cube, never from project_bookings::
+
+    query = CubeQuery(by=("project",)).slice(period="2025-Q3")
+    query.drill_down("month").rows(conn)        # project x month of Q3
+    query.roll_up("project").rows(conn)         # Q3 total
+
+    python cost_cube.py --by project,month --period 2025-Q3
+"""
+
+import argparse
+import sqlite3
+
+from booking_allocation import PERIOD_END, PERIOD_START, month_range, spread_hours
+from change_log import ensure_change_log, latest_seq, read_changes
+from startup import LazyModule
+
+np = LazyModule("numpy")
+
+BOOKINGS_TABLE = "project_bookings"
+CUBE_TABLE = "cost_cube"
+SHARES_TABLE = "cost_cube_booking"
+STATE_TABLE = "cost_cube_state"
+CUBE_VERSION = 2  # bump when the shares are computed differently; the cube is then rebuilt
+
+KEY_COLUMNS = ("project_id", "technical_unit_id", "department_id", "month")
+MEASURES = ("booking_hours", "actual_hours", "total_cost", "booking_cost_forecast")
+
+# Dimension -> (cube expression, lookup table for names or None)
+DIMENSIONS = {
+    "project": ("c.project_id", "project"),
+    "technical_unit": ("c.technical_unit_id", "technical_unit"),
+    "department": ("c.department_id", "department"),
+    "month": ("c.month", None),
+    "quarter": ("substr(c.month, 1, 4) || '-Q' || ((CAST(substr(c.month, 6, 2) AS INTEGER) + 2) / 3)", None),
+    "year": ("substr(c.month, 1, 4)", None),
+}
+
+BOOKING_SOURCE = f"""
+    SELECT id, COALESCE(project_id, 0), COALESCE(technical_unit_id, 0), COALESCE(department_id, 0),
+           {PERIOD_START}, {PERIOD_END}, substr(COALESCE(booking_date, created_at), 1, 7),
+           {', '.join(MEASURES)}
+    FROM {BOOKINGS_TABLE}
+"""
+
+
+def ensure_cost_cube(conn):
+    """Create the cube tables and bring them up to date"""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({BOOKINGS_TABLE})")}
+    if not set(MEASURES) | {"project_id", "technical_unit_id", "department_id"} <= columns:
+        return
+    ensure_change_log(conn)
+    keys = ", ".join(f"{column} {'TEXT' if column == 'month' else 'INTEGER'} NOT NULL" for column in KEY_COLUMNS)
+    measures = ", ".join(f"{measure} REAL NOT NULL DEFAULT 0" for measure in MEASURES)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SHARES_TABLE} (
+            booking_id INTEGER NOT NULL, {keys}, {measures},
+            PRIMARY KEY (booking_id, month)
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{SHARES_TABLE}_cell ON {SHARES_TABLE}({', '.join(KEY_COLUMNS)})")
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {CUBE_TABLE} (
+            {keys}, {measures},
+            PRIMARY KEY ({', '.join(KEY_COLUMNS)})
+        ) WITHOUT ROWID
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{CUBE_TABLE}_month ON {CUBE_TABLE}(month)")
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {STATE_TABLE} (id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER)")
+    if "version" not in {row[1] for row in conn.execute(f"PRAGMA table_info({STATE_TABLE})")}:
+        conn.execute(f"ALTER TABLE {STATE_TABLE} ADD COLUMN version INTEGER")
+    conn.commit()
+    refresh_cost_cube(conn)
+
+
+def _add_shares(conn, bookings):
+    """Insert the monthly shares of bookings as read by BOOKING_SOURCE; returns the cells they touch"""
+    if not bookings:
+        return []
+    columns = list(zip(*bookings))
+    booking_ids, projects, units, departments, starts, ends, booked_months = columns[:7]
+    values = np.array(columns[7:], dtype=float).T  # bookings x measures, NaN for NULL
+    row, month, fractions = spread_hours(
+        np.ones(len(bookings)), [str(day)[:10] if day else 'NaT' for day in starts],
+        [str(day)[:10] if day else 'NaT' for day in ends])
+    # Bookings without a (usable) period count whole in their booking month
+    undated = np.setdiff1d(np.arange(len(bookings)), row)
+    undated = undated[[bool(booked_months[i]) for i in undated.tolist()]] if len(undated) else undated
+    rows = np.concatenate([row, undated])
+    months = month.astype(str).tolist() + [booked_months[i] for i in undated.tolist()]
+    shares = np.nan_to_num(values[rows]) * np.concatenate([fractions, np.ones(len(undated))])[:, None]
+    keys = [(booking_ids[i], projects[i], units[i], departments[i]) for i in rows.tolist()]
+    conn.executemany(
+        f"INSERT INTO {SHARES_TABLE} (booking_id, {', '.join(KEY_COLUMNS)}, {', '.join(MEASURES)}) "
+        f"VALUES ({', '.join('?' for _ in range(1 + len(KEY_COLUMNS) + len(MEASURES)))})",
+        (key + (month_key,) + tuple(share) for key, month_key, share in zip(keys, months, shares.tolist())))
+    return [key[1:] + (month_key,) for key, month_key in zip(keys, months)]
+
+
+def _sum_cells(where=""):
+    sums = ", ".join(f"SUM(s.{measure})" for measure in MEASURES)
+    keys = ", ".join(f"s.{column}" for column in KEY_COLUMNS)
+    return (f"INSERT INTO {CUBE_TABLE} ({', '.join(KEY_COLUMNS)}, {', '.join(MEASURES)}) "
+            f"SELECT {keys}, {sums} FROM {SHARES_TABLE} s {where} GROUP BY {keys}")
+
+
+def rebuild_cost_cube(conn):
+    """Recompute every share and cell (not committed)"""
+    conn.execute(f"DELETE FROM {SHARES_TABLE}")
+    conn.execute(f"DELETE FROM {CUBE_TABLE}")
+    _add_shares(conn, conn.execute(BOOKING_SOURCE).fetchall())
+    conn.execute(_sum_cells())
+
+
+def update_bookings(conn, booking_ids):
+    """Replace the shares of the given bookings (deleted ones drop out) and re-sum the cells they touch (not committed)"""
+    keys = ", ".join(KEY_COLUMNS)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS cube_ids (id INTEGER PRIMARY KEY)")
+    conn.execute(f"CREATE TEMP TABLE IF NOT EXISTS cube_cells ({keys}, PRIMARY KEY ({keys})) WITHOUT ROWID")
+    conn.execute("DELETE FROM temp.cube_ids")
+    conn.execute("DELETE FROM temp.cube_cells")
+    conn.executemany("INSERT OR IGNORE INTO temp.cube_ids VALUES (?)", ((i,) for i in booking_ids))
+    conn.execute(f"INSERT OR IGNORE INTO temp.cube_cells SELECT {keys} FROM {SHARES_TABLE} "
+                 f"WHERE booking_id IN (SELECT id FROM temp.cube_ids)")
+    conn.execute(f"DELETE FROM {SHARES_TABLE} WHERE booking_id IN (SELECT id FROM temp.cube_ids)")
+    cells = _add_shares(conn, conn.execute(
+        f"{BOOKING_SOURCE} WHERE id IN (SELECT id FROM temp.cube_ids)").fetchall())
+    conn.executemany(f"INSERT OR IGNORE INTO temp.cube_cells VALUES ({', '.join('?' for _ in KEY_COLUMNS)})", cells)
+    conn.execute(f"DELETE FROM {CUBE_TABLE} WHERE ({keys}) IN (SELECT {keys} FROM temp.cube_cells)")
+    conn.execute(_sum_cells(f"JOIN temp.cube_cells k USING ({keys})"))
+    conn.execute("DROP TABLE temp.cube_ids")
+    conn.execute("DROP TABLE temp.cube_cells")
+
+
+def refresh_cost_cube(conn):
+    """Apply the booking changes logged since the last refresh; returns the bookings updated (None = rebuilt)"""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        row = conn.execute(f"SELECT seq, version FROM {STATE_TABLE} WHERE id = 1").fetchone()
+        current = row and row[0] is not None and row[1] == CUBE_VERSION
+        pending = read_changes(conn, row[0]) if current else None
+        if pending is None:
+            seq, count = latest_seq(conn), None
+            rebuild_cost_cube(conn)
+        else:
+            seq, changes = pending
+            booking_ids = list(changes.get(BOOKINGS_TABLE, {}))
+            count = len(booking_ids)
+            if booking_ids:
+                update_bookings(conn, booking_ids)
+        conn.execute(f"INSERT OR REPLACE INTO {STATE_TABLE} (id, seq, version) VALUES (1, ?, ?)", (seq, CUBE_VERSION))
+        conn.commit()
+        return count
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def sync_cost_cube(db_path):
+    """refresh_cost_cube on its own connection (runs on an I/O thread)"""
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        return refresh_cost_cube(conn)
+    finally:
+        conn.close()
+
+
+class CubeQuery:
+    """A view of the cube: the dimensions grouped by and the filters applied.
+
+    Filters map a dimension to a value or a list of values; ``period`` (e.g.
+    "2025-Q3", see booking_periods) limits the months. slice, roll_up and
+    drill_down return new queries, so a view can be refined step by step.
+    """
+
+    def __init__(self, by=(), filters=None, period=None):
+        for dimension in tuple(by) + tuple(filters or ()):
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown dimension '{dimension}' (known: {', '.join(DIMENSIONS)})")
+        self.by = tuple(by)
+        self.filters = dict(filters or {})
+        self.period = period
+
+    def slice(self, period=None, **filters):
+        """Restrict to dimension values (and/or a period), keeping the grouping"""
+        return CubeQuery(self.by, {**self.filters, **filters}, period or self.period)
+
+    def roll_up(self, dimension):
+        """Aggregate a grouped dimension away"""
+        return CubeQuery(tuple(d for d in self.by if d != dimension), self.filters, self.period)
+
+    def drill_down(self, dimension, value=None):
+        """Break the totals down by one more dimension; with value, also keep only that value of it"""
+        by = self.by if dimension in self.by else self.by + (dimension,)
+        query = CubeQuery(by, self.filters, self.period)
+        return query.slice(**{dimension: value}) if value is not None else query
+
+    def sql(self):
+        """(SQL, parameters) of the query"""
+        selected, joins, where, params = [], [], [], []
+        for dimension in self.by:
+            expression, lookup = DIMENSIONS[dimension]
+            selected.append(f"{expression} AS {dimension}")
+            if lookup:
+                joins.append(f"LEFT JOIN {lookup} {dimension}_names ON {dimension}_names.id = {expression}")
+                selected.append(f"{dimension}_names.name AS {dimension}_name")
+        for dimension, value in self.filters.items():
+            expression = DIMENSIONS[dimension][0]
+            values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+            where.append(f"{expression} IN ({', '.join('?' for _ in values)})")
+            params += values
+        if self.period:
+            where.append("c.month BETWEEN ? AND ?")
+            params += month_range(self.period)
+        selected += [f"ROUND(SUM(c.{measure}), 2) AS {measure}" for measure in MEASURES]
+        group = [DIMENSIONS[dimension][0] for dimension in self.by]
+        sql = f"SELECT {', '.join(selected)} FROM {CUBE_TABLE} c {' '.join(joins)}"
+        if where:
+            sql += f" WHERE {' AND '.join(where)}"
+        if group:
+            sql += f" GROUP BY {', '.join(group)} ORDER BY {', '.join(group)}"
+        return sql, params
+
+    def columns(self):
+        """Column names of the rows"""
+        names = []
+        for dimension in self.by:
+            names.append(dimension)
+            if DIMENSIONS[dimension][1]:
+                names.append(f"{dimension}_name")
+        return names + list(MEASURES)
+
+    def rows(self, conn):
+        """Result rows, in the order of columns()"""
+        sql, params = self.sql()
+        return conn.execute(sql, params).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Totals of hours and cost from the pre-aggregated cube")
+    parser.add_argument("db_path", nargs="?", default="workload.db", help="database (default: workload.db)")
+    parser.add_argument("--by", default="project", help=f"dimensions, comma separated ({', '.join(DIMENSIONS)})")
+    parser.add_argument("--period", help='e.g. "2025-Q3" or "from Jan to Jun 2025"')
+    parser.add_argument("--project", type=int, action="append", help="only this project id (repeatable)")
+    parser.add_argument("--technical-unit", type=int, action="append", help="only this technical unit id")
+    parser.add_argument("--department", type=int, action="append", help="only this department id (0 = none)")
+    parser.add_argument("--rebuild", action="store_true", help="recompute the whole cube")
+    args = parser.parse_args(argv)
+
+    filters = {name: values for name, values in (("project", args.project), ("technical_unit", args.technical_unit),
+                                                 ("department", args.department)) if values}
+    query = CubeQuery([d for d in args.by.split(",") if d], filters, args.period)
+    conn = sqlite3.connect(args.db_path)
+    try:
+        ensure_cost_cube(conn)
+        if args.rebuild:
+            conn.execute(f"DELETE FROM {STATE_TABLE}")
+            conn.commit()
+            refresh_cost_cube(conn)
+        rows = query.rows(conn)
+    finally:
+        conn.close()
+    print("\t".join(query.columns()))
+    for row in rows:
+        print("\t".join("" if value is None else str(value) for value in row))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
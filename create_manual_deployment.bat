@@ -25,6 +25,31 @@ echo [2/3] Copying application files...
 REM Copy Python scripts
 copy "Fabsi_List_of_Service.py" "FABSI_Manual_Deployment\Scripts\"
 copy "project_booking_app.py" "FABSI_Manual_Deployment\Scripts\"
+copy "employee_search.py" "FABSI_Manual_Deployment\Scripts\"
+copy "selection_index.py" "FABSI_Manual_Deployment\Scripts\"
+copy "background_tasks.py" "FABSI_Manual_Deployment\Scripts\"
+copy "excel_export.py" "FABSI_Manual_Deployment\Scripts\"
+copy "data_export.py" "FABSI_Manual_Deployment\Scripts\"
+copy "pdf_report.py" "FABSI_Manual_Deployment\Scripts\"
+copy "startup.py" "FABSI_Manual_Deployment\Scripts\"
+copy "startup_benchmark.py" "FABSI_Manual_Deployment\Scripts\"
+copy "data_versions.py" "FABSI_Manual_Deployment\Scripts\"
+copy "warm_start.py" "FABSI_Manual_Deployment\Scripts\"
+copy "dimension_cache.py" "FABSI_Manual_Deployment\Scripts\"
+copy "result_cache.py" "FABSI_Manual_Deployment\Scripts\"
+copy "change_log.py" "FABSI_Manual_Deployment\Scripts\"
+copy "db_watcher.py" "FABSI_Manual_Deployment\Scripts\"
+copy "edit_queue.py" "FABSI_Manual_Deployment\Scripts\"
+copy "grid_paste.py" "FABSI_Manual_Deployment\Scripts\"
+copy "booking_costs.py" "FABSI_Manual_Deployment\Scripts\"
+copy "booking_grid.py" "FABSI_Manual_Deployment\Scripts\"
+copy "booking_storage.py" "FABSI_Manual_Deployment\Scripts\"
+copy "rate_history.py" "FABSI_Manual_Deployment\Scripts\"
+copy "booking_periods.py" "FABSI_Manual_Deployment\Scripts\"
+copy "booking_allocation.py" "FABSI_Manual_Deployment\Scripts\"
+copy "overbooking.py" "FABSI_Manual_Deployment\Scripts\"
+copy "cost_cube.py" "FABSI_Manual_Deployment\Scripts\"
+copy "rate_propagation.py" "FABSI_Manual_Deployment\Scripts\"
 copy "requirements.txt" "FABSI_Manual_Deployment\"
 
 REM Copy database and supporting files
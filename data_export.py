@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Raw data export pipeline for services and project bookings.
+
+Rows stream from a SQLite cursor in chunks into a pluggable writer (CSV,
+JSON lines or a columnar binary file), so exports never build a DataFrame.
+Used by both apps and from the command line:
+
+    python data_export.py services -o services.csv
+    python data_export.py bookings -o bookings.parquet
+    python data_export.py bookings --benchmark
+"""
+
+import argparse
+import csv
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import zipfile
+from datetime import date, datetime
+from decimal import Decimal
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'workload.db')
+CHUNK_SIZE = 5000
+
+# Export sources - raw columns plus the display names of the main foreign keys
+EXPORT_QUERIES = {
+    "services": """
+        SELECT
+            s.*,
+            p.name AS project_name,
+            tu.name AS technical_unit_name,
+            e.name AS employee_name,
+            a.name AS activities_name,
+            t.name AS title_name,
+            pr.name AS progress_name,
+            pu.name AS professional_role_name
+        FROM service s
+        LEFT JOIN project p ON s.project_id = p.id
+        LEFT JOIN technical_unit tu ON s.technical_unit_id = tu.id
+        LEFT JOIN employee e ON s.employee_id = e.id
+        LEFT JOIN activities a ON s.activities_id = a.id
+        LEFT JOIN title t ON s.title_id = t.id
+        LEFT JOIN progress pr ON s.progress_id = pr.id
+        LEFT JOIN professional_unit pu ON s.professional_unit_id = pu.id
+        {where}
+        ORDER BY s.id
+    """,
+    "bookings": """
+        SELECT pb.*
+        FROM project_bookings_full pb
+        {where}
+        ORDER BY pb.id
+    """,
+}
+
+# Optional project filter per source
+PROJECT_FILTERS = {
+    "services": "WHERE s.project_id = (SELECT id FROM project WHERE name = ?)",
+    "bookings": "WHERE pb.project_id = (SELECT id FROM project WHERE name = ?)",
+}
+
+
+def declared_types(conn, query):
+    """Declared type of each result column of a query ("" for expressions), in column order"""
+    conn.execute(f"CREATE TEMP VIEW export_columns AS {query}")
+    try:
+        return [row[2] for row in conn.execute("PRAGMA temp.table_info(export_columns)")]
+    finally:
+        conn.execute("DROP VIEW temp.export_columns")
+
+
+def numeric_type(declared):
+    """True/False for a declared type with INTEGER/REAL or TEXT affinity, None when the values decide"""
+    declared = (declared or "").upper()
+    if "INT" in declared or any(t in declared for t in ("REAL", "FLOA", "DOUB")):
+        return True
+    if any(t in declared for t in ("CHAR", "CLOB", "TEXT")):
+        return False
+    return None  # NUMERIC affinity (DATE, DECIMAL...) or none: may hold either
+
+
+def plain_value(value):
+    """Convert values SQLite adapters may hand back into JSON/CSV friendly types"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+class CsvWriter:
+    """Chunked CSV with a header row"""
+
+    extension = ".csv"
+
+    def __init__(self, path, columns, types=None):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write_chunk(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class NdjsonWriter:
+    """One JSON object per line"""
+
+    extension = ".ndjson"
+
+    def __init__(self, path, columns, types=None):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.columns = columns
+
+    def write_chunk(self, rows):
+        columns = self.columns
+        self.file.write("".join(
+            json.dumps(dict(zip(columns, map(plain_value, row))), ensure_ascii=False) + "\n"
+            for row in rows
+        ))
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    """Columnar Parquet file, one row group per chunk (needs pyarrow)"""
+
+    extension = ".parquet"
+
+    def __init__(self, path, columns, types=None):
+        self.path = path
+        self.columns = columns
+        self.numeric = [numeric_type(t) for t in types] if types else [None] * len(columns)
+        self.schema = None
+        self.writer = None
+
+    def write_chunk(self, rows):
+        data = {col: [plain_value(row[i]) for row in rows] for i, col in enumerate(self.columns)}
+        if self.writer is None:
+            table = pa.table(data)
+            # Columns that are empty in the first chunk would be typed null - use the declared type or text
+            self.schema = pa.schema([
+                pa.field(f.name, pa.float64() if numeric else pa.string()) if pa.types.is_null(f.type) else f
+                for f, numeric in zip(table.schema, self.numeric)
+            ])
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        table = pa.table(data, schema=self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is None:
+            self.schema = pa.schema([pa.field(col, pa.string()) for col in self.columns])
+            self.writer = pq.ParquetWriter(self.path, self.schema)
+        self.writer.close()
+
+
+class NumpyColumnarWriter:
+    """Columnar fallback without pyarrow: an .npz archive with one array per column and chunk.
+
+    Each column gets one dtype for the whole export: float64 (NULL -> NaN) when
+    its declared type is INTEGER or REAL, fixed-width unicode (NULL -> "") when
+    it is text, otherwise whatever its first non-null value is. Chunks before
+    that value are written once the dtype is known, at the latest on close.
+    Values that are not numbers in a numeric column become NaN.
+    ``read_columnar`` concatenates the chunks again.
+    """
+
+    extension = ".npz"
+
+    def __init__(self, path, columns, types=None):
+        self.columns = columns
+        self.numeric = [numeric_type(t) for t in types] if types else [None] * len(columns)
+        self.pending = [[] for _ in columns]  # (chunk index, rows) of all-NULL chunks of undecided columns
+        self.chunk_index = 0
+        self.archive = zipfile.ZipFile(path, 'w', zipfile.ZIP_STORED, allowZip64=True)
+
+    @staticmethod
+    def column_array(values, numeric):
+        if numeric:
+            return np.array([np.nan if v is None else _to_float(v) for v in values], dtype=np.float64)
+        return np.array(["" if v is None else str(plain_value(v)) for v in values], dtype=np.str_)
+
+    def _write(self, chunk_index, col, array):
+        with self.archive.open(f"{chunk_index:06d}/{col}.npy", 'w', force_zip64=True) as f:
+            np.lib.format.write_array(f, array, allow_pickle=False)
+
+    def _decide(self, i, numeric):
+        """Fix the dtype of column i and write its chunks that were waiting for it"""
+        self.numeric[i] = numeric
+        for chunk_index, rows in self.pending[i]:
+            self._write(chunk_index, self.columns[i], self.column_array([None] * rows, numeric))
+        self.pending[i] = []
+
+    def write_chunk(self, rows):
+        for i, col in enumerate(self.columns):
+            values = [row[i] for row in rows]
+            if self.numeric[i] is None:
+                first = next((v for v in values if v is not None), None)
+                if first is None:
+                    self.pending[i].append((self.chunk_index, len(values)))
+                    continue
+                self._decide(i, isinstance(first, (int, float, Decimal)) and not isinstance(first, bool))
+            self._write(self.chunk_index, col, self.column_array(values, self.numeric[i]))
+        self.chunk_index += 1
+
+    def close(self):
+        for i, numeric in enumerate(self.numeric):
+            if numeric is None:
+                self._decide(i, False)  # no value at all: text
+        self.archive.writestr("columns.json", json.dumps(self.columns))
+        self.archive.close()
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+WRITERS = {
+    "csv": CsvWriter,
+    "ndjson": NdjsonWriter,
+    "parquet": ParquetWriter,
+    "npz": NumpyColumnarWriter,
+}
+
+# File extensions accepted when the format is picked from a save dialog
+EXTENSION_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson",
+                     ".parquet": "parquet", ".npz": "npz"}
+
+
+def available_formats():
+    """Writer names that can run here (Parquet needs pyarrow)"""
+    return [fmt for fmt in WRITERS if fmt != "parquet" or pa is not None]
+
+
+def format_for_path(path):
+    """Return the writer name for a file name, or None if the extension is unknown"""
+    return EXTENSION_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def export_filetypes():
+    """Save dialog file types for the available writers"""
+    filetypes = [("CSV", "*.csv"), ("JSON lines", "*.ndjson")]
+    if pa is not None:
+        filetypes.append(("Parquet", "*.parquet"))
+    return filetypes + [("NumPy archive", "*.npz")]
+
+
+def read_columnar(path):
+    """Load a NumpyColumnarWriter archive into {column: array}"""
+    with zipfile.ZipFile(path) as archive:
+        columns = json.loads(archive.read("columns.json"))
+        chunks = sorted({name.split('/')[0] for name in archive.namelist() if '/' in name})
+        data = {}
+        for col in columns:
+            parts = []
+            for chunk in chunks:
+                with archive.open(f"{chunk}/{col}.npy") as f:
+                    parts.append(np.lib.format.read_array(f, allow_pickle=False))
+            data[col] = np.concatenate(parts) if parts else np.array([])
+    return data
+
+
+def export_data(db_path, source, fmt, path, project_name=None, chunk_size=CHUNK_SIZE,
+                progress=None, check_cancelled=None):
+    """Stream one export source into path with the named writer and return the row count.
+
+    ``progress(done, total)`` is called after each chunk and ``check_cancelled()``
+    before it; a cancelled or failed export removes the partial file.
+    """
+    if source not in EXPORT_QUERIES:
+        raise ValueError(f"Unknown export source '{source}'")
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}'")
+    if fmt not in available_formats():
+        raise ValueError("Parquet export needs pyarrow - install it or export as .npz instead")
+
+    where = PROJECT_FILTERS[source] if project_name else ""
+    params = (project_name,) if project_name else ()
+    query = EXPORT_QUERIES[source].format(where=where)
+    unfiltered = EXPORT_QUERIES[source].format(where="")  # same columns, no parameters: for declared_types
+
+    conn = sqlite3.connect(db_path)
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='view' AND name='project_bookings_full'").fetchone():
+        # not migrated yet (see booking_storage)
+        query = query.replace("project_bookings_full", "project_bookings")
+        unfiltered = unfiltered.replace("project_bookings_full", "project_bookings")
+    writer = None
+    try:
+        total = None
+        if progress:
+            total = conn.execute(f"SELECT COUNT(*) FROM ({query})", params).fetchone()[0]
+        cursor = conn.execute(query, params)
+        columns = [d[0] for d in cursor.description]
+        writer = WRITERS[fmt](path, columns, declared_types(conn, unfiltered))
+        written = 0
+        while True:
+            if check_cancelled:
+                check_cancelled()
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            writer.write_chunk(rows)
+            written += len(rows)
+            if progress:
+                progress(written, total)
+        writer.close()
+        writer = None
+        return written
+    except BaseException:
+        if writer is not None:
+            try:
+                writer.close()
+            except Exception:
+                pass
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    finally:
+        conn.close()
+
+
+def benchmark(db_path, source, formats=None, chunk_size=CHUNK_SIZE, repeat=3):
+    """Time every writer on one source; returns [(format, rows, seconds, bytes)] using the best run"""
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for fmt in formats or available_formats():
+            path = os.path.join(tmp_dir, f"{source}{WRITERS[fmt].extension}")
+            best = None
+            rows = 0
+            for _ in range(repeat):
+                start = time.perf_counter()
+                rows = export_data(db_path, source, fmt, path, chunk_size=chunk_size)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            results.append((fmt, rows, best, os.path.getsize(path)))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export services or project bookings as raw data")
+    parser.add_argument("source", choices=sorted(EXPORT_QUERIES), help="data to export")
+    parser.add_argument("-o", "--output", help="output file; the format follows the extension unless --format is given")
+    parser.add_argument("-f", "--format", choices=sorted(WRITERS), help="writer to use")
+    parser.add_argument("-p", "--project", help="only export this project")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database (default: workload.db next to this script)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows fetched per chunk")
+    parser.add_argument("--benchmark", action="store_true", help="measure throughput of every writer")
+    parser.add_argument("--repeat", type=int, default=3, help="benchmark runs per writer (best is reported)")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        formats = [args.format] if args.format else None
+        print(f"{'format':<10}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'MB':>9}{'MB/s':>9}")
+        for fmt, rows, seconds, size in benchmark(args.db, args.source, formats, args.chunk_size, args.repeat):
+            rate = rows / seconds if seconds else 0
+            mb = size / 1e6
+            print(f"{fmt:<10}{rows:>10}{seconds:>10.3f}{rate:>12,.0f}{mb:>9.2f}{mb / seconds if seconds else 0:>9.2f}")
+        return 0
+
+    if not args.output:
+        parser.error("--output is required unless --benchmark is given")
+    fmt = args.format or format_for_path(args.output)
+    if fmt is None:
+        parser.error(f"cannot tell the format from '{args.output}', use --format")
+    if fmt not in available_formats():
+        parser.error("Parquet export needs pyarrow - install it or export as .npz instead")
+
+    start = time.perf_counter()
+    rows = export_data(args.db, args.source, fmt, args.output, project_name=args.project,
+                       chunk_size=args.chunk_size)
+    print(f"Exported {rows} {args.source} rows to {args.output} ({fmt}) in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+"""
+Per-table change counters maintained by SQLite triggers.
+
+Every insert, update or delete on a tracked table bumps that table's row in
+``table_version``, whichever program made the change (either app, an import
+script or a SQL console). Comparing two readings tells whether cached data
+built from those tables can still be used.
+"""
+
+import os
+import sqlite3
+
+VERSION_TABLE = "table_version"
+
+# Tables the apps read into grids, dropdowns and caches
+TRACKED_TABLES = (
+    "project_bookings", "service", "employee", "employee_extended", "project",
+    "technical_unit", "department", "hub", "activities", "title", "stick_built",
+    "module", "progress", "professional_unit",
+)
+
+TRIGGER_EVENTS = ("INSERT", "UPDATE", "DELETE")
+
+_tracked_databases = set()  # databases already set up by this process
+
+
+def ensure_version_tracking(conn, tables=TRACKED_TABLES):
+    """Create the version table and its triggers for every tracked table that exists"""
+    existing = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")}
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+            table_name TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        )
+    """)
+    for table in tables:
+        if table not in existing:
+            continue
+        # Counters start from the current time in ms, so a recreated database never
+        # repeats the versions an old cache was validated against
+        conn.execute(f"""
+            INSERT OR IGNORE INTO {VERSION_TABLE} (table_name, version)
+            VALUES (?, CAST((julianday('now') - 2440587.5) * 86400000 AS INTEGER))
+        """, (table,))
+        for event in TRIGGER_EVENTS:
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+                AFTER {event} ON "{table}"
+                BEGIN
+                    UPDATE {VERSION_TABLE} SET version = version + 1 WHERE table_name = '{table}';
+                END
+            """)
+    conn.commit()
+
+
+def read_versions(conn, tables):
+    """Return {table: version} for the given tables (missing tables map to None)"""
+    placeholders = ", ".join("?" for _ in tables)
+    rows = conn.execute(
+        f"SELECT table_name, version FROM {VERSION_TABLE} WHERE table_name IN ({placeholders})",
+        tuple(tables)
+    ).fetchall()
+    versions = dict.fromkeys(tables)
+    versions.update(rows)
+    return versions
+
+
+def ensure_tracked(conn, db_path):
+    """ensure_version_tracking once per database and process"""
+    key = os.path.abspath(db_path)
+    if key not in _tracked_databases:
+        ensure_version_tracking(conn)
+        _tracked_databases.add(key)
+
+
+def current_versions(db_path, tables):
+    """Open the database, make sure tracking is in place and read the versions of tables"""
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_tracked(conn, db_path)
+        return read_versions(conn, tables)
+    finally:
+        conn.close()
@@ -0,0 +1,96 @@
+"""
+Cross-process change notifications for the shared database.
+
+``PRAGMA data_version`` on a long-lived connection changes whenever another
+connection - in this process or in another instance of either app - commits.
+Checking it is one cheap pragma per interval; only when it moved are the
+per-table counters in ``table_version`` (see data_versions) read, so each
+subscriber hears exactly which of its tables changed.
+"""
+
+import logging
+import sqlite3
+
+from data_versions import ensure_tracked, read_versions
+
+
+class DatabaseWatcher:
+    """Polls a database from the Tk thread and calls subscribers with the tables that changed.
+
+    ``subscribe(tables, callback)`` registers ``callback(changed_tables, versions)``;
+    it runs on the Tk thread, so it may touch widgets.
+    """
+
+    INTERVAL_MS = 1000
+
+    def __init__(self, root, db_path, interval_ms=INTERVAL_MS):
+        self.root = root
+        self.db_path = db_path
+        self.interval_ms = interval_ms
+        self._subscribers = []   # (tables, callback)
+        self._conn = None
+        self._data_version = None
+        self._versions = {}
+        self._after_id = None
+
+    def subscribe(self, tables, callback):
+        """Call callback(changed_tables, versions) whenever one of tables changes"""
+        self._subscribers.append((frozenset(tables), callback))
+        # The baseline is read on start; subscribe before starting
+        for table in tables:
+            self._versions.setdefault(table, None)
+
+    def start(self):
+        """Take the current versions as baseline and start polling (no-op if already running)"""
+        if self._after_id is not None:
+            return
+        try:
+            # Never wait for a writer's lock on the Tk thread - just try again next interval
+            self._conn = sqlite3.connect(self.db_path, timeout=0)
+            ensure_tracked(self._conn, self.db_path)
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            self._versions = read_versions(self._conn, tuple(self._versions))
+        except sqlite3.Error as e:
+            logging.warning(f"Database watcher could not read the baseline: {e}")
+        self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def stop(self):
+        """Stop polling and close the connection"""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _tick(self):
+        try:
+            self.check()
+        except sqlite3.OperationalError as e:
+            logging.debug(f"Database watcher check skipped: {e}")
+        except Exception as e:
+            logging.error(f"Database watcher error: {e}")
+        finally:
+            if self._after_id is not None:
+                self._after_id = self.root.after(self.interval_ms, self._tick)
+
+    def check(self):
+        """Notify the subscribers of tables changed since the last check; return those tables"""
+        if self._conn is None:
+            return set()
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return set()
+        versions = read_versions(self._conn, tuple(self._versions))
+        self._data_version = data_version
+        changed = {table for table, version in versions.items()
+                   if self._versions.get(table) is not None and version != self._versions[table]}
+        self._versions = versions
+        for tables, callback in self._subscribers:
+            hits = changed & tables
+            if hits:
+                try:
+                    callback(hits, versions)
+                except Exception as e:
+                    logging.error(f"Database change callback failed: {e}")
+        return changed
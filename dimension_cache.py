@@ -0,0 +1,141 @@
+"""
+Process-wide cache of the lookup (dimension) tables.
+
+Each dimension keeps id -> name and normalized name -> id maps, so dropdowns,
+importers and grid editors resolve names without a query per row. Entries are
+dropped as soon as the table's change counter in ``table_version`` moves
+(see data_versions), whichever process made the change.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from data_versions import ensure_tracked, read_versions
+
+DIMENSION_TABLES = (
+    "stick_built", "module", "activities", "title", "technical_unit", "employee",
+    "progress", "professional_unit", "project", "hub", "department",
+)
+
+
+def normalize_name(name):
+    """Case- and whitespace-insensitive form of a name used for lookups"""
+    if name is None:
+        return ""
+    return re.sub(r'\s+', ' ', str(name)).strip().casefold()
+
+
+class Dimension:
+    """Rows of one lookup table with lookups in both directions"""
+
+    def __init__(self, table, rows):
+        self.table = table
+        self.rows = rows  # [(id, name)] ordered by name
+        self.names = {row_id: name for row_id, name in rows}
+        self.ids = {}
+        for row_id, name in rows:
+            # Names are unique in most tables; for the others the first one wins
+            self.ids.setdefault(normalize_name(name), row_id)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def name_for(self, row_id, default=None):
+        """Name of the row with this id"""
+        return self.names.get(row_id, default)
+
+    def id_for(self, name, default=None):
+        """Id of the row whose name matches, ignoring case and extra whitespace"""
+        return self.ids.get(normalize_name(name), default)
+
+    def sorted_names(self):
+        """Names in display order"""
+        return [name for _, name in self.rows]
+
+    def records(self):
+        """Rows as [{"id": ..., "name": ...}] (the dropdown option format)"""
+        return [{"id": row_id, "name": name} for row_id, name in self.rows]
+
+
+class DimensionCache:
+    """Lazily loaded dimensions of one database, revalidated against the change counters.
+
+    The counters are checked at most every CHECK_INTERVAL seconds (one small
+    query for all loaded tables); a table whose counter moved is read again
+    on its next use.
+    """
+
+    CHECK_INTERVAL = 1.0
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._dimensions = {}  # table -> Dimension
+        self._versions = {}    # table -> version the Dimension was read at
+        self._checked_at = 0.0
+
+    def get(self, table):
+        """Return the Dimension for table, reading it if it is missing or out of date"""
+        if table not in DIMENSION_TABLES:
+            raise ValueError(f"'{table}' is not a dimension table")
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self.CHECK_INTERVAL:
+                self.check()
+            if table not in self._dimensions:
+                self._load(table)
+            return self._dimensions[table]
+
+    def check(self):
+        """Drop every loaded dimension whose table changed since it was read"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            if not self._dimensions:
+                return []
+            conn = sqlite3.connect(self.db_path)
+            try:
+                ensure_tracked(conn, self.db_path)
+                versions = read_versions(conn, tuple(self._dimensions))
+            finally:
+                conn.close()
+            stale = [table for table, version in versions.items() if version != self._versions.get(table)]
+            for table in stale:
+                self.invalidate(table)
+            return stale
+
+    def invalidate(self, table=None):
+        """Forget one dimension (or all of them) so it is read again on next use"""
+        with self._lock:
+            tables = [table] if table else list(self._dimensions)
+            for name in tables:
+                self._dimensions.pop(name, None)
+                self._versions.pop(name, None)
+
+    def _load(self, table):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ensure_tracked(conn, self.db_path)
+            exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table,)).fetchone()
+            # Version first - a write in between only makes the rows look older than they are
+            version = read_versions(conn, (table,))[table]
+            rows = conn.execute(f'SELECT id, name FROM "{table}" ORDER BY name').fetchall() if exists else []
+        finally:
+            conn.close()
+        self._dimensions[table] = Dimension(table, rows)
+        self._versions[table] = version
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_dimension_cache(db_path):
+    """The shared DimensionCache for a database file (one per process)"""
+    key = os.path.normcase(os.path.abspath(db_path))
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = DimensionCache(db_path)
+        return cache
@@ -0,0 +1,248 @@
+"""
+Write-behind queue for inline grid edits.
+
+Cell edits are recorded as (row id, column, value) and shown at once; they
+are written in one transaction a moment after the last edit, on an I/O
+thread. Each update only applies if the cell still holds the value the user
+saw when editing it, so a concurrent change by someone else is reported as a
+conflict instead of being overwritten. Failed writes are retried with backoff.
+"""
+
+import logging
+import sqlite3
+from datetime import datetime
+
+from dimension_cache import get_dimension_cache
+
+FLUSH_DELAY_MS = 1500     # quiet time after the last edit before writing
+MAX_RETRY_DELAY_MS = 30000
+MAX_ATTEMPTS = 5
+
+# Column kinds besides None (text) and a dimension table name
+NUMBER = "number"
+INTEGER = "integer"
+DATE = "date"  # YYYY-MM-DD text
+
+
+def to_db_value(db_path, kind, value):
+    """Convert a displayed cell value to what is stored: FK id, number, text or NULL"""
+    if value is None or str(value).strip() in ("", "nan", "None", "N/A"):
+        return None
+    if kind is None:
+        return str(value)
+    if kind == NUMBER:
+        try:
+            return float(str(value).replace(",", ""))
+        except ValueError:
+            raise ValueError(f"'{value}' is not a number")
+    if kind == INTEGER:
+        try:
+            return int(float(str(value).replace(",", "")))
+        except ValueError:
+            raise ValueError(f"'{value}' is not a whole number")
+    if kind == DATE:
+        try:
+            return datetime.strptime(str(value).strip()[:10], "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError:
+            raise ValueError(f"'{value}' is not a date (YYYY-MM-DD)")
+    row_id = get_dimension_cache(db_path).get(kind).id_for(value)
+    if row_id is None:
+        raise ValueError(f"'{value}' is not a known {kind.replace('_', ' ')}")
+    return row_id
+
+
+def write_edits(db_path, table, columns, edits, derive=None):
+    """Write edits {(row_id, column): (value, original)} in one transaction (runs on an I/O thread)
+
+    Returns (saved, conflicts, invalid): saved keys, {key: current stored value}
+    for cells that no longer held their original value (or rows that are gone),
+    and {key: message} for values that could not be converted. ``derive(conn, saved)``
+    runs once per batch inside the transaction to recompute dependent columns.
+    """
+    saved, conflicts, invalid = [], {}, {}
+    # Resolve names to ids before taking the write lock (the dimension cache reads on its own connection)
+    updates = []
+    for key, (value, original) in edits.items():
+        db_column, kind = columns[key[1]]
+        try:
+            new_value = to_db_value(db_path, kind, value)
+        except ValueError as e:
+            invalid[key] = str(e)
+            continue
+        try:
+            # Dates are compared as stored, whatever their format
+            expected = to_db_value(db_path, None if kind == DATE else kind, original)
+        except ValueError:
+            expected = None
+        updates.append((key, db_column, new_value, expected))
+
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        for key, db_column, new_value, expected in updates:
+            row_id = key[0]
+            # An empty cell may be stored as NULL or ''
+            cursor = conn.execute(
+                f'UPDATE "{table}" SET "{db_column}" = ? WHERE id = ? '
+                f'AND ("{db_column}" IS ? OR (? IS NULL AND "{db_column}" = \'\'))',
+                (new_value, row_id, expected, expected)
+            )
+            if cursor.rowcount:
+                saved.append(key)
+                continue
+            current = conn.execute(f'SELECT "{db_column}" FROM "{table}" WHERE id = ?', (row_id,)).fetchone()
+            if current and (current[0] == new_value or (new_value is None and current[0] == '')):
+                # Already written by an earlier attempt of this batch, or the table is a view
+                # (updates through INSTEAD OF triggers are not counted)
+                saved.append(key)
+            else:
+                conflicts[key] = current[0] if current else None
+        if derive and saved:
+            derive(conn, saved)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+    return saved, conflicts, invalid
+
+
+class EditQueue:
+    """Pending cell edits of one table, flushed in batches in the background (Tk thread only).
+
+    ``columns`` maps grid columns to (database column, kind). ``on_change(pending, saving)``
+    is called whenever the counts change and ``on_flushed(saved, conflicts, invalid)``
+    after every completed write; ``on_failed(e)`` once retries are exhausted.
+    """
+
+    def __init__(self, root, executor, db_path, table, columns,
+                 on_change=None, on_flushed=None, on_failed=None, derive=None):
+        self.root = root
+        self.executor = executor
+        self.db_path = db_path
+        self.table = table
+        self.columns = columns
+        self.on_change = on_change
+        self.on_flushed = on_flushed
+        self.on_failed = on_failed
+        self.derive = derive
+        self._pending = {}    # (row_id, column) -> (value, original)
+        self._in_flight = {}  # the batch being written
+        self._task = None
+        self._after_id = None
+        self._attempts = 0
+
+    def __len__(self):
+        return len(self._pending) + len(self._in_flight)
+
+    @property
+    def busy(self):
+        """True while edits are waiting or being written"""
+        return bool(self._pending or self._in_flight)
+
+    def record(self, row_id, column, value, original):
+        """Queue an edit; original is the value shown before it (used for conflict detection)"""
+        self._merge((row_id, column), value, original)
+        self._attempts = 0
+        self._schedule(FLUSH_DELAY_MS)
+        self._notify()
+
+    def record_many(self, edits):
+        """Queue {(row_id, column): (value, original)} and write them right away as one batch"""
+        for key, (value, original) in edits.items():
+            self._merge(key, value, original)
+        self._attempts = 0
+        self.flush()
+        if self._pending:
+            self._notify()  # waits for the batch in flight
+
+    def flush(self):
+        """Write the pending edits now in the background"""
+        self._cancel_timer()
+        if self._in_flight and self._task is not None and self._task.cancelled:
+            self._requeue()  # The write was cancelled - its result never arrives; writing again is harmless
+        if not self._pending or self._in_flight:
+            return
+        self._in_flight, self._pending = self._pending, {}
+        self._notify()
+        self._task = self.executor.submit(
+            f"edit_queue_{self.table}", write_edits, self.db_path, self.table, self.columns, dict(self._in_flight),
+            self.derive,
+            on_success=self._on_written,
+            on_error=self._on_write_error,
+            message=f"Saving {len(self._in_flight)} edits..."
+        )
+
+    def flush_now(self):
+        """Write every pending edit synchronously (on close); returns write_edits' result"""
+        self._cancel_timer()
+        batch = dict(self._in_flight)
+        for key, (value, original) in self._pending.items():
+            batch[key] = (value, batch[key][1] if key in batch else original)
+        if not batch:
+            return [], {}, {}
+        result = write_edits(self.db_path, self.table, self.columns, batch, self.derive)
+        self._pending, self._in_flight = {}, {}
+        self._notify()
+        return result
+
+    def _merge(self, key, value, original):
+        if key in self._pending:
+            original = self._pending[key][1]  # the database still holds the first original
+        elif key in self._in_flight:
+            original = self._in_flight[key][0]  # it will hold the value being written
+        self._pending[key] = (value, original)
+
+    def _schedule(self, delay_ms):
+        self._cancel_timer()
+        self._after_id = self.root.after(delay_ms, self._on_timer)
+
+    def _cancel_timer(self):
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _on_timer(self):
+        self._after_id = None
+        # Write once the UI has caught up with pending redraws
+        self.root.after_idle(self.flush)
+
+    def _on_written(self, result):
+        self._in_flight = {}
+        self._attempts = 0
+        self._notify()
+        if self.on_flushed:
+            self.on_flushed(*result)
+        if self._pending:
+            self._schedule(FLUSH_DELAY_MS)
+
+    def _requeue(self):
+        """Put the batch being written back under anything edited meanwhile"""
+        for key, (value, original) in self._in_flight.items():
+            if key in self._pending:
+                self._pending[key] = (self._pending[key][0], original)
+            else:
+                self._pending[key] = (value, original)
+        self._in_flight = {}
+
+    def _on_write_error(self, e):
+        # Try again later
+        self._requeue()
+        self._attempts += 1
+        self._notify()
+        if self._attempts < MAX_ATTEMPTS:
+            delay = min(FLUSH_DELAY_MS * 2 ** self._attempts, MAX_RETRY_DELAY_MS)
+            logging.warning(f"Saving {len(self._pending)} {self.table} edits failed ({e}), retrying in {delay} ms")
+            self._schedule(delay)
+        else:
+            logging.error(f"Saving {len(self._pending)} {self.table} edits failed {self._attempts} times: {e}")
+            if self.on_failed:
+                self.on_failed(e)
+
+    def _notify(self):
+        if self.on_change:
+            try:
+                self.on_change(len(self._pending), len(self._in_flight))
+            except Exception as e:
+                logging.error(f"Pending edits indicator update failed: {e}")
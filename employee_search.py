@@ -0,0 +1,149 @@
+"""
+In-memory employee search index used by the employee picker
+"""
+
+import re
+import sqlite3
+import threading
+from bisect import bisect_left
+from collections.abc import Mapping
+
+
+def tokenize(text):
+    """Split text into lowercase alphanumeric tokens"""
+    if not text:
+        return []
+    return [tok for tok in re.split(r'[^0-9a-z]+', str(text).lower()) if tok]
+
+
+class EmployeeSearchIndex(Mapping):
+    """Prefix/token index over employee name, GHRS ID and cost center.
+
+    The index is built lazily on first use so that startup never pays for it,
+    and it also behaves like the old ``employee_map`` dictionary
+    (name -> {"id": ..., "type": "unified"}) so existing lookups keep working.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.records = []          # (id, name, ghrs_id, cost_center)
+        self._by_name = {}         # name -> record index
+        self._token_postings = {}  # token -> set of record indexes
+        self._sorted_tokens = []   # sorted token list for prefix lookups
+
+    def invalidate(self):
+        """Drop the index so it is rebuilt on next use"""
+        with self._lock:
+            self._loaded = False
+
+    def ensure_loaded(self):
+        """Build the index if it has not been built yet"""
+        if not self._loaded:
+            self.load()
+
+    def load(self):
+        """Read employees from the database and build the index"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            cursor = conn.cursor()
+            # employee_extended shares ids with employee and carries the cost center
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='employee_extended'")
+            if cursor.fetchone():
+                cursor.execute("""
+                    SELECT e.id, e.name, COALESCE(e.ghrs_id, ee.ghrs_id), ee.cost_center
+                    FROM employee e
+                    LEFT JOIN employee_extended ee ON ee.id = e.id
+                    ORDER BY e.name
+                """)
+            else:
+                cursor.execute("SELECT id, name, ghrs_id, NULL FROM employee ORDER BY name")
+            rows = cursor.fetchall()
+        finally:
+            conn.close()
+
+        records = []
+        by_name = {}
+        postings = {}
+        for emp_id, name, ghrs_id, cost_center in rows:
+            if not name:
+                continue
+            idx = len(records)
+            records.append((emp_id, name, ghrs_id or "", cost_center or ""))
+            by_name[name] = idx
+            for token in set(tokenize(name) + tokenize(ghrs_id) + tokenize(cost_center)):
+                postings.setdefault(token, set()).add(idx)
+
+        with self._lock:
+            self.records = records
+            self._by_name = by_name
+            self._token_postings = postings
+            self._sorted_tokens = sorted(postings)
+            self._loaded = True
+
+    def _prefix_matches(self, prefix):
+        """Return record indexes having a token that starts with prefix"""
+        matches = set()
+        pos = bisect_left(self._sorted_tokens, prefix)
+        while pos < len(self._sorted_tokens) and self._sorted_tokens[pos].startswith(prefix):
+            matches |= self._token_postings[self._sorted_tokens[pos]]
+            pos += 1
+        return matches
+
+    def search(self, text, limit=20, allowed=None):
+        """Return up to ``limit`` records matching every token of text as a prefix.
+
+        ``allowed`` optionally restricts the results to a collection of employee ids.
+        """
+        self.ensure_loaded()
+        query_tokens = tokenize(text)
+        if not query_tokens:
+            if allowed is None:
+                return self.records[:limit]
+            return [rec for rec in self.records if rec[0] in allowed][:limit]
+
+        candidates = None
+        # Longest tokens first - they are the most selective
+        for token in sorted(query_tokens, key=len, reverse=True):
+            matches = self._prefix_matches(token)
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                return []
+        if allowed is not None:
+            candidates = {idx for idx in candidates if self.records[idx][0] in allowed}
+
+        query = " ".join(query_tokens)
+
+        def rank(idx):
+            emp_id, name, ghrs_id, cost_center = self.records[idx]
+            name_lower = name.lower()
+            if name_lower == query or ghrs_id.lower() == query:
+                score = 0
+            elif name_lower.startswith(query):
+                score = 1
+            elif ghrs_id.lower().startswith(query) or cost_center.lower().startswith(query):
+                score = 2
+            else:
+                score = 3
+            return (score, name_lower)
+
+        return [self.records[idx] for idx in sorted(candidates, key=rank)[:limit]]
+
+    # Mapping interface - keeps the old employee_map lookups working
+    def __getitem__(self, name):
+        self.ensure_loaded()
+        emp_id = self.records[self._by_name[name]][0]
+        return {"id": emp_id, "type": "unified"}
+
+    def __contains__(self, name):
+        self.ensure_loaded()
+        return name in self._by_name
+
+    def __iter__(self):
+        self.ensure_loaded()
+        return iter(self._by_name)
+
+    def __len__(self):
+        self.ensure_loaded()
+        return len(self._by_name)
@@ -0,0 +1,105 @@
+"""
+Rectangular paste of clipboard blocks (TSV, as copied from Excel) into the grids.
+
+The block is parsed in one go, then every target column is converted and
+checked as a whole with pandas (numbers, whole numbers, dates, names of
+lookup rows), so thousands of cells are validated without a Python loop
+per cell. The caller turns the result into one batch of edits and one grid
+update.
+"""
+
+import csv
+import io
+
+from dimension_cache import get_dimension_cache, normalize_name
+from edit_queue import DATE, INTEGER, NUMBER
+from startup import LazyModule
+
+pd = LazyModule("pandas")
+
+
+def parse_block(text):
+    """Rows of cells from clipboard text; Excel quotes cells that contain tabs or line breaks"""
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    if text.endswith('\n'):
+        text = text[:-1]
+    if not text:
+        return []
+    rows = list(csv.reader(io.StringIO(text), delimiter='\t'))
+    width = max(len(row) for row in rows)
+    return [row + [''] * (width - len(row)) for row in rows]
+
+
+def convert_column(values, kind, db_path):
+    """Check one pasted column at once.
+
+    Returns (typed values, display values, positions of invalid cells); blank
+    cells become None. Names of lookup rows are returned as stored (case and
+    spacing of the database).
+    """
+    s = pd.Series(values, dtype=object).fillna('').astype(str).str.strip()
+    blank = s.eq('')
+    if kind in (NUMBER, INTEGER):
+        typed = pd.to_numeric(s.str.replace(',', '', regex=False), errors='coerce')
+        bad = typed.isna() & ~blank
+        if kind == INTEGER:
+            bad |= typed.notna() & (typed % 1 != 0)
+        display = s
+    elif kind == DATE:
+        parsed = pd.to_datetime(s, format='%Y-%m-%d', errors='coerce')
+        bad = parsed.isna() & ~blank
+        typed = display = parsed.dt.strftime('%Y-%m-%d').where(parsed.notna(), s)
+    elif kind is not None:
+        dimension = get_dimension_cache(db_path).get(kind)
+        ids = s.map(normalize_name).map(dimension.ids)
+        bad = ids.isna() & ~blank
+        typed = display = ids.map(dimension.names).where(ids.notna(), s)
+    else:
+        typed = display = s
+    typed = typed.astype(object).where(~blank, None)
+    display = display.where(~blank, '')
+    return typed.tolist(), display.tolist(), [int(i) for i in bad.to_numpy().nonzero()[0]]
+
+
+def plan_paste(block, target_rows, target_columns, columns, db_path):
+    """Lay a parsed block over the grid from the anchor cell.
+
+    target_rows are the row keys from the anchor down, target_columns the grid
+    columns from the anchor right; columns maps editable grid columns to
+    (database column, kind). A single cell is repeated over all target rows.
+    Returns (cells, errors, skipped): cells is {column: (row keys, typed values,
+    display values)}, errors lists (row key, column, value) that failed the
+    checks and skipped counts cells that fell outside the grid or on
+    read-only columns.
+    """
+    if len(block) == 1 and len(block[0]) == 1:
+        block = block * len(target_rows)
+    height = min(len(block), len(target_rows))
+    width = len(block[0]) if block else 0
+    skipped = (len(block) - height) * width
+    cells, errors = {}, []
+    for offset in range(width):
+        if offset >= len(target_columns) or target_columns[offset] not in columns:
+            skipped += height
+            continue
+        column = target_columns[offset]
+        raw = [row[offset] for row in block[:height]]
+        typed, display, bad = convert_column(raw, columns[column][1], db_path)
+        rows = list(target_rows[:height])
+        for i in bad:
+            errors.append((rows[i], column, raw[i]))
+        if bad:
+            keep = sorted(set(range(height)) - set(bad))
+            rows = [rows[i] for i in keep]
+            typed = [typed[i] for i in keep]
+            display = [display[i] for i in keep]
+        cells[column] = (rows, typed, display)
+    return cells, errors, skipped
+
+
+def describe_errors(errors, limit=10):
+    """Readable list of rejected cells for a message box"""
+    lines = [f"- {column}: '{value}'" for _, column, value in errors[:limit]]
+    if len(errors) > limit:
+        lines.append(f"... and {len(errors) - limit} more")
+    return "\n".join(lines)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Overbooking detection: bookings whose overlapping periods load an employee
+beyond their capacity.
+
+Each booking loads its employee with booking_hours spread evenly over the
+working days of its period, and capacity is employee_extended.monthly_hours
+over the working days of each month - both as in booking_allocation, so a
+month that is fully loaded at a constant rate is over capacity here exactly
+when its utilization there is above 100%. A sorted sweep line over the
+start and end events of all bookings (plus the month starts inside them)
+gives, per employee, the load of every stretch between two events; the
+stretches above capacity are merged into conflict windows and every booking
+overlapping a window is in conflict. Sorting is the only super-linear step,
+so the full report for all employees is O(n log n), all in numpy.
+
+Checking single employees reads only their bookings (employee/period index),
+which is what the booking app does right after adding bookings.
+
+    python overbooking.py                  # report for all employees
+    python overbooking.py --employee 42
+"""
+
+import argparse
+import sqlite3
+
+from booking_allocation import MAX_MONTHS, PERIOD_END, PERIOD_START
+from startup import LazyModule
+
+np = LazyModule("numpy")
+
+BOOKINGS_TABLE = "project_bookings"
+CAPACITY_COLUMN = "monthly_hours"
+TOLERANCE = 1e-6  # relative; load equal to capacity is not an overbooking
+
+DAY_BITS = 22  # employee id and day number packed into one sortable int64 key
+DAY_OFFSET = 1 << (DAY_BITS - 1)
+
+
+def _keys(employee_ids, days):
+    return (np.asarray(employee_ids, dtype=np.int64) << DAY_BITS) + (days + DAY_OFFSET)
+
+
+def load_bookings(conn, employee_ids=None):
+    """(booking ids, employee ids, hours, first days, last days) of bookings with hours and a period"""
+    query = f"""
+        SELECT id, employee_id, booking_hours, {PERIOD_START}, {PERIOD_END}
+        FROM {BOOKINGS_TABLE}
+        WHERE employee_id IS NOT NULL AND booking_hours > 0
+          AND {PERIOD_START} IS NOT NULL AND {PERIOD_END} IS NOT NULL
+    """
+    if employee_ids is None:
+        rows = conn.execute(query).fetchall()
+    else:
+        employee_ids = sorted(set(employee_ids))
+        rows = []
+        for start in range(0, len(employee_ids), 500):
+            batch = employee_ids[start:start + 500]
+            rows += conn.execute(f"{query} AND employee_id IN ({','.join('?' for _ in batch)})", batch).fetchall()
+    if not rows:
+        return (np.empty(0, dtype=np.int64),) * 2 + (np.empty(0),) + (np.empty(0, dtype='datetime64[D]'),) * 2
+    booking_ids, employees, hours, starts, ends = zip(*rows)
+    return (np.asarray(booking_ids, dtype=np.int64), np.asarray(employees, dtype=np.int64),
+            np.asarray(hours, dtype=float),
+            np.asarray([str(day)[:10] for day in starts], dtype='datetime64[D]'),
+            np.asarray([str(day)[:10] for day in ends], dtype='datetime64[D]'))
+
+
+def load_capacities(conn):
+    """{employee id: monthly hours}"""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='employee_extended'").fetchone():
+        return {}
+    return {employee_id: hours for employee_id, hours in
+            conn.execute(f"SELECT id, {CAPACITY_COLUMN} FROM employee_extended") if hours}
+
+
+def find_overbookings(booking_ids, employee_ids, hours, starts, ends, capacities):
+    """Conflict windows of bookings given as arrays, capacities as {employee id: monthly hours}.
+
+    Returns [{"employee_id", "start", "end", "peak", "capacity", "booking_ids"}]
+    ordered by employee and start; end is inclusive, peak the highest load in
+    hours per month. Employees without a capacity are not checked.
+    """
+    starts = np.asarray(starts, dtype='datetime64[D]')
+    ends = np.asarray(ends, dtype='datetime64[D]')
+    capacity = np.asarray([capacities.get(e, np.nan) for e in np.asarray(employee_ids).tolist()], dtype=float)
+    months = (ends.astype('datetime64[M]') - starts.astype('datetime64[M]')).astype(np.int64) + 1
+    checked = (ends >= starts) & (months <= MAX_MONTHS) & (capacity > 0)
+    booking_ids, employee_ids, hours = (np.asarray(a)[checked] for a in (booking_ids, employee_ids, hours))
+    capacity, months = capacity[checked], months[checked]
+    first_month = starts[checked].astype('datetime64[M]')
+    starts, ends = starts[checked].astype(np.int64), ends[checked].astype(np.int64) + 1  # end exclusive
+    if not len(booking_ids):
+        return []
+
+    # Load per working day while the booking runs (calendar days for a period without working days)
+    workdays = np.busday_count(starts.astype('datetime64[D]'), ends.astype('datetime64[D]'))
+    rates = hours / np.where(workdays > 0, workdays, ends - starts)
+
+    # Month starts inside a booking split the stretches, so each lies in one month with one capacity
+    inner = months - 1
+    boundary_rows = np.repeat(np.arange(len(booking_ids)), inner)
+    boundary_months = (first_month[boundary_rows] + 1 + np.arange(inner.sum())
+                       - np.repeat(np.cumsum(inner) - inner, inner))
+    boundary_days = boundary_months.astype('datetime64[D]').astype(np.int64)
+
+    # Sweep line: +rate at the start, -rate at the end, sorted by (employee, day)
+    event_keys = np.concatenate([_keys(employee_ids, starts), _keys(employee_ids, ends),
+                                 _keys(employee_ids[boundary_rows], boundary_days)])
+    deltas = np.concatenate([rates, -rates, np.zeros(len(boundary_rows))])
+    order = np.argsort(event_keys, kind='stable')
+    event_keys, deltas = event_keys[order], deltas[order]
+    event_capacity = np.concatenate([capacity, capacity, capacity[boundary_rows]])[order]
+    levels = np.cumsum(deltas)
+    # Events of one key take effect together: keep the level after the last one
+    last = np.flatnonzero(np.append(event_keys[1:] != event_keys[:-1], True))
+    segment_keys, levels, segment_capacity = event_keys[last], levels[last], event_capacity[last]
+    segment_employees = segment_keys >> DAY_BITS
+    # Each employee's events sum to zero; remove what the previous employees left over from rounding
+    first = np.append(True, segment_employees[1:] != segment_employees[:-1])
+    group_start = np.maximum.accumulate(np.where(first, np.arange(len(levels)), 0))
+    levels = levels - np.append(0.0, levels)[group_start]
+    # Load per month: the daily load over all working days of the segment's month
+    segment_month = (((segment_keys & ((1 << DAY_BITS) - 1)) - DAY_OFFSET).astype('datetime64[D]')
+                     .astype('datetime64[M]'))
+    levels = levels * np.busday_count(segment_month.astype('datetime64[D]'), (segment_month + 1).astype('datetime64[D]'))
+    # A segment runs from its key to the next key of the same employee
+    over = levels > segment_capacity * (1 + TOLERANCE)
+    over &= np.append(segment_employees[1:] == segment_employees[:-1], False)
+    if not over.any():
+        return []
+
+    # Merge adjacent over-capacity segments into windows
+    window_start = np.flatnonzero(over & np.append(True, ~over[:-1] | first[1:]))
+    window_last = np.flatnonzero(over & np.append(~over[1:] | first[1:], True))
+    start_keys = segment_keys[window_start]
+    end_keys = segment_keys[window_last + 1]  # exclusive
+    # reduceat runs up to the next window start; the segments in between are not over capacity
+    peaks = np.maximum.reduceat(np.where(over, levels, -np.inf), window_start)
+
+    # Bookings overlapping windows: windows are disjoint and sorted, so one binary search per side
+    booking_start_keys, booking_end_keys = _keys(employee_ids, starts), _keys(employee_ids, ends)
+    low = np.searchsorted(end_keys, booking_start_keys, side='right')
+    high = np.searchsorted(start_keys, booking_end_keys, side='left')
+    counts = np.maximum(high - low, 0)
+    booking_rows = np.repeat(np.arange(len(booking_ids)), counts)
+    window_rows = np.repeat(low, counts) + np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    by_window = np.argsort(window_rows, kind='stable')
+    members = np.split(booking_ids[booking_rows[by_window]],
+                       np.cumsum(np.bincount(window_rows, minlength=len(start_keys)))[:-1])
+
+    epoch = np.datetime64('1970-01-01', 'D')
+    window_employees = (start_keys >> DAY_BITS).tolist()
+    window_starts = ((start_keys & ((1 << DAY_BITS) - 1)) - DAY_OFFSET)
+    window_ends = ((end_keys & ((1 << DAY_BITS) - 1)) - DAY_OFFSET) - 1
+    capacity_of = dict(zip(employee_ids.tolist(), capacity.tolist()))
+    return [{
+        "employee_id": employee_id,
+        "start": str(epoch + int(start)),
+        "end": str(epoch + int(end)),
+        "peak": float(peak),
+        "capacity": capacity_of[employee_id],
+        "booking_ids": sorted(ids.tolist()),
+    } for employee_id, start, end, peak, ids in zip(window_employees, window_starts, window_ends, peaks, members)]
+
+
+def detect_overbookings(conn, employee_ids=None):
+    """Conflict windows of all employees, or only of employee_ids"""
+    booking_ids, employees, hours, starts, ends = load_bookings(conn, employee_ids)
+    return find_overbookings(booking_ids, employees, hours, starts, ends, load_capacities(conn))
+
+
+def check_overbookings(db_path, employee_ids=None):
+    """detect_overbookings on its own connection (runs on an I/O thread)"""
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        return detect_overbookings(conn, employee_ids)
+    finally:
+        conn.close()
+
+
+def conflicting_bookings(conflicts):
+    """{employee id: set of booking ids in conflict}"""
+    result = {}
+    for conflict in conflicts:
+        result.setdefault(conflict["employee_id"], set()).update(conflict["booking_ids"])
+    return result
+
+
+def format_report(conflicts, limit=50):
+    """Readable list of conflict windows"""
+    lines = [f"{len(conflicts)} overbooking windows for {len(conflicting_bookings(conflicts))} employees"]
+    for conflict in conflicts[:limit]:
+        lines.append(f"  employee {conflict['employee_id']}: {conflict['start']} to {conflict['end']}, "
+                     f"peak {conflict['peak']:.0f} h/month of {conflict['capacity']:.0f} "
+                     f"({conflict['peak'] / conflict['capacity']:.1%}), "
+                     f"bookings {', '.join(str(i) for i in conflict['booking_ids'])}")
+    if len(conflicts) > limit:
+        lines.append(f"  ... and {len(conflicts) - limit} more")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="List bookings that load employees beyond their monthly hours")
+    parser.add_argument("db_path", nargs="?", default="workload.db", help="database (default: workload.db)")
+    parser.add_argument("--employee", type=int, action="append", help="check only this employee (repeatable)")
+    parser.add_argument("--limit", type=int, default=50, help="windows to list")
+    args = parser.parse_args(argv)
+
+    print(format_report(check_overbookings(args.db_path, args.employee), args.limit))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,201 @@
+"""
+Paginated PDF report engine for the FABSI service list.
+
+Rows are consumed in page-sized chunks and each page is drawn straight onto
+the canvas, so only one page of rows is ever held in memory. Column widths
+come from a sample of the first rows and every page shares one table style
+(row banding via ROWBACKGROUNDS instead of one command per row).
+"""
+
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import chain, islice
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A3, landscape
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.pdfgen import canvas as pdf_canvas
+from reportlab.platypus import Paragraph, Table, TableStyle
+
+PAGE_SIZE = landscape(A3)  # Using A3 for more space
+MARGIN = 30
+WIDTH_SAMPLE_ROWS = 200
+CHAR_WIDTH = 6             # points per character
+MAX_COLUMN_WIDTH = 150     # Cap at 150 points for better fit
+
+# One style shared by every page table
+TABLE_STYLE = TableStyle([
+    # Header style
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#5b93a4')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.black),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('TOPPADDING', (0, 0), (-1, 0), 12),
+
+    # Cell style
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('BOTTOMPADDING', (0, 1), (-1, -1), 8),
+    ('TOPPADDING', (0, 1), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+
+    # Text alignment
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+
+    # Alternate row colors
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#255c7b')]),
+])
+
+
+def cell_text(value):
+    """Single-line text for a cell (keeps every row the same height)"""
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return re.sub(r'\s+', ' ', str(value)).strip()
+
+
+def sample_column_widths(header, sample, available_width):
+    """Estimate column widths from the header and a sample of rows, scaled to fit the page"""
+    widths = []
+    for idx in range(len(header)):
+        max_len = max(len(row[idx]) for row in chain([header], sample))
+        widths.append(min(max(max_len, 1) * CHAR_WIDTH, MAX_COLUMN_WIDTH))
+    total = sum(widths)
+    if total > available_width:
+        widths = [w * available_width / total for w in widths]
+    return widths
+
+
+def write_pdf_report(path, title, columns, rows, progress=None, check_cancelled=None):
+    """Draw rows as a paginated table report and return the number of rows written.
+
+    ``rows`` is any iterable of sequences in ``columns`` order. ``progress(done, None)``
+    is called after each page and ``check_cancelled()`` before it; nothing is
+    written to ``path`` unless every page was drawn.
+    """
+    page_width, page_height = PAGE_SIZE
+    available_width = page_width - 2 * MARGIN
+
+    header = [cell_text(c) for c in columns]
+    rows = (tuple(cell_text(v) for v in row) for row in rows)
+    sample = list(islice(rows, WIDTH_SAMPLE_ROWS))
+    col_widths = sample_column_widths(header, sample, available_width)
+    rows = chain(sample, rows)
+
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        alignment=1  # Center alignment
+    )
+    title_paragraph = Paragraph(escape(title), title_style)
+    _, title_height = title_paragraph.wrap(available_width, page_height)
+    title_height += 20  # Add some space after title
+
+    # All rows are single line, so one measurement gives the rows per page
+    probe = Table([header, header], colWidths=col_widths)
+    probe.setStyle(TABLE_STYLE)
+    probe.wrap(available_width, page_height)
+    header_height, row_height = probe._rowHeights[0], probe._rowHeights[1]
+    footer_height = 20
+    body_height = page_height - 2 * MARGIN - footer_height - header_height
+    first_page_rows = max(int((body_height - title_height) // row_height), 1)
+    page_rows = max(int(body_height // row_height), 1)
+
+    c = pdf_canvas.Canvas(path, pagesize=PAGE_SIZE)
+    c.setTitle(title)
+    written = 0
+    page = 0
+    while True:
+        if check_cancelled:
+            check_cancelled()
+        chunk = list(islice(rows, first_page_rows if page == 0 else page_rows))
+        if not chunk and page > 0:
+            break
+        page += 1
+
+        top = page_height - MARGIN
+        if page == 1:
+            title_paragraph.drawOn(c, MARGIN, top - title_height + 20)
+            top -= title_height
+
+        table = Table([header] + chunk, colWidths=col_widths)
+        table.setStyle(TABLE_STYLE)
+        _, table_height = table.wrap(available_width, top - MARGIN)
+        table.drawOn(c, MARGIN, top - table_height)
+
+        c.setFont('Helvetica', 8)
+        c.drawRightString(page_width - MARGIN, MARGIN / 2, f"Page {page}")
+        c.showPage()
+
+        written += len(chunk)
+        if progress:
+            progress(written, None)
+        if not chunk:
+            break
+
+    c.save()
+    return written
+
+
+def write_project_pdf(db_path, query, project_id, title, columns, path):
+    """Stream one project's rows from SQLite into a PDF (process pool job)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        cursor = conn.execute(query, {'project_id': project_id})
+        names = [d[0] for d in cursor.description]
+        indexes = [names.index(col) for col in columns if col in names]
+        report_columns = [names[i] for i in indexes]
+
+        def project_rows():
+            while True:
+                batch = cursor.fetchmany(1000)
+                if not batch:
+                    return
+                for row in batch:
+                    yield [row[i] for i in indexes]
+
+        return write_pdf_report(path, title, report_columns, project_rows())
+    finally:
+        conn.close()
+
+
+def safe_file_name(name):
+    """Make a project name usable as a file name"""
+    return re.sub(r'[<>:"/\\|?*]+', '_', name).strip() or "project"
+
+
+def write_project_pdfs(db_path, query, projects, out_dir, columns, title_prefix,
+                       max_workers=None, progress=None, check_cancelled=None):
+    """Write one PDF per (project_id, project_name) in parallel worker processes.
+
+    Returns the list of written paths; ``progress(done, total)`` counts projects.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+        for project_id, project_name in projects:
+            path = os.path.join(out_dir, f"{safe_file_name(project_name)}.pdf")
+            future = pool.submit(write_project_pdf, db_path, query, project_id,
+                                 f"{title_prefix}{project_name}", columns, path)
+            futures[future] = path
+        try:
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                paths.append(futures[future])
+                if progress:
+                    progress(done, len(futures))
+                if check_cancelled:
+                    check_cancelled()
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+    return paths
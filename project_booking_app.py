@@ -5,12 +5,36 @@ import sqlite3
 import customtkinter as ctk
 from tkinter import filedialog, messagebox, ttk
 import tkinter as tk
-import pandas as pd
 import subprocess
+import time
 import traceback
-from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
+import multiprocessing
 from datetime import datetime, date
-from PIL import Image, ImageTk
+from employee_search import EmployeeSearchIndex
+from selection_index import ServiceAdjacencyIndex
+from background_tasks import BackgroundExecutor
+from startup import LazyModule, preload, mark_startup
+from data_versions import ensure_tracked, read_versions
+from change_log import ensure_logged, latest_seq, read_changes
+from booking_costs import ensure_booking_costs
+from booking_allocation import ensure_booking_allocation, sync_booking_allocation
+from booking_grid import (BOOKING_GRID_COLUMNS, BOOKING_GRID_QUERY, BOOKING_GRID_SELECT, BOOKING_STORED_COLUMNS,
+                          stored_column)
+from cost_cube import ensure_cost_cube, sync_cost_cube
+from booking_periods import ensure_booking_periods, parse_period, sync_booking_periods
+from booking_storage import BOOKINGS_VIEW, ensure_booking_storage
+from rate_history import ensure_rate_history
+from rate_propagation import format_report, propagate_employee_attributes
+from overbooking import check_overbookings, conflicting_bookings, format_report as format_overbooking_report
+from db_watcher import DatabaseWatcher
+from dimension_cache import DIMENSION_TABLES, get_dimension_cache
+from edit_queue import DATE, INTEGER, NUMBER, EditQueue, to_db_value
+from grid_paste import describe_errors, parse_block, plan_paste
+from result_cache import QueryResultCache
+from warm_start import WarmStartCache
+
+# Heavy libraries are imported on first use, not at startup
+pd = LazyModule("pandas")
 
 # Set up logging
 logging.basicConfig(
@@ -23,6 +47,459 @@ logging.basicConfig(
 ctk.set_appearance_mode("light")
 ctk.set_default_color_theme("blue")  # We'll override with custom Saipem colors
 
+class EmployeeSearchPicker(ctk.CTkFrame):
+    """Type-ahead employee picker backed by EmployeeSearchIndex"""
+    
+    def __init__(self, parent, index, variable, command=None, width=200, max_results=15, **kwargs):
+        super().__init__(parent, fg_color="transparent", **kwargs)
+        
+        self.index = index
+        self.variable = variable
+        self.command = command
+        self.max_results = max_results
+        self.allowed = None  # Optional {employee_id: service count} narrowing the results
+        self.results = []
+        self.results_popup = None
+        self.results_listbox = None
+        self._search_job = None
+        
+        self.entry = ctk.CTkEntry(
+            self,
+            textvariable=variable,
+            width=width,
+            placeholder_text="Search name, GHRS ID or cost center"
+        )
+        self.entry.pack(fill="x")
+        
+        # Search as you type (debounced), arrow keys move into the results list
+        self.entry.bind('<KeyRelease>', self.on_key_release)
+        self.entry.bind('<Down>', self.focus_results)
+        self.entry.bind('<Return>', self.select_first_result)
+        self.entry.bind('<Escape>', lambda e: self.hide_results())
+        self.entry.bind('<FocusOut>', lambda e: self.after(200, self.hide_results_if_unfocused))
+        self.entry.bind('<Button-1>', lambda e: self.after(50, self.show_results) if self.allowed is not None else None)
+    
+    def set_allowed(self, allowed):
+        """Restrict the results to the given {employee_id: service count} mapping (None for all)"""
+        self.allowed = allowed
+    
+    def on_key_release(self, event):
+        """Schedule a search shortly after the user stops typing"""
+        if event.keysym in ("Down", "Up", "Return", "Escape", "Tab"):
+            return
+        if self._search_job:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(120, self.show_results)
+    
+    def show_results(self):
+        """Query the index and show the top matches under the entry"""
+        self._search_job = None
+        text = self.variable.get().strip()
+        if not text and self.allowed is None:
+            self.hide_results()
+            return
+        
+        self.results = self.index.search(text, limit=self.max_results, allowed=self.allowed)
+        if not self.results:
+            self.hide_results()
+            return
+        
+        if not self.results_popup or not self.results_popup.winfo_exists():
+            self.results_popup = tk.Toplevel(self)
+            self.results_popup.wm_overrideredirect(True)
+            self.results_listbox = tk.Listbox(self.results_popup, font=('Arial', 10),
+                                              activestyle='dotbox', exportselection=False)
+            self.results_listbox.pack(fill="both", expand=True)
+            self.results_listbox.bind('<Double-1>', self.select_result)
+            self.results_listbox.bind('<Return>', self.select_result)
+            self.results_listbox.bind('<Escape>', lambda e: self.hide_results())
+            self.results_listbox.bind('<FocusOut>', lambda e: self.after(200, self.hide_results_if_unfocused))
+        
+        self.results_listbox.delete(0, tk.END)
+        for emp_id, name, ghrs_id, cost_center in self.results:
+            details = " · ".join(part for part in (ghrs_id, cost_center) if part)
+            label = f"{name}  ({details})" if details else name
+            if self.allowed is not None:
+                label += f"  - {self.allowed.get(emp_id, 0)} services"
+            self.results_listbox.insert(tk.END, label)
+        self.results_listbox.configure(height=min(len(self.results), 10))
+        
+        # Position the list right below the entry
+        x = self.entry.winfo_rootx()
+        y = self.entry.winfo_rooty() + self.entry.winfo_height()
+        self.results_popup.geometry(f"{max(self.entry.winfo_width(), 300)}x{min(len(self.results), 10) * 20 + 4}+{x}+{y}")
+        self.results_popup.deiconify()
+        self.results_popup.lift()
+    
+    def hide_results(self):
+        """Hide the results list"""
+        if self.results_popup and self.results_popup.winfo_exists():
+            self.results_popup.withdraw()
+    
+    def hide_results_if_unfocused(self):
+        """Hide the results list unless focus moved into it"""
+        focused = self.focus_get()
+        if focused is not self.results_listbox and focused is not self.entry:
+            self.hide_results()
+    
+    def focus_results(self, event=None):
+        """Move keyboard focus into the results list"""
+        if self.results_listbox and self.results:
+            self.results_listbox.focus_set()
+            self.results_listbox.selection_clear(0, tk.END)
+            self.results_listbox.selection_set(0)
+            self.results_listbox.activate(0)
+    
+    def select_first_result(self, event=None):
+        """Pick the best match when Enter is pressed in the entry"""
+        if self._search_job:
+            self.after_cancel(self._search_job)
+            self.show_results()
+        if self.results:
+            self.choose(self.results[0][1])
+    
+    def select_result(self, event=None):
+        """Pick the highlighted match from the results list"""
+        selection = self.results_listbox.curselection()
+        if selection and selection[0] < len(self.results):
+            self.choose(self.results[selection[0]][1])
+    
+    def choose(self, name):
+        """Set the selected employee and notify the owner"""
+        self.variable.set(name)
+        self.hide_results()
+        self.entry.focus_set()
+        if self.command:
+            self.command(name)
+    
+    def get(self):
+        """Get the selected employee name"""
+        return self.variable.get()
+    
+    def set(self, value):
+        """Set the selected employee name"""
+        self.variable.set(value)
+
+# Grid columns editable in place -> (project_bookings column, kind: NUMBER, INTEGER, DATE or None for text)
+BOOKING_EDIT_COLUMNS = {
+    "Cost Center": ("cost_center", None),
+    "GHRS ID": ("ghrs_id", None),
+    "Employee Name": ("employee_name", None),
+    "Work Location": ("work_location", None),
+    "Business Unit": ("business_unit", None),
+    "Tipo": ("tipo", None),
+    "Tipo Description": ("tipo_description", None),
+    "SAP Tipo": ("sap_tipo", None),
+    "SAABU Rate (EUR)": ("saabu_rate_eur", NUMBER),
+    "SAABU Rate (USD)": ("saabu_rate_usd", NUMBER),
+    "Local Agency Rate (USD)": ("local_agency_rate_usd", NUMBER),
+    "Unit Rate (USD)": ("unit_rate_usd", NUMBER),
+    "Monthly Hours": ("monthly_hours", INTEGER),
+    "Annual Hours": ("annual_hours", INTEGER),
+    "Workload 2025_Planned": ("workload_2025_planned", NUMBER),
+    "Workload 2025_Actual": ("workload_2025_actual", NUMBER),
+    "Remark": ("remark", None),
+    "Project": ("project_name", None),
+    "Item": ("item", None),
+    "Technical Unit": ("technical_unit_name", None),
+    "Activities": ("activities_name", None),
+    "Booking Period From": ("booking_period_from", DATE),
+    "Booking Period To": ("booking_period_to", DATE),
+    "Actual Hours": ("actual_hours", NUMBER),
+    "Hourly Rate": ("hourly_rate", NUMBER),
+    "Status": ("booking_status", None),
+    "Booking Date": ("booking_date", DATE),
+    "Start Date": ("start_date", DATE),
+    "End Date": ("end_date", DATE),
+}
+
+# Tables whose changes invalidate a snapshot of the bookings grid
+BOOKING_GRID_TABLES = (
+    "project_bookings", "employee", "technical_unit", "project", "service",
+    "title", "activities", "department", "hub",
+)
+
+# Formatted grid results and filtered views, reused until the booking tables change
+booking_cache = QueryResultCache("Booking grid", max_bytes=128 * 1024 * 1024)
+
+# Bookings whose grid row depends on a changed row of another table ({ids} = the changed ids)
+BOOKING_CHANGE_QUERIES = {
+    "service": "SELECT id FROM project_bookings WHERE service_id IN ({ids})",
+    "employee": "SELECT id FROM project_bookings WHERE employee_id IN ({ids})",
+    "technical_unit": "SELECT id FROM project_bookings WHERE technical_unit_id IN ({ids})",
+    "project": "SELECT id FROM project_bookings WHERE project_id IN ({ids})",
+    "department": "SELECT id FROM project_bookings WHERE department_id IN ({ids})",
+    "hub": "SELECT id FROM project_bookings WHERE hub_id IN ({ids})",
+    "title": "SELECT id FROM project_bookings WHERE service_id IN (SELECT id FROM service WHERE title_id IN ({ids}))",
+    "activities": "SELECT id FROM project_bookings WHERE service_id IN "
+                  "(SELECT id FROM service WHERE activities_id IN ({ids}))",
+}
+
+# Pending change log entries above which reloading the grid is cheaper than patching it
+MAX_DELTA_CHANGES = 2000
+
+# Tables behind the selection dropdowns and the employee services panel
+SELECTION_TABLES = ("service", "employee", "technical_unit", "project")
+SQL_CHUNK = 500  # ids per IN (...) list, below SQLite's parameter limit
+
+# Columns that can be set for many bookings at once -> (table, column, kind: dimension table or None for text);
+# progress is kept on the bookings' services
+BULK_EDIT_COLUMNS = {
+    "Status": ("project_bookings", "booking_status", None),
+    "Hub": ("project_bookings", "hub_id", "hub"),
+    "Department": ("project_bookings", "department_id", "department"),
+    "Progress": ("service", "progress_id", "progress"),
+}
+BOOKING_STATUS_OPTIONS = ["Pending", "Approved", "Rejected", "In Progress", "Completed", "Cancelled"]
+
+# Fields that must all be zero/empty for smart refresh to delete a booking
+ZERO_BOOKING_FIELDS = [
+    'monthly_hours', 
+    'annual_hours', 
+    'workload_2025_planned', 
+    'workload_2025_actual',
+    'booking_hours', 
+    'booking_period',  # This might be text, so we'll treat it differently
+    'booking_hours_accepted', 
+    'booking_period_accepted',  # This might be text, so we'll treat it differently
+    'booking_hours_extra'
+]
+
+# Background task bodies - module level so they can run in a worker process
+
+def fetch_selection_data(db_path, employee_index, service_index):
+    """Read dropdown data and rebuild the search/adjacency indexes (runs on an I/O thread)"""
+    # Technical units and projects come from the shared dimension cache
+    dimensions = get_dimension_cache(db_path)
+    technical_units = dimensions.get("technical_unit").rows
+    projects = dimensions.get("project").rows
+    
+    # Employees may have changed - rebuild the search index now so the first search is instant
+    employee_index.load()
+    # Pick up new services for the cascading dropdowns
+    service_index.refresh()
+    return technical_units, projects
+
+def fetch_project_bookings(db_path):
+    """Read all project bookings for the grid and the table versions they reflect (runs on an I/O thread)
+    
+    Returns (versions, seq, rows, cached), seq being the change log position of
+    the rows; when the formatted grid for these versions is in booking_cache,
+    rows is None and cached holds it, so nothing is queried.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_tracked(conn, db_path)
+        ensure_logged(conn, db_path)
+        # One read transaction, so the versions and seq describe exactly these rows
+        conn.execute("BEGIN")
+        versions = read_versions(conn, BOOKING_GRID_TABLES)
+        seq = latest_seq(conn)
+        cached = booking_cache.get(QueryResultCache.key("booking_grid", db_path, versions=versions))
+        if cached is not None:
+            return versions, seq, None, cached
+        rows = conn.execute(BOOKING_GRID_QUERY).fetchall()
+        conn.rollback()
+        return versions, seq, rows, None
+    finally:
+        conn.close()
+
+def fetch_grid_state(db_path):
+    """Read (table versions, change log seq) of the booking grid tables in one transaction (runs on an I/O thread)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_tracked(conn, db_path)
+        ensure_logged(conn, db_path)
+        conn.execute("BEGIN")
+        state = read_versions(conn, BOOKING_GRID_TABLES), latest_seq(conn)
+        conn.rollback()
+        return state
+    finally:
+        conn.close()
+
+def fetch_booking_changes(db_path, since):
+    """Read the grid rows changed after change log position since (runs on an I/O thread)
+    
+    Returns (seq, versions, rows, deleted_ids) - rows being the current grid
+    rows of every inserted or affected booking - or None when the changes are
+    too many (or no longer logged) and the grid should be reloaded instead.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_logged(conn, db_path)
+        conn.execute("BEGIN")
+        pending = read_changes(conn, since, limit=MAX_DELTA_CHANGES)
+        if pending is None:
+            return None
+        seq, changes = pending
+        versions = read_versions(conn, BOOKING_GRID_TABLES)
+        
+        booking_ids = set(changes.get("project_bookings", {}))
+        for table, query in BOOKING_CHANGE_QUERIES.items():
+            row_ids = list(changes.get(table, {}))
+            for start in range(0, len(row_ids), SQL_CHUNK):
+                chunk = row_ids[start:start + SQL_CHUNK]
+                placeholders = ','.join('?' for _ in chunk)
+                booking_ids.update(r[0] for r in conn.execute(query.format(ids=placeholders), chunk))
+        if len(booking_ids) > MAX_DELTA_CHANGES:
+            return None
+        
+        rows = []
+        ids = sorted(booking_ids)
+        for start in range(0, len(ids), SQL_CHUNK):
+            chunk = ids[start:start + SQL_CHUNK]
+            placeholders = ','.join('?' for _ in chunk)
+            rows += conn.execute(f"{BOOKING_GRID_SELECT}    WHERE pb.id IN ({placeholders})\n    ORDER BY pb.id\n",
+                                 chunk).fetchall()
+        conn.rollback()
+        deleted_ids = booking_ids - {row[0] for row in rows}
+        return seq, versions, rows, deleted_ids
+    finally:
+        conn.close()
+
+def format_booking_rows(bookings_data):
+    """Turn raw booking rows into treeview values and the filter DataFrame (runs in a worker process)"""
+    display_rows = []
+    formatted_data_list = []  # Store for DataFrame
+    for booking_data in bookings_data:
+        # Format the data for display (handle None values)
+        formatted_data = ["☐"]  # Start with unchecked checkbox
+        formatted_row = {}  # For DataFrame
+        
+        shown = len(BOOKING_GRID_COLUMNS) - 1
+        for column, value in zip(BOOKING_STORED_COLUMNS, booking_data[shown:]):
+            formatted_row[stored_column(column)] = "" if value is None else str(value)
+        
+        for i, value in enumerate(booking_data[:shown]):
+            col_name = BOOKING_GRID_COLUMNS[i + 1]  # +1 because we added Select column
+            
+            if value is None:
+                display_value = "N/A"
+                formatted_row[col_name] = ""
+            elif i in [10, 11, 12, 13, 15, 16, 17, 18, 26, 27, 28, 29]:  # Decimal/money columns (rates, hours, costs)
+                try:
+                    display_value = f"{float(value):.2f}" if value else "0.00"
+                    formatted_row[col_name] = float(value) if value else 0.0
+                except (ValueError, TypeError):
+                    display_value = str(value) if value else "N/A"
+                    formatted_row[col_name] = str(value) if value else ""
+            elif i in [14, 15]:  # Integer hours columns
+                try:
+                    display_value = str(int(value)) if value else "0"
+                    formatted_row[col_name] = int(value) if value else 0
+                except (ValueError, TypeError):
+                    display_value = str(value) if value else "N/A"
+                    formatted_row[col_name] = str(value) if value else ""
+            elif i in [24, 25, 30, 31, 32]:  # Date columns (booking_period_from, booking_period_to, booking_date, start_date, end_date)
+                display_value = str(value) if value else "N/A"
+                formatted_row[col_name] = str(value) if value else ""
+            else:
+                display_value = str(value) if value else "N/A"
+                formatted_row[col_name] = str(value) if value else ""
+                
+            formatted_data.append(display_value)
+        
+        # Add Select column to DataFrame
+        formatted_row["Select"] = False
+        formatted_data_list.append(formatted_row)
+        display_rows.append(formatted_data)
+    
+    return display_rows, pd.DataFrame(formatted_data_list)
+
+def export_bookings_to_excel(task, file_path, df, columns):
+    """Stream the booking grid model to a formatted workbook (runs on an I/O thread)"""
+    from excel_export import write_rows_to_excel
+    
+    numeric_columns = [col for col in columns if pd.api.types.is_numeric_dtype(df[col])]
+    write_rows_to_excel(
+        file_path, columns, df[columns].itertuples(index=False, name=None),
+        sheet_name='Project Bookings', total=len(df), numeric_columns=numeric_columns,
+        progress=task.report_progress, check_cancelled=task.check_cancelled
+    )
+    return file_path
+
+def find_zero_bookings(db_path):
+    """Find bookings where all ZERO_BOOKING_FIELDS are zero or empty (runs on an I/O thread)"""
+    # Build the WHERE clause to find rows where all numeric fields are 0 or NULL
+    # For period fields, we check if they are NULL, empty, or contain only '0'
+    numeric_conditions = []
+    for field in ZERO_BOOKING_FIELDS:
+        if 'period' in field:
+            # For period fields, check if NULL, empty, or just '0'
+            numeric_conditions.append(f"({field} IS NULL OR {field} = '' OR {field} = '0')")
+        else:
+            # For numeric fields, check if 0 or NULL
+            numeric_conditions.append(f"({field} IS NULL OR {field} = 0)")
+    
+    where_clause = " AND ".join(numeric_conditions)
+    
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"""
+            SELECT id, employee_name, project_name, technical_unit_name
+            FROM project_bookings_full 
+            WHERE {where_clause}
+        """).fetchall()
+    finally:
+        conn.close()
+
+def delete_bookings(db_path, booking_ids):
+    """Delete bookings by id in one transaction (runs on an I/O thread)"""
+    conn = sqlite3.connect(db_path)
+    try:
+        placeholders = ','.join('?' for _ in booking_ids)
+        cursor = conn.execute(f"DELETE FROM project_bookings WHERE id IN ({placeholders})", list(booking_ids))
+        conn.commit()
+        return cursor.rowcount
+    finally:
+        conn.close()
+
+def derive_booking_fields(conn, saved):
+    """Stamp the edited bookings, once per batch of edits (runs in the edit transaction)
+
+    Costs follow hours and rates through the triggers of booking_costs.
+    """
+    booking_ids = sorted({booking_id for booking_id, _ in saved})
+    for start in range(0, len(booking_ids), SQL_CHUNK):
+        chunk = booking_ids[start:start + SQL_CHUNK]
+        conn.execute(f"UPDATE project_bookings SET updated_at = CURRENT_TIMESTAMP "
+                     f"WHERE id IN ({','.join('?' for _ in chunk)})", chunk)
+
+def bulk_update_bookings(db_path, column, value, booking_ids):
+    """Set one BULK_EDIT_COLUMNS column to value for all the given bookings in one statement (runs on an I/O thread)
+
+    Large id sets go through a temporary table instead of an IN list. Returns
+    the number of rows updated.
+    """
+    table, db_column, kind = BULK_EDIT_COLUMNS[column]
+    new_value = to_db_value(db_path, kind, value)  # resolve names before taking the write lock
+    booking_ids = sorted({int(booking_id) for booking_id in booking_ids})
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        if len(booking_ids) <= SQL_CHUNK:
+            id_list, params = ','.join('?' for _ in booking_ids), booking_ids
+        else:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS bulk_ids (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM temp.bulk_ids")
+            conn.executemany("INSERT INTO temp.bulk_ids (id) VALUES (?)", ((booking_id,) for booking_id in booking_ids))
+            id_list, params = "SELECT id FROM temp.bulk_ids", []
+        if table == "service":
+            cursor = conn.execute(f'UPDATE service SET "{db_column}" = ? '
+                                  f'WHERE id IN (SELECT service_id FROM project_bookings WHERE id IN ({id_list}))',
+                                  [new_value, *params])
+        else:
+            cursor = conn.execute(f'UPDATE project_bookings SET "{db_column}" = ?, updated_at = CURRENT_TIMESTAMP '
+                                  f'WHERE id IN ({id_list})', [new_value, *params])
+        updated = cursor.rowcount
+        conn.commit()
+        return updated
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
 class ProjectBookingApp:
     """Project Booking & Resource Allocation Application"""
     
@@ -30,6 +507,14 @@ class ProjectBookingApp:
         self.root = ctk.CTk()
         self.root.title("Project Booking & Resource Allocation System")
         self.root.geometry("1600x1000")  # Increased window size for better table visibility
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Database queries and heavy pandas work run in the background
+        self.executor = BackgroundExecutor(
+            self.root,
+            on_busy_change=self.on_busy_change,
+            on_progress=self.on_task_progress
+        )
         
         # Database connection
         self.db_path = "workload.db"
@@ -43,7 +528,12 @@ class ProjectBookingApp:
         # Store mapping of dropdown display names to IDs
         self.technical_unit_map = {}
         self.project_map = {}
-        self.employee_map = {}
+        # Employees are looked up through a lazily built search index
+        self.employee_index = EmployeeSearchIndex(self.db_path)
+        self.employee_map = self.employee_index
+        
+        # Valid (technical unit, project, employee) combinations from the service table
+        self.service_index = ServiceAdjacencyIndex(self.db_path)
         
         # Data storage
         self.technical_units = []
@@ -66,17 +556,52 @@ class ProjectBookingApp:
         self.search_var = None
         self.select_all_var = None
         
-        # Auto-refresh timer (refresh every 30 seconds) - DISABLED BY DEFAULT
-        self.auto_refresh_enabled = False  # FIXED: Disabled to prevent filter clearing
-        # self.schedule_auto_refresh()  # COMMENTED OUT - user can enable manually
+        # Auto-refresh patches only the changed rows in from the change log, so filters,
+        # sort and selections survive it. The watcher notices commits from any process
+        # within a second and tells which tables they touched.
+        self.auto_refresh_enabled = True
+        self.change_seq = None            # change log position the grid reflects (None while loading)
+        self.change_poll_pending = False
+        self.change_poll_again = False    # changes were announced while a poll could not run
+        self.db_watcher = DatabaseWatcher(self.root, self.db_path)
+        
+        # Inline grid edits are buffered per (booking id, column) and committed together
+        self.booking_edits = EditQueue(self.root, self.executor, self.db_path, BOOKINGS_VIEW,
+                                       BOOKING_EDIT_COLUMNS, on_change=self.on_pending_edits_change,
+                                       on_flushed=self.on_booking_edits_flushed,
+                                       on_failed=self.on_booking_edits_failed, derive=derive_booking_fields)
+        self.booking_items = {}  # booking id -> grid item, rebuilt when the grid was re-rendered
+        self.overbooked = {}  # employee id -> ids of its bookings in an overbooking conflict (flagged in the grid)
+        self.root.bind('<Control-s>', lambda e: self.booking_edits.flush())
+        self.db_watcher.subscribe(BOOKING_GRID_TABLES, self.on_booking_tables_changed)
+        self.db_watcher.subscribe(SELECTION_TABLES, self.on_selection_tables_changed)
+        self.db_watcher.subscribe(DIMENSION_TABLES, self.on_dimension_tables_changed)
+        self.db_watcher.subscribe(("employee_extended",), self.on_employee_attributes_changed)
+        self.db_watcher.subscribe(("project_bookings",), self.on_booking_periods_changed)
+        self.db_watcher.subscribe(("project_bookings",), self.on_booking_allocation_changed)
+        self.db_watcher.subscribe(("project_bookings",), self.on_cost_cube_changed)
+        self.db_watcher.subscribe(("project_bookings", "employee_extended"), self.on_overbooking_inputs_changed)
         self.current_bookings = []
         
+        # Warm start - restore the last session's selection, filters, sort and column widths
+        self.warm_start = WarmStartCache(os.path.join(os.path.dirname(__file__), 'project_booking_app'))
+        self.restore_session_state(self.warm_start.load_state())
+        self.booking_grid_result = None    # (display_rows, df) currently shown
+        self.booking_grid_versions = None  # table versions booking_grid_result was read at
+        self.booking_snapshot_dirty = False
+        
+        self.setup_ui()
+        
+        # Paint the window before pandas and the data are pulled in
+        self.root.update()
+        mark_startup("first_paint")
+        
         # Main data DataFrame for filtering - like Fabsi app
         self.df = pd.DataFrame()
         self.original_df = pd.DataFrame()
         
-        self.setup_ui()
         self.load_data()
+        self.schedule_auto_refresh()
         
     def init_extended_database(self):
         """Initialize database schema for project booking - using existing tables only"""
@@ -121,6 +646,17 @@ class ProjectBookingApp:
                     )
                 ''')
             
+            # Employee attributes are stored once per version; costs derived from hours and rates are kept by triggers
+            ensure_booking_storage(conn)
+            ensure_booking_costs(conn)
+            ensure_rate_history(conn)
+            # Free-text booking periods are parsed into indexed from/to dates
+            ensure_booking_periods(conn)
+            # Booked hours spread per employee and month, for utilization against capacity
+            ensure_booking_allocation(conn)
+            # Hours and costs pre-aggregated by project, technical unit, department and month
+            ensure_cost_cube(conn)
+            
             conn.commit()
             conn.close()
             print("Database schema checked successfully - using existing tables")
@@ -133,6 +669,8 @@ class ProjectBookingApp:
         """Load and resize logo image for display"""
         try:
             if os.path.exists(image_path):
+                from PIL import Image
+                
                 # Load and resize the image
                 pil_image = Image.open(image_path)
                 # Convert to RGBA if not already
@@ -214,6 +752,23 @@ class ProjectBookingApp:
                                           font=("Arial", 7), text_color="#ef8827")
         right_logo_label.pack(expand=True)
         
+        # Busy indicator for background work (hidden while idle)
+        busy_frame = ctk.CTkFrame(header_frame, fg_color="transparent")
+        busy_frame.pack(side='right', padx=5)
+        self.pending_edits_label = ctk.CTkLabel(busy_frame, text="", font=ctk.CTkFont(size=11), text_color="#b8860b")
+        self.pending_edits_label.pack(side='left', padx=3)
+        self.busy_label = ctk.CTkLabel(busy_frame, text="", font=ctk.CTkFont(size=11), text_color="#22505f")
+        self.busy_label.pack(side='left', padx=3)
+        self.busy_bar = ctk.CTkProgressBar(busy_frame, width=120, mode="indeterminate", progress_color="#003d52")
+        self.busy_cancel_btn = ctk.CTkButton(
+            busy_frame, 
+            text="✕", 
+            command=self.cancel_background_work,
+            width=24,
+            fg_color="#003d52",
+            hover_color="#255c7b"
+        )
+        
         # Add separator - same as Fabsi app
         separator_frame = ctk.CTkFrame(self.root, height=1, fg_color="#22505f")
         separator_frame.pack(fill='x', padx=10, pady=(0, 3))
@@ -256,8 +811,9 @@ class ProjectBookingApp:
         employee_frame.pack(side="left", fill="x", expand=True, padx=3)
         
         ctk.CTkLabel(employee_frame, text="Employee:", font=ctk.CTkFont(size=11)).pack(pady=(2, 0))
-        self.employee_dropdown = ctk.CTkComboBox(
+        self.employee_dropdown = EmployeeSearchPicker(
             employee_frame,
+            index=self.employee_index,
             variable=self.selected_employee,
             command=self.on_employee_change,
             width=200
@@ -301,6 +857,26 @@ class ProjectBookingApp:
         )
         self.delete_selected_btn.pack(side="left", padx=3)
         
+        self.bulk_edit_btn = ctk.CTkButton(
+            button_frame, 
+            text="✏️ Bulk Edit", 
+            command=self.open_bulk_edit_dialog,
+            width=120,
+            fg_color="#003d52",
+            hover_color="#255c7b"
+        )
+        self.bulk_edit_btn.pack(side="left", padx=3)
+        
+        self.overbooking_btn = ctk.CTkButton(
+            button_frame, 
+            text="⚠️ Overbookings", 
+            command=self.show_overbooking_report,
+            width=130,
+            fg_color="#003d52",
+            hover_color="#255c7b"
+        )
+        self.overbooking_btn.pack(side="left", padx=3)
+        
         self.select_all_btn = ctk.CTkButton(
             button_frame, 
             text="✅ Select All", 
@@ -331,6 +907,16 @@ class ProjectBookingApp:
         )
         self.clear_filters_btn.pack(side="left", padx=3)
         
+        self.clear_selection_btn = ctk.CTkButton(
+            button_frame, 
+            text="↺ Clear Selection", 
+            command=self.clear_selection,
+            width=120,
+            fg_color="#003d52",
+            hover_color="#255c7b"
+        )
+        self.clear_selection_btn.pack(side="left", padx=3)
+        
         # Export buttons frame - same as Fabsi app
         export_frame = ctk.CTkFrame(button_frame, corner_radius=8)
         export_frame.pack(side='left', padx=10)
@@ -343,6 +929,11 @@ class ProjectBookingApp:
                      fg_color="#003d52", hover_color="#255c7b",
                      width=80).pack(side='left', padx=5, pady=5)
         
+        ctk.CTkButton(export_frame, text="⚡ Raw Data", 
+                     command=self.export_raw_data,
+                     fg_color="#003d52", hover_color="#255c7b",
+                     width=90).pack(side='left', padx=5, pady=5)
+        
         self.import_btn = ctk.CTkButton(
             button_frame, 
             text="📁 Import Excel", 
@@ -457,8 +1048,12 @@ class ProjectBookingApp:
         # Add checkbox selection functionality
         self.employee_tree.bind('<Button-1>', self.toggle_row_selection, add='+')
         
-        # Load employee data initially
-        self.load_employee_data_grid()
+        # Paste blocks copied from Excel at the selected row and the last clicked column
+        self.paste_anchor_column = None
+        self.employee_tree.bind('<ButtonRelease-1>', self.remember_paste_column)
+        self.employee_tree.bind('<Control-v>', self.paste_into_grid)
+        
+        # Employee data is loaded by load_data once the window is shown
     
     def setup_employee_details_panel(self):
         """Setup employee details display panel"""
@@ -731,66 +1326,199 @@ class ProjectBookingApp:
         self.reject_booking_btn.pack(side="left", padx=3)
     
     def load_data(self):
-        """Load data from database using unified tables"""
+        """Load data from database using unified tables - queries run in the background"""
+        self.load_data_indexes()
+        
+        # Show the bookings saved at the last exit straight away, then check them against the database
+        self.load_warm_start_bookings()
+    
+    def load_data_indexes(self):
+        """(Re)load the dropdown data and the employee/service indexes in the background"""
+        self.executor.submit(
+            "load_data", fetch_selection_data, self.db_path, self.employee_index, self.service_index,
+            on_success=self.apply_selection_data,
+            on_error=self.on_load_data_error,
+            message="Loading data..."
+        )
+    
+    def apply_selection_data(self, result):
+        """Fill the selection dropdowns once the background load finished"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+            self.technical_units, self.projects = result
             
-            # Load technical units with mapping
-            cursor.execute("SELECT id, name FROM technical_unit ORDER BY name")
-            self.technical_units = cursor.fetchall()
+            # Mappings of dropdown display names to IDs
             self.technical_unit_map = {tu[1]: tu[0] for tu in self.technical_units}
-            tech_unit_names = [tu[1] for tu in self.technical_units]
-            self.tech_unit_dropdown.configure(values=tech_unit_names)
-            
-            # Load projects with mapping
-            cursor.execute("SELECT id, name FROM project ORDER BY name")
-            self.projects = cursor.fetchall()
             self.project_map = {p[1]: p[0] for p in self.projects}
-            project_names = [p[1] for p in self.projects]
-            self.project_dropdown.configure(values=project_names)
-            
-            # Load employees from employee table only with mapping
-            cursor.execute("SELECT id, name FROM employee ORDER BY name")
-            all_employees = cursor.fetchall()
-            
-            # Create employee mapping - all employees are now unified
-            self.employees = []
-            self.employee_map = {}
-            
-            for emp in all_employees:
-                display_name = emp[1]  # Just use the name without type indicator
-                self.employees.append((emp[0], emp[1], "unified"))
-                self.employee_map[display_name] = {"id": emp[0], "type": "unified"}
-            
-            employee_names = list(self.employee_map.keys())
-            self.employee_dropdown.configure(values=employee_names)
             
-            conn.close()
-            
-            # Load the employee data grid
-            self.load_employee_data_grid()
+            # Narrow the dropdowns to valid combinations
+            self.update_cascading_dropdowns()
             
             print("Data loaded successfully from unified tables")
             
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to load data: {e}")
-            logging.error(f"Data loading error: {e}")
+            self.on_load_data_error(e)
+    
+    def restore_session_state(self, state):
+        """Take over the selection, filters, sort and column widths saved by save_warm_start"""
+        self.selected_technical_unit.set(state.get("technical_unit", ""))
+        self.selected_project.set(state.get("project", ""))
+        self.selected_employee.set(state.get("employee", ""))
+        self.active_column_filters = {col: list(values) for col, values in state.get("filters", {}).items()}
+        self.current_sort_column = state.get("sort_column")
+        self.current_sort_ascending = state.get("sort_ascending", True)
+        self.saved_column_widths = state.get("column_widths", {})
+    
+    def save_warm_start(self):
+        """Remember the session state and the loaded bookings for the next launch"""
+        state = {
+            "technical_unit": self.selected_technical_unit.get(),
+            "project": self.selected_project.get(),
+            "employee": self.selected_employee.get(),
+            "filters": self.active_column_filters,
+            "sort_column": self.current_sort_column,
+            "sort_ascending": self.current_sort_ascending,
+            "column_widths": self.saved_column_widths,
+        }
+        if hasattr(self, 'employee_tree'):
+            state["column_widths"] = {col: self.employee_tree.column(col, 'width')
+                                      for col in self.employee_tree['columns']}
+        self.warm_start.save_state(state)
+        
+        # The snapshot only needs rewriting when the grid was loaded from the database
+        if self.booking_snapshot_dirty and self.booking_grid_result is not None:
+            self.warm_start.save_snapshot(os.path.abspath(self.db_path), self.booking_grid_versions,
+                                          self.booking_grid_result)
+    
+    def load_warm_start_bookings(self):
+        """Paint the snapshot of the bookings grid from the last session, if there is one"""
+        if not hasattr(self, 'employee_tree'):
+            return
+        self.executor.submit(
+            "booking_grid", self.warm_start.load_snapshot, os.path.abspath(self.db_path),
+            on_success=self.show_cached_bookings,
+            on_error=lambda e: self.load_employee_data_grid(on_loaded=self.restore_view_state),
+            message="Opening last session..."
+        )
+    
+    def show_cached_bookings(self, snapshot):
+        """Show the cached bookings, then reconcile them with the database in the background"""
+        if snapshot is None:
+            self.load_employee_data_grid(on_loaded=self.restore_view_state)
+            return
+        
+        versions, result = snapshot
+        self.populate_employee_data_grid(result, on_loaded=self.restore_view_state)
+        self.booking_grid_result = result
+        self.booking_grid_versions = versions
+        self.booking_snapshot_dirty = False
+        
+        self.executor.submit(
+            "booking_grid_check", fetch_grid_state, self.db_path,
+            on_success=self.reconcile_cached_bookings,
+            on_error=lambda e: self.load_employee_data_grid(on_loaded=self.restore_view_state),
+            message="Checking for changes..."
+        )
+    
+    def reconcile_cached_bookings(self, state):
+        """Reload the grid if the database changed since the cached bookings were read"""
+        versions, seq = state
+        if versions == self.booking_grid_versions:
+            print("Cached project bookings are up to date")
+            self.resume_change_polling(seq)
+            return
+        changed = [table for table, version in versions.items() if self.booking_grid_versions.get(table) != version]
+        print(f"Cached project bookings are stale ({', '.join(changed)} changed) - reloading")
+        self.load_employee_data_grid(on_loaded=self.restore_view_state)
+    
+    def restore_view_state(self):
+        """Re-apply the active column filters and sort to a freshly loaded grid"""
+        if self.df.empty or not (self.active_column_filters or self.current_sort_column in self.df.columns):
+            return
+        self.df = self.filtered_bookings()
+        if self.current_sort_column in self.df.columns:
+            self.df = self.df.sort_values(by=self.current_sort_column, ascending=self.current_sort_ascending,
+                                          na_position='last')
+        self.render_employee_table()
+    
+    def filtered_bookings(self):
+        """original_df narrowed by every active column filter, cached per filter set and data version"""
+        if not self.active_column_filters:
+            return self.original_df.copy()
+        key = QueryResultCache.key("booking_grid_filtered", self.db_path, self.active_column_filters,
+                                   self.booking_grid_versions)
+        df = booking_cache.get(key)
+        if df is None:
+            df = self.original_df
+            for column, values in self.active_column_filters.items():
+                if column in df.columns:
+                    df = df[df[column].astype(str).isin([str(v) for v in values])]
+            booking_cache.put(key, df)
+        return df.copy()
+    
+    def on_load_data_error(self, e):
+        """Report a failed background data load"""
+        messagebox.showerror("Error", f"Failed to load data: {e}")
+        logging.error(f"Data loading error: {e}")
     
     def on_technical_unit_change(self, value):
-        """Handle technical unit selection change"""
-        pass  # Remove automatic service data addition
+        """Handle technical unit selection change - narrow the other dropdowns"""
+        self.selected_technical_unit.set(self.strip_option_count(value))
+        self.update_cascading_dropdowns()
     
     def on_project_change(self, value):
-        """Handle project selection change"""
-        pass  # Remove automatic service data addition
+        """Handle project selection change - narrow the other dropdowns"""
+        self.selected_project.set(self.strip_option_count(value))
+        self.update_cascading_dropdowns()
     
     def on_employee_change(self, value):
         """Handle employee selection change"""
         if value:
+            self.update_cascading_dropdowns()
             self.display_employee_details()  # Show employee details if panel exists
             self.load_employee_services()    # Load services for selected employee
     
+    @staticmethod
+    def strip_option_count(value):
+        """Remove the ' (N)' service count suffix from a dropdown option"""
+        return re.sub(r' \(\d+\)$', '', value or "")
+    
+    def update_cascading_dropdowns(self):
+        """Show only options that have services with the current selections, with service counts"""
+        try:
+            tech_unit_id = self.technical_unit_map.get(self.selected_technical_unit.get())
+            project_id = self.project_map.get(self.selected_project.get())
+            employee_name = self.selected_employee.get()
+            employee_id = self.employee_map[employee_name]["id"] if employee_name in self.employee_map else None
+            
+            tech_unit_counts = self.service_index.options(
+                "technical_unit", project=project_id, employee=employee_id)
+            self.tech_unit_dropdown.configure(values=[
+                f"{name} ({tech_unit_counts[tu_id]})"
+                for tu_id, name in self.technical_units if tu_id in tech_unit_counts
+            ])
+            
+            project_counts = self.service_index.options(
+                "project", technical_unit=tech_unit_id, employee=employee_id)
+            self.project_dropdown.configure(values=[
+                f"{name} ({project_counts[p_id]})"
+                for p_id, name in self.projects if p_id in project_counts
+            ])
+            
+            employee_counts = self.service_index.options(
+                "employee", technical_unit=tech_unit_id, project=project_id)
+            self.employee_dropdown.set_allowed(
+                employee_counts if tech_unit_id is not None or project_id is not None else None)
+            
+        except Exception as e:
+            logging.error(f"Cascading dropdown update error: {e}")
+    
+    def clear_selection(self):
+        """Clear the three selections and show all options again"""
+        self.selected_technical_unit.set("")
+        self.selected_project.set("")
+        self.selected_employee.set("")
+        self.update_cascading_dropdowns()
+    
     def check_and_add_service_data(self):
         """Check if all dropdowns are selected and filter service table to add to project_bookings table"""
         try:
@@ -823,6 +1551,13 @@ class ProjectBookingApp:
                 matching_services = cursor.fetchall()
                 
                 if matching_services:
+                    # Names come from the dimension cache instead of a query per service
+                    dimensions = get_dimension_cache(self.db_path)
+                    employee_full_name = dimensions.get("employee").name_for(employee_id)
+                    project_name_val = dimensions.get("project").name_for(project_id, "N/A")
+                    tu_name_val = dimensions.get("technical_unit").name_for(tech_unit_id, "N/A")
+                    activities = dimensions.get("activities")
+                    
                     # Add each matching service to project_bookings table
                     bookings_added = 0
                     for service in matching_services:
@@ -857,30 +1592,11 @@ class ProjectBookingApp:
                             
                             # Fallback: get employee name from main employee table if extended doesn't have it
                             if not emp_data or not emp_data[2]:
-                                cursor.execute("SELECT name FROM employee WHERE id = ?", (employee_id,))
-                                emp_name_fallback = cursor.fetchone()
-                                emp_name = emp_name_fallback[0] if emp_name_fallback else "N/A"
+                                emp_name = employee_full_name or "N/A"
                             else:
                                 emp_name = emp_data[2]
                             
-                            # Get project name
-                            cursor.execute("SELECT name FROM project WHERE id = ?", (project_id,))
-                            project_data = cursor.fetchone()
-                            project_name_val = project_data[0] if project_data else "N/A"
-                            
-                            # Get technical unit name
-                            cursor.execute("SELECT name FROM technical_unit WHERE id = ?", (tech_unit_id,))
-                            tu_data = cursor.fetchone()
-                            tu_name_val = tu_data[0] if tu_data else "N/A"
-                            
-                            # Get activities name
-                            cursor.execute("""
-                                SELECT a.name FROM service s 
-                                LEFT JOIN activities a ON s.activities_id = a.id 
-                                WHERE s.id = ?
-                            """, (service_id,))
-                            activity_data = cursor.fetchone()
-                            activity_name_val = activity_data[0] if activity_data else "N/A"
+                            activity_name_val = activities.name_for(activities_id)
                             
                             # Prepare values with defaults
                             if emp_data:
@@ -899,9 +1615,7 @@ class ProjectBookingApp:
                                            0.00, 0.00, 0.00, 0.00, 0, 0, 0.00, 0.00, None)
                             
                             # Parse first_name and last_name from full name (FIXED VERSION 2025-08-08)
-                            cursor.execute("SELECT name FROM employee WHERE id = ?", (employee_id,))
-                            name_data = cursor.fetchone()
-                            full_name = name_data[0] if name_data and name_data[0] else ""
+                            full_name = employee_full_name or ""
                             
                             # Try to split the name into first and last names
                             if full_name and full_name.strip():
@@ -962,6 +1676,7 @@ class ProjectBookingApp:
                         messagebox.showinfo("Success", 
                             f"Added {bookings_added} booking record(s) for {employee_name} to project {project_name}!\n" +
                             "Unknown fields are set to NULL and can be edited by double-clicking cells.")
+                        self.refresh_overbookings([employee_id], warn=True)
                     else:
                         messagebox.showinfo("Info", 
                             f"All matching services for {employee_name} are already booked to project {project_name}.")
@@ -1032,9 +1747,7 @@ class ProjectBookingApp:
             
             # Fallback: get employee name from main employee table if extended doesn't have it
             if not emp_data or not emp_data[2]:
-                cursor.execute("SELECT name FROM employee WHERE id = ?", (employee_id,))
-                emp_name_fallback = cursor.fetchone()
-                emp_name = emp_name_fallback[0] if emp_name_fallback else "N/A"
+                emp_name = get_dimension_cache(self.db_path).get("employee").name_for(employee_id, "N/A")
             else:
                 emp_name = emp_data[2]
             
@@ -1368,35 +2081,21 @@ class ProjectBookingApp:
         elif db_column in fk_columns:
             # Dropdown for foreign key fields
             try:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # Get options based on the FK field
-                if fk_columns[db_column] == "employee":
-                    cursor.execute("SELECT name FROM employee ORDER BY name")
-                elif fk_columns[db_column] == "project":
-                    cursor.execute("SELECT name FROM project ORDER BY name")
-                elif fk_columns[db_column] == "technical_unit":
-                    cursor.execute("SELECT name FROM technical_unit ORDER BY name")
-                elif fk_columns[db_column] == "activities":
-                    cursor.execute("SELECT name FROM activities ORDER BY name")
-                elif fk_columns[db_column] == "status":
+                if fk_columns[db_column] == "status":
                     # Status options
                     options = ["Pending", "Approved", "Rejected", "In Progress", "Completed", "Cancelled"]
                     edit_widget = ctk.CTkComboBox(content_frame, values=options, width=350)
                     edit_widget.pack(pady=5, fill="x")
                     if current_value and current_value != "N/A":
                         edit_widget.set(current_value)
-                    conn.close()
-                    
-                if fk_columns[db_column] != "status":
-                    options = [row[0] for row in cursor.fetchall()]
+                else:
+                    # Options based on the FK field, from the shared dimension cache
+                    options = get_dimension_cache(self.db_path).get(fk_columns[db_column]).sorted_names()
                     options.insert(0, "")  # Add empty option
                     edit_widget = ctk.CTkComboBox(content_frame, values=options, width=350)
                     edit_widget.pack(pady=5, fill="x")
                     if current_value and current_value != "N/A":
                         edit_widget.set(current_value)
-                    conn.close()
                     
             except Exception as e:
                 # Fallback to regular entry if FK lookup fails
@@ -1585,6 +2284,10 @@ class ProjectBookingApp:
                 """, (employee_id, tech_unit_id, project_id, service_id))
                 
                 if not cursor.fetchone():
+                    # The period text decides the period dates; the service dates when it cannot be parsed
+                    period_dates = (parse_period(row_data["booking_period"])
+                                    or parse_period(row_data["booking_period_accepted"])
+                                    or (row_data["start_date"], row_data["end_date"]))
                     # Insert into project_bookings with 49 columns (excluding auto-increment id)
                     cursor.execute("""
                         INSERT INTO project_bookings (
@@ -1635,8 +2338,8 @@ class ProjectBookingApp:
                         row_data["employee_name"],
                         None,  # hub_id
                         None,  # department_id
-                        row_data["start_date"] if row_data["start_date"] != "N/A" else None,  # booking_period_from
-                        row_data["end_date"] if row_data["end_date"] != "N/A" else None  # booking_period_to
+                        period_dates[0] if period_dates[0] != "N/A" else None,  # booking_period_from
+                        period_dates[1] if period_dates[1] != "N/A" else None  # booking_period_to
                     ))
                     added_count += 1
             
@@ -1645,6 +2348,7 @@ class ProjectBookingApp:
             
             if added_count > 0:
                 messagebox.showinfo("Success", f"Added {added_count} records to project bookings!")
+                self.refresh_overbookings([employee_id], warn=True)
                 self.load_employee_data_grid()  # Refresh the main grid
                 popup.destroy()
             else:
@@ -1702,29 +2406,20 @@ class ProjectBookingApp:
         elif column_name in fk_columns:
             # Dropdown for FK fields
             try:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                if column_name == "Activity":
-                    cursor.execute("SELECT name FROM activities ORDER BY name")
-                elif column_name == "Title":
-                    cursor.execute("SELECT name FROM title ORDER BY name")
-                elif column_name == "Status":
-                    options = ["Pending", "Approved", "Rejected", "In Progress", "Completed", "Cancelled"]
+                if column_name == "Status":
+                    options = BOOKING_STATUS_OPTIONS
                     edit_widget = ctk.CTkComboBox(content_frame, values=options, width=350)
                     edit_widget.pack(pady=5, fill="x")
                     if current_value and current_value != "N/A":
                         edit_widget.set(current_value)
-                    conn.close()
-                    
-                if column_name != "Status":
-                    options = [row[0] for row in cursor.fetchall()]
+                else:
+                    table = "activities" if column_name == "Activity" else "title"
+                    options = get_dimension_cache(self.db_path).get(table).sorted_names()
                     options.insert(0, "")  # Add empty option
                     edit_widget = ctk.CTkComboBox(content_frame, values=options, width=350)
                     edit_widget.pack(pady=5, fill="x")
                     if current_value and current_value != "N/A":
                         edit_widget.set(current_value)
-                    conn.close()
                     
             except Exception as e:
                 # Fallback to regular entry
@@ -1922,6 +2617,7 @@ class ProjectBookingApp:
             
             if added_count > 0:
                 messagebox.showinfo("Success", f"Added {added_count} records to project bookings!")
+                self.refresh_overbookings([employee_id], warn=True)
                 self.load_employee_data_grid()  # Refresh the main grid
                 self.popup.destroy()
             else:
@@ -1941,21 +2637,16 @@ class ProjectBookingApp:
             employee_info = self.employee_map[selected]
             employee_id = employee_info["id"]
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get employee information from unified employee table
-            cursor.execute("SELECT name FROM employee WHERE id = ?", (employee_id,))
-            emp_data = cursor.fetchone()
+            # Get employee information from unified employee table (via the dimension cache)
+            emp_name = get_dimension_cache(self.db_path).get("employee").name_for(employee_id)
             
-            if emp_data:
-                details_text = f"Employee: {emp_data[0]}\nType: Unified Employee Table"
+            if emp_name:
+                details_text = f"Employee: {emp_name}\nType: Unified Employee Table"
             else:
                 details_text = "Employee details not found"
             
             if hasattr(self, 'employee_info_label'):
                 self.employee_info_label.configure(text=details_text, justify="left")
-            conn.close()
             
         except Exception as e:
             if hasattr(self, 'employee_info_label'):
@@ -2046,178 +2737,126 @@ class ProjectBookingApp:
             import traceback
             traceback.print_exc()
     
-    def load_employee_data_grid(self):
-        """Load complete project bookings data with foreign key lookups - similar to Fabsi service table"""
+    def load_employee_data_grid(self, on_loaded=None):
+        """Load complete project bookings data with foreign key lookups - similar to Fabsi service table
+        
+        The query runs on an I/O thread and row formatting in a worker process;
+        the grid is repainted on the Tk thread when both are done. A newer load
+        supersedes one still in flight.
+        """
+        if not hasattr(self, 'employee_tree'):
+            return
+        
+        # The reload brings every change - stop patching until it is in
+        self.executor.cancel("booking_changes")
+        self.change_poll_pending = False
+        self.change_seq = None
+        
+        def on_rows(fetched):
+            versions, seq, bookings_data, cached = fetched
+            
+            def on_formatted(result):
+                booking_cache.put(QueryResultCache.key("booking_grid", self.db_path, versions=versions), result)
+                self.booking_grid_result = result
+                self.booking_grid_versions = versions
+                self.resume_change_polling(seq)
+                self.booking_snapshot_dirty = True
+                self.populate_employee_data_grid(result, on_loaded)
+            
+            # Same data as a grid formatted before - skip the worker process
+            if cached is not None:
+                on_formatted(cached)
+                return
+            
+            self.executor.submit(
+                "booking_grid", format_booking_rows, bookings_data, cpu=True,
+                on_success=on_formatted,
+                on_error=self.on_employee_data_grid_error,
+                message="Formatting bookings..."
+            )
+        
+        self.executor.submit(
+            "booking_grid", fetch_project_bookings, self.db_path,
+            on_success=on_rows,
+            on_error=self.on_employee_data_grid_error,
+            message="Loading bookings..."
+        )
+    
+    def on_employee_data_grid_error(self, e):
+        """Report a failed background load of the bookings grid"""
+        messagebox.showerror("Error", f"Failed to load project booking data: {e}")
+        logging.error(f"Project booking data grid loading error: {e}")
+        traceback.print_exception(type(e), e, e.__traceback__)
+    
+    def populate_employee_data_grid(self, result, on_loaded=None):
+        """Fill the bookings grid from formatted rows (Tk thread)"""
         try:
+            display_rows, df = result
+            complete_columns = BOOKING_GRID_COLUMNS
+            
             # Clear existing items
-            if hasattr(self, 'employee_tree'):
-                for item in self.employee_tree.get_children():
-                    self.employee_tree.delete(item)
-                
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # Get all project bookings with all columns and foreign key lookups
-                cursor.execute("""
-                    SELECT 
-                        pb.id,
-                        pb.cost_center,
-                        COALESCE(e.ghrs_id, pb.ghrs_id, 'N/A') as ghrs_id,
-                        COALESCE(e.name, pb.employee_name, 'N/A') as employee_name,
-                        COALESCE(d.name, pb.dept_description, 'N/A') as department_name,
-                        COALESCE(h.name, 'N/A') as hub_name,
-                        pb.work_location,
-                        pb.business_unit,
-                        pb.tipo,
-                        pb.tipo_description,
-                        pb.sap_tipo,
-                        pb.saabu_rate_eur,
-                        pb.saabu_rate_usd,
-                        pb.local_agency_rate_usd,
-                        pb.unit_rate_usd,
-                        pb.monthly_hours,
-                        pb.annual_hours,
-                        pb.workload_2025_planned,
-                        pb.workload_2025_actual,
-                        pb.remark,
-                        COALESCE(pb.project_name, p.name, 'N/A') as project,
-                        pb.item,
-                        COALESCE(pb.technical_unit_name, tu.name, 'N/A') as technical_unit,
-                        COALESCE(pb.activities_name, a.name, 'N/A') as activities,
-                        pb.booking_period_from,
-                        pb.booking_period_to,
-                        pb.actual_hours,
-                        pb.hourly_rate,
-                        pb.total_cost,
-                        pb.booking_status,
-                        pb.booking_date,
-                        pb.start_date,
-                        pb.end_date 
-                    FROM project_bookings pb
-                    LEFT JOIN employee e ON pb.employee_id = e.id
-                    LEFT JOIN technical_unit tu ON pb.technical_unit_id = tu.id
-                    LEFT JOIN project p ON pb.project_id = p.id
-                    LEFT JOIN service s ON pb.service_id = s.id
-                    LEFT JOIN title t ON s.title_id = t.id
-                    LEFT JOIN activities a ON s.activities_id = a.id
-                    LEFT JOIN department d ON pb.department_id = d.id
-                    LEFT JOIN hub h ON pb.hub_id = h.id
-                    ORDER BY pb.id
-                """)
-                
-                bookings_data = cursor.fetchall()
-                
-                # Define complete columns for all project booking data (with Select checkbox)
-                complete_columns = (
-                    "Select", "ID", "Cost Center", "GHRS ID", "Employee Name", "Department",
-                    "Hub", "Work Location", "Business Unit", "Tipo", "Tipo Description", "SAP Tipo",
-                    "SAABU Rate (EUR)", "SAABU Rate (USD)", "Local Agency Rate (USD)", "Unit Rate (USD)",
-                    "Monthly Hours", "Annual Hours", "Workload 2025_Planned", "Workload 2025_Actual",
-                    "Remark", "Project", "Item", "Technical Unit", "Activities", 
-                    "Booking Period From", "Booking Period To",
-                    "Actual Hours", "Hourly Rate", "Total Cost", "Status",
-                    "Booking Date", "Start Date", "End Date"
-                )
-                
-                # Update treeview columns if needed
-                if hasattr(self, 'employee_tree'):
-                    # Clear existing columns and set new ones
-                    current_columns = self.employee_tree['columns']
-                    if current_columns != complete_columns:
-                        self.employee_tree.configure(columns=complete_columns)
-                        
-                        # Set column widths for complete view (with Select checkbox)
-                        column_widths = {
-                            "Select": 60, "ID": 50, "Cost Center": 100, "GHRS ID": 80, "Employee Name": 150,
-                            "Department": 150, "Hub": 150, "Work Location": 120, "Business Unit": 120, "Tipo": 80,
-                            "Tipo Description": 150, "SAP Tipo": 80, "SAABU Rate (EUR)": 100, "SAABU Rate (USD)": 100,
-                            "Local Agency Rate (USD)": 120, "Unit Rate (USD)": 100, "Monthly Hours": 100, "Annual Hours": 100,
-                            "Workload 2025_Planned": 120, "Workload 2025_Actual": 120, "Remark": 150, "Project": 150,
-                            "Item": 120, "Technical Unit": 120, "Activities": 150, 
-                            "Booking Period From": 120, "Booking Period To": 120,
-                            "Actual Hours": 80, "Hourly Rate": 80, "Total Cost": 100, "Status": 80,
-                            "Booking Date": 100, "Start Date": 100, "End Date": 100
-                        }
-                        
-                        for col in complete_columns:
-                            # Set basic column properties first
-                            width = column_widths.get(col, 100)
-                            anchor = 'w' if col in ["Employee Name", "Project", "Technical Unit", "Activities", 
-                                                  "Department", "Hub", "Work Location", "Business Unit", 
-                                                  "Tipo Description", "Remark"] else 'center'
-                            self.employee_tree.column(col, width=width, anchor=anchor, minwidth=70)
-                            
-                            # Set headers (filter arrows will be added later after DataFrame creation)
-                            self.employee_tree.heading(col, text=col)
+            for item in self.employee_tree.get_children():
+                self.employee_tree.delete(item)
+            
+            # Clear existing columns and set new ones
+            current_columns = self.employee_tree['columns']
+            if current_columns != complete_columns:
+                self.employee_tree.configure(columns=complete_columns)
                 
-                # Populate the grid with complete booking data (including checkbox)
-                formatted_data_list = []  # Store for DataFrame
-                for booking_data in bookings_data:
-                    # Format the data for display (handle None values)
-                    formatted_data = ["☐"]  # Start with unchecked checkbox
-                    formatted_row = {}  # For DataFrame
-                    
-                    for i, value in enumerate(booking_data):
-                        col_name = complete_columns[i + 1]  # +1 because we added Select column
-                        
-                        if value is None:
-                            display_value = "N/A"
-                            formatted_row[col_name] = ""
-                        elif i in [10, 11, 12, 13, 15, 16, 17, 18, 26, 27, 28, 29]:  # Decimal/money columns (rates, hours, costs)
-                            try:
-                                display_value = f"{float(value):.2f}" if value else "0.00"
-                                formatted_row[col_name] = float(value) if value else 0.0
-                            except (ValueError, TypeError):
-                                display_value = str(value) if value else "N/A"
-                                formatted_row[col_name] = str(value) if value else ""
-                        elif i in [14, 15]:  # Integer hours columns
-                            try:
-                                display_value = str(int(value)) if value else "0"
-                                formatted_row[col_name] = int(value) if value else 0
-                            except (ValueError, TypeError):
-                                display_value = str(value) if value else "N/A"
-                                formatted_row[col_name] = str(value) if value else ""
-                        elif i in [24, 25, 30, 31, 32]:  # Date columns (booking_period_from, booking_period_to, booking_date, start_date, end_date)
-                            display_value = str(value) if value else "N/A"
-                            formatted_row[col_name] = str(value) if value else ""
-                        else:
-                            display_value = str(value) if value else "N/A"
-                            formatted_row[col_name] = str(value) if value else ""
-                            
-                        formatted_data.append(display_value)
-                    
-                    # Add Select column to DataFrame
-                    formatted_row["Select"] = False
-                    formatted_data_list.append(formatted_row)
-                    
-                    self.employee_tree.insert("", "end", values=formatted_data)
+                # Set column widths for complete view (with Select checkbox)
+                column_widths = {
+                    "Select": 60, "ID": 50, "Cost Center": 100, "GHRS ID": 80, "Employee Name": 150,
+                    "Department": 150, "Hub": 150, "Work Location": 120, "Business Unit": 120, "Tipo": 80,
+                    "Tipo Description": 150, "SAP Tipo": 80, "SAABU Rate (EUR)": 100, "SAABU Rate (USD)": 100,
+                    "Local Agency Rate (USD)": 120, "Unit Rate (USD)": 100, "Monthly Hours": 100, "Annual Hours": 100,
+                    "Workload 2025_Planned": 120, "Workload 2025_Actual": 120, "Remark": 150, "Project": 150,
+                    "Item": 120, "Technical Unit": 120, "Activities": 150, 
+                    "Booking Period From": 120, "Booking Period To": 120,
+                    "Actual Hours": 80, "Hourly Rate": 80, "Total Cost": 100, "Status": 80,
+                    "Booking Date": 100, "Start Date": 100, "End Date": 100
+                }
                 
-                # Create DataFrame for filtering
-                if formatted_data_list:
-                    self.df = pd.DataFrame(formatted_data_list)
-                    # Store original data for filter reset
-                    self.original_df = self.df.copy()
+                for col in complete_columns:
+                    # Set basic column properties first (widths from the last session win)
+                    width = self.saved_column_widths.get(col, column_widths.get(col, 100))
+                    anchor = 'w' if col in ["Employee Name", "Project", "Technical Unit", "Activities", 
+                                          "Department", "Hub", "Work Location", "Business Unit", 
+                                          "Tipo Description", "Remark"] else 'center'
+                    self.employee_tree.column(col, width=width, anchor=anchor, minwidth=70)
                     
-                    # Update column headers with filter arrows (like Fabsi app)
-                    from functools import partial
-                    for col in complete_columns:
-                        if col not in ["Select", "ID"]:
-                            header_text = f"{col} ▼"
-                            self.employee_tree.heading(col, text=header_text, 
-                                                     command=partial(self.show_filter_menu, col))
-                else:
-                    self.df = pd.DataFrame()
-                    self.original_df = pd.DataFrame()
-                
-                conn.close()
+                    # Set headers (filter arrows will be added later after DataFrame creation)
+                    self.employee_tree.heading(col, text=col)
+            
+            # Populate the grid with complete booking data (including checkbox)
+            for formatted_data in display_rows:
+                self.employee_tree.insert("", "end", values=formatted_data)
+            self.flag_overbooked_rows()
+            
+            # Create DataFrame for filtering
+            if not df.empty:
+                self.df = df
+                # Store original data for filter reset
+                self.original_df = self.df.copy()
                 
-                print(f"Loaded {len(bookings_data)} project booking records with full details")
+                # Update column headers with filter arrows (like Fabsi app)
+                from functools import partial
+                for col in complete_columns:
+                    if col not in ["Select", "ID"]:
+                        header_text = f"{col} ▼"
+                        self.employee_tree.heading(col, text=header_text, 
+                                                 command=partial(self.show_filter_menu, col))
+            else:
+                self.df = pd.DataFrame()
+                self.original_df = pd.DataFrame()
+            
+            print(f"Loaded {len(display_rows)} project booking records with full details")
+            mark_startup("data_ready")
+            
+            if on_loaded:
+                on_loaded()
                 
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to load project booking data: {e}")
-            logging.error(f"Project booking data grid loading error: {e}")
-            import traceback
-            traceback.print_exc()
+            self.on_employee_data_grid_error(e)
     
     def delete_employee_record(self):
         """Delete selected project booking record"""
@@ -2522,6 +3161,7 @@ class ProjectBookingApp:
                         values.append("N/A")
                 
                 self.employee_tree.insert("", "end", values=values)
+            self.flag_overbooked_rows()
                 
         except Exception as e:
             logging.error(f"Refresh display error: {e}")
@@ -2569,6 +3209,7 @@ class ProjectBookingApp:
                 row_id = str(row.get('id', ''))
                 if row_id in preserved_selections:
                     self.selected_rows.add(item)
+            self.flag_overbooked_rows()
                     
         except Exception as e:
             logging.error(f"Refresh display with selections error: {e}")
@@ -2619,7 +3260,7 @@ class ProjectBookingApp:
                     pb.booking_status,
                     pb.booking_date,
                     pb.start_date,
-                    pb.end_date FROM project_bookings pb
+                    pb.end_date FROM project_bookings_full pb
                 LEFT JOIN employee e ON pb.employee_id = e.id
                 LEFT JOIN technical_unit tu ON pb.technical_unit_id = tu.id
                 LEFT JOIN project p ON pb.project_id = p.id
@@ -2707,60 +3348,6 @@ class ProjectBookingApp:
             if col_idx >= len(current_values):
                 return
                 
-            # Get the actual column names from the data query to map to database fields
-            complete_columns = (
-                "Select", "ID", "Cost Center", "GHRS ID", "Employee Name", "Dept. Description",
-                "Work Location", "Business Unit", "Tipo", "Tipo Description", "SAP Tipo",
-                "SAABU Rate (EUR)", "SAABU Rate (USD)", "Local Agency Rate (USD)", "Unit Rate (USD)",
-                "Monthly Hours", "Annual Hours", "Workload 2025_Planned", "Workload 2025_Actual",
-                "Remark", "Project", "Item", "Technical Unit", "Activities", "Booking Hours",
-                "Booking Cost (Forecast)", "Booking Period", "Booking hours (Accepted by Project)",
-                "Booking Period (Accepted by Project)", "Booking hours (Extra)",
-                "Actual Hours", "Hourly Rate", "Total Cost", "Status",
-                "Booking Date", "Start Date", "End Date"
-            )
-            
-            # Map display columns to database column names (adjusted for checkbox)
-            db_column_map = {
-                0: None,  # Select checkbox - not editable
-                1: None,  # ID - not editable
-                2: "cost_center",
-                3: "ghrs_id", 
-                4: "employee_name",
-                5: "dept_description",
-                6: "work_location",
-                7: "business_unit",
-                8: "tipo",
-                9: "tipo_description", 
-                10: "sap_tipo",
-                11: "saabu_rate_eur",
-                12: "saabu_rate_usd",
-                13: "local_agency_rate_usd",
-                14: "unit_rate_usd",
-                15: "monthly_hours",
-                16: "annual_hours",
-                17: "workload_2025_planned",
-                18: "workload_2025_actual",
-                19: "remark",
-                20: "project_name",
-                21: "item",
-                22: "technical_unit_name",
-                23: "activities_name",
-                24: "booking_hours",
-                25: "booking_cost_forecast",
-                26: "booking_period",
-                27: "booking_hours_accepted",
-                28: "booking_period_accepted", 
-                29: "booking_hours_extra",
-                30: "actual_hours",
-                31: "hourly_rate",
-                32: "total_cost",
-                33: "booking_status",
-                34: "booking_date",
-                35: "start_date",
-                36: "end_date"
-            }
-            
             # Check if column is editable
             if col_idx in [0, 1]:  # Select checkbox and ID column
                 if col_idx == 0:
@@ -2769,12 +3356,11 @@ class ProjectBookingApp:
                     messagebox.showinfo("Info", "Booking ID cannot be edited")
                 return
                 
-            db_column = db_column_map.get(col_idx)
-            if not db_column:
+            column_name = BOOKING_GRID_COLUMNS[col_idx]
+            if column_name not in BOOKING_EDIT_COLUMNS:
                 messagebox.showinfo("Info", "This column cannot be edited")
                 return
-            
-            column_name = complete_columns[col_idx]
+            db_column = BOOKING_EDIT_COLUMNS[column_name][0]
             current_value = current_values[col_idx] if col_idx < len(current_values) else ""
             
             # Remove "N/A" or format current value for editing
@@ -2793,9 +3379,6 @@ class ProjectBookingApp:
         item_values = self.employee_tree.item(tree_item)['values']
         booking_id = item_values[1]  # ID is now in position 1
         
-        # Store current row values for updating the display
-        current_row_values = list(item_values)
-        
         # Create compact edit dialog
         edit_dialog = ctk.CTkToplevel(self.root)
         edit_dialog.title(f"Edit {column_name}")
@@ -2847,35 +3430,21 @@ class ProjectBookingApp:
         elif db_column in fk_columns:
             # Dropdown for foreign key fields
             try:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # Get options based on the FK field
-                if fk_columns[db_column] == "employee":
-                    cursor.execute("SELECT name FROM employee ORDER BY name")
-                elif fk_columns[db_column] == "project":
-                    cursor.execute("SELECT name FROM project ORDER BY name")
-                elif fk_columns[db_column] == "technical_unit":
-                    cursor.execute("SELECT name FROM technical_unit ORDER BY name")
-                elif fk_columns[db_column] == "activities":
-                    cursor.execute("SELECT name FROM activities ORDER BY name")
-                elif fk_columns[db_column] == "status":
+                if fk_columns[db_column] == "status":
                     # Status options
                     options = ["Pending", "Approved", "Rejected", "In Progress", "Completed", "Cancelled"]
                     edit_widget = ctk.CTkComboBox(content_frame, values=options, width=350)
                     edit_widget.pack(pady=5, fill="x")
                     if current_value and current_value != "N/A":
                         edit_widget.set(current_value)
-                    conn.close()
-                    
-                if fk_columns[db_column] != "status":
-                    options = [row[0] for row in cursor.fetchall()]
+                else:
+                    # Options based on the FK field, from the shared dimension cache
+                    options = get_dimension_cache(self.db_path).get(fk_columns[db_column]).sorted_names()
                     options.insert(0, "")  # Add empty option
                     edit_widget = ctk.CTkComboBox(content_frame, values=options, width=350)
                     edit_widget.pack(pady=5, fill="x")
                     if current_value and current_value != "N/A":
                         edit_widget.set(current_value)
-                    conn.close()
                     
             except Exception as e:
                 # Fallback to regular entry if FK lookup fails
@@ -2939,48 +3508,24 @@ class ProjectBookingApp:
                         messagebox.showerror("Error", "Please enter date in YYYY-MM-DD format")
                         return
                 
-                # Update database
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # Handle empty values
-                if new_value == "":
-                    new_value = None
-                
-                # Update the specific column
-                cursor.execute(f"UPDATE project_bookings SET {db_column} = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?", 
-                              (new_value, booking_id))
-                
-                # Special handling for calculated fields
-                if db_column in ["hourly_rate"]:
-                    # Recalculate total_cost if hours or rate changed
-                    cursor.execute("SELECT hourly_rate FROM project_bookings WHERE id = ?", (booking_id,))
-                    hours_rate = cursor.fetchone()
-                    if hours_rate and hours_rate[0] and hours_rate[1]:
-                        total_cost = float(hours_rate[0]) * float(hours_rate[1])
-                        cursor.execute("UPDATE project_bookings SET total_cost = ? WHERE id = ?", (total_cost, booking_id))
-                
-                conn.commit()
-                conn.close()
-                
-                # Update the stored row values
-                current_rtestow_values[col_idx] = new_value if new_value is not None else "N/A"
-                
-                # Format display value
-                if db_column in numeric_columns and new_value:
-                    current_row_values[col_idx] = f"{float(new_value):.2f}"
-                elif db_column in integer_columns and new_value:
-                    current_row_values[col_idx] = str(int(new_value))
+                # Typed value for the filter data and the display value
+                if not new_value:
+                    value, display_value = "", "N/A"
+                elif db_column in numeric_columns:
+                    value = float(new_value)
+                    display_value = f"{value:.2f}"
+                elif db_column in integer_columns:
+                    value = int(new_value)
+                    display_value = str(value)
+                else:
+                    value = display_value = new_value
                 
-                # Find the item by booking_id and update it (ID is now in position 1)
-                for item in self.employee_tree.get_children():
-                    values = self.employee_tree.item(item)['values']
-                    if values and len(values) > 1 and values[1] == booking_id:
-                        self.employee_tree.item(item, values=current_row_values)
-                        break
+                # The edit session commits it together with other edits; derived fields follow in the same batch
+                original = self.booking_value(booking_id, column_name)
+                self.booking_edits.record(int(booking_id), column_name, new_value, original)
+                self.set_booking_value(booking_id, column_name, value, display_value)
                 
                 edit_dialog.destroy()
-                messagebox.showinfo("Success", f"{column_name} updated successfully!")
                 
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to update {column_name}: {e}")
@@ -3005,6 +3550,255 @@ class ProjectBookingApp:
         edit_dialog.bind('<Return>', lambda e: save_change())
         edit_dialog.bind('<Escape>', lambda e: cancel_edit())
 
+    def booking_item(self, booking_id):
+        """Grid item showing a booking, or None - via the id -> item index, rebuilt only after re-renders"""
+        booking_id = str(booking_id)
+        tree = self.employee_tree
+        item = self.booking_items.get(booking_id)
+        if item is not None and tree.exists(item) and tree.set(item, "ID") == booking_id:
+            return item
+        self.booking_items = {tree.set(child, "ID"): child for child in tree.get_children()}
+        return self.booking_items.get(booking_id)
+    
+    def booking_value(self, booking_id, column):
+        """Value of a booking's cell as stored when loaded (unformatted), for conflict detection"""
+        if column in BOOKING_STORED_COLUMNS:
+            column = stored_column(column)
+        if self.original_df.empty or column not in self.original_df.columns:
+            return None
+        values = self.original_df.loc[self.original_df["ID"] == str(booking_id), column]
+        return values.iloc[0] if len(values) else None
+    
+    def set_booking_value(self, booking_id, column, value, display_value):
+        """Show an edited value in the grid and in the filter data"""
+        item = self.booking_item(booking_id)
+        if item is not None:
+            self.employee_tree.set(item, column, display_value)
+        columns = (column, stored_column(column)) if column in BOOKING_STORED_COLUMNS else (column,)
+        for df in (self.df, self.original_df):
+            for df_column in columns:
+                if not df.empty and df_column in df.columns:
+                    df.loc[df["ID"] == str(booking_id), df_column] = value
+    
+    def on_pending_edits_change(self, pending, saving):
+        """Show how many grid edits are not committed yet"""
+        if not hasattr(self, 'pending_edits_label'):
+            return
+        total = pending + saving
+        if not total:
+            text = ""
+        elif saving:
+            text = f"✎ Saving {total} edit{'s' if total != 1 else ''}..."
+        else:
+            text = f"✎ {total} unsaved edit{'s' if total != 1 else ''} (Ctrl+S saves now)"
+        self.pending_edits_label.configure(text=text)
+    
+    def on_booking_edits_flushed(self, saved, conflicts, invalid):
+        """Report edits that were not applied; the change log then brings the stored rows (and derived fields) in"""
+        if saved:
+            print(f"Committed {len(saved)} booking edits in one transaction")
+        if conflicts or invalid:
+            lines = [f"- Booking {booking_id}, {column}: changed by someone else" for booking_id, column in conflicts]
+            lines += [f"- Booking {booking_id}, {column}: {message}"
+                      for (booking_id, column), message in invalid.items()]
+            messagebox.showwarning("Edits not saved", f"{len(lines)} edits were not saved:\n\n"
+                                   + "\n".join(lines[:15]) + ("\n..." if len(lines) > 15 else ""))
+            # Show the stored values of those rows again
+            self.change_poll_again = True
+        if self.change_poll_again and not self.booking_edits.busy:
+            self.poll_booking_changes()
+    
+    def on_booking_edits_failed(self, e):
+        """Committing kept failing - the edits stay queued"""
+        messagebox.showerror("Error", f"{len(self.booking_edits)} edits could not be saved yet: {e}\n\n"
+                                      "They are kept and saved again with the next edit, Ctrl+S or when closing.")
+    
+    def remember_paste_column(self, event):
+        """Keep the clicked column as the left edge for the next paste"""
+        column = self.employee_tree.identify_column(event.x)
+        if column.startswith('#') and column[1:].isdigit():
+            columns = self.employee_tree['columns']
+            col_idx = int(column[1:]) - 1
+            if 0 <= col_idx < len(columns):
+                self.paste_anchor_column = columns[col_idx]
+    
+    def paste_into_grid(self, event=None):
+        """Paste a TSV block from the clipboard (e.g. copied in Excel) into the grid as one batch of edits
+        
+        The block starts at the first selected row and the last clicked column;
+        a single value is pasted into every selected row.
+        """
+        started = time.perf_counter()
+        try:
+            block = parse_block(self.root.clipboard_get())
+        except tk.TclError:
+            return "break"
+        tree = self.employee_tree
+        selection = tree.selection()
+        if not block or not selection or self.paste_anchor_column not in BOOKING_EDIT_COLUMNS:
+            messagebox.showinfo("Paste", "Click a cell of an editable column to paste at, then press Ctrl+V.")
+            return "break"
+        
+        items = tree.get_children()
+        if len(block) == 1 and len(block[0]) == 1:
+            target_items = [item for item in items if item in set(selection)]
+        else:
+            target_items = items[items.index(selection[0]):]
+        booking_ids = [tree.set(item, "ID") for item in target_items]
+        columns = list(tree['columns'])
+        target_columns = columns[columns.index(self.paste_anchor_column):]
+        cells, errors, skipped = plan_paste(block, booking_ids, target_columns, BOOKING_EDIT_COLUMNS, self.db_path)
+        
+        # One batch of edits, with the stored values as loaded for conflict detection
+        loaded = self.original_df.set_index("ID") if not self.original_df.empty else pd.DataFrame()
+        edits = {}
+        patches = {}  # booking id -> {column: display value}
+        for column, (ids, typed, display) in cells.items():
+            kind = BOOKING_EDIT_COLUMNS[column][1]
+            df_columns = (column, stored_column(column)) if column in BOOKING_STORED_COLUMNS else (column,)
+            originals = loaded[df_columns[-1]].reindex(ids).tolist() if df_columns[-1] in loaded.columns \
+                else [None] * len(ids)
+            for booking_id, value, shown, original in zip(ids, typed, display, originals):
+                edits[(int(booking_id), column)] = (value, original)
+                if value is None:
+                    shown = "N/A"
+                elif kind == NUMBER:
+                    shown = f"{value:.2f}"
+                elif kind == INTEGER:
+                    shown = str(int(value))
+                patches.setdefault(booking_id, {})[column] = shown
+            
+            # Filter data, one vectorized update per column
+            new_values = dict(zip(ids, ("" if v is None else v for v in typed)))
+            for df in (self.df, self.original_df):
+                for df_column in df_columns:
+                    if not df.empty and df_column in df.columns:
+                        mask = df["ID"].isin(new_values)
+                        df.loc[mask, df_column] = df.loc[mask, "ID"].map(new_values)
+        
+        # One update per grid row
+        positions = {column: i for i, column in enumerate(columns)}
+        for booking_id, changes in patches.items():
+            item = self.booking_item(booking_id)
+            if item is None:
+                continue
+            values = list(tree.item(item, 'values'))
+            for column, shown in changes.items():
+                values[positions[column]] = shown
+            tree.item(item, values=values)
+        
+        if edits:
+            self.booking_edits.record_many(edits)
+        print(f"Pasted {len(edits)} cells in {time.perf_counter() - started:.2f}s")
+        if errors or skipped:
+            message = f"Pasted {len(edits)} cells."
+            if errors:
+                message += f"\n\n{len(errors)} cells were not pasted (wrong type or unknown name):\n{describe_errors(errors)}"
+            if skipped:
+                message += f"\n\n{skipped} cells fell outside the grid or on read-only columns."
+            messagebox.showwarning("Paste", message)
+        return "break"
+    
+    def open_bulk_edit_dialog(self):
+        """Set Status, Hub, Department or Progress for the selected rows or for every row of the filtered view"""
+        selected_ids = [self.employee_tree.set(item, "ID") for item in self.selected_rows
+                        if self.employee_tree.exists(item)]
+        filtered_ids = [] if self.df.empty else self.df["ID"].astype(str).tolist()
+        if not filtered_ids:
+            messagebox.showwarning("Warning", "There are no bookings to edit")
+            return
+        
+        dialog = ctk.CTkToplevel(self.root)
+        dialog.title("Bulk Edit")
+        dialog.geometry("420x300")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        ctk.CTkLabel(dialog, text="Set one column for many bookings",
+                     font=ctk.CTkFont(size=14, weight="bold")).pack(pady=(15, 10))
+        
+        def options_for(column):
+            kind = BULK_EDIT_COLUMNS[column][2]
+            if kind is None:
+                return BOOKING_STATUS_OPTIONS
+            return [""] + get_dimension_cache(self.db_path).get(kind).sorted_names()
+        
+        value_box = ctk.CTkComboBox(dialog, values=options_for("Status"), width=350)
+        
+        def on_column_change(column):
+            value_box.configure(values=options_for(column))
+            value_box.set("")
+        
+        column_box = ctk.CTkComboBox(dialog, values=list(BULK_EDIT_COLUMNS), width=350, state="readonly",
+                                     command=on_column_change)
+        column_box.set("Status")
+        ctk.CTkLabel(dialog, text="Column:").pack(anchor="w", padx=35)
+        column_box.pack(pady=(0, 8))
+        ctk.CTkLabel(dialog, text="New value (empty clears it):").pack(anchor="w", padx=35)
+        value_box.set("")
+        value_box.pack(pady=(0, 8))
+        
+        scope = tk.StringVar(value="selected" if selected_ids else "filtered")
+        selected_radio = ctk.CTkRadioButton(dialog, text=f"Selected rows ({len(selected_ids)})",
+                                            variable=scope, value="selected")
+        selected_radio.pack(anchor="w", padx=35, pady=2)
+        if not selected_ids:
+            selected_radio.configure(state="disabled")
+        ctk.CTkRadioButton(dialog, text=f"All rows of the current view ({len(filtered_ids)})",
+                           variable=scope, value="filtered").pack(anchor="w", padx=35, pady=2)
+        
+        def apply():
+            column, value = column_box.get(), value_box.get().strip()
+            booking_ids = selected_ids if scope.get() == "selected" else filtered_ids
+            if not messagebox.askyesno("Bulk Edit", f"Set {column} to '{value or '(empty)'}' "
+                                                    f"for {len(booking_ids)} bookings?", parent=dialog):
+                return
+            dialog.destroy()
+            self.bulk_update(column, value, booking_ids)
+        
+        button_frame = ctk.CTkFrame(dialog, fg_color="transparent")
+        button_frame.pack(pady=15)
+        ctk.CTkButton(button_frame, text="Apply", command=apply, width=100,
+                      fg_color="#003d52", hover_color="#255c7b").pack(side="left", padx=10)
+        ctk.CTkButton(button_frame, text="Cancel", command=dialog.destroy, width=100).pack(side="left", padx=10)
+    
+    def bulk_update(self, column, value, booking_ids):
+        """Write one value to many bookings in the background, then patch their grid cells in one pass"""
+        started = time.perf_counter()
+        # Queued inline edits go first; the bulk value then wins
+        self.booking_edits.flush()
+        
+        def on_done(updated):
+            print(f"Bulk edit of {column} on {len(booking_ids)} bookings took {time.perf_counter() - started:.2f}s")
+            if column in self.employee_tree['columns']:
+                kind = BULK_EDIT_COLUMNS[column][2]
+                display = value if kind is None else get_dimension_cache(self.db_path).get(kind).name_for(
+                    to_db_value(self.db_path, kind, value))
+                display = display or "N/A"
+                targets = {str(booking_id) for booking_id in booking_ids}
+                for booking_id in targets:
+                    item = self.booking_item(booking_id)
+                    if item is not None:
+                        self.employee_tree.set(item, column, display)
+                for df in (self.df, self.original_df):
+                    if not df.empty and column in df.columns:
+                        df.loc[df["ID"].astype(str).isin(targets), column] = display
+            noun = "services" if BULK_EDIT_COLUMNS[column][0] == "service" else "bookings"
+            messagebox.showinfo("Success", f"{column} updated for {updated} {noun}")
+        
+        def on_error(e):
+            messagebox.showerror("Error", f"Bulk edit failed: {e}")
+        
+        self.executor.submit(
+            "bulk_update", bulk_update_bookings, self.db_path, column, value, list(booking_ids),
+            on_success=on_done, on_error=on_error, message=f"Updating {column} for {len(booking_ids)} bookings..."
+        )
+    
+    def cancel_background_work(self):
+        """Cancel loads and exports - edits being saved are queued again, never dropped"""
+        self.executor.cancel_all()
+        self.booking_edits.flush()
+    
     def on_keyboard_edit(self, event):
         """Handle F2 key press for editing like Excel"""
         try:
@@ -3257,7 +4051,6 @@ Department: {emp_data[4] or 'N/A'}
                 
                 hours = float(hours_entry.get() or 0)
                 rate = float(rate_entry.get() or 0)
-                total_cost = hours * rate
                 
                 # Get selected project and technical unit IDs from mappings
                 project_id = None
@@ -3286,29 +4079,19 @@ Department: {emp_data[4] or 'N/A'}
                     emp_data = cursor.fetchone()
                     
                     # Fallback: get employee name from main employee table if extended doesn't have it
+                    dimensions = get_dimension_cache(self.db_path)
                     if not emp_data or not emp_data[2]:
-                        cursor.execute("SELECT name FROM employee WHERE id = ?", (employee_id,))
-                        emp_name_fallback = cursor.fetchone()
-                        emp_name = emp_name_fallback[0] if emp_name_fallback else "N/A"
+                        emp_name = dimensions.get("employee").name_for(employee_id, "N/A")
                     else:
                         emp_name = emp_data[2]
                     
-                    # Get project, technical unit, and activity names
-                    cursor.execute("SELECT name FROM project WHERE id = ?", (project_id,))
-                    project_data = cursor.fetchone()
-                    project_name_val = project_data[0] if project_data else "N/A"
+                    # Project, technical unit, and activity names
+                    project_name_val = dimensions.get("project").name_for(project_id, "N/A")
+                    tu_name_val = dimensions.get("technical_unit").name_for(tech_unit_id, "N/A")
                     
-                    cursor.execute("SELECT name FROM technical_unit WHERE id = ?", (tech_unit_id,))
-                    tu_data = cursor.fetchone()
-                    tu_name_val = tu_data[0] if tu_data else "N/A"
-                    
-                    cursor.execute("""
-                        SELECT a.name FROM service s 
-                        LEFT JOIN activities a ON s.activities_id = a.id 
-                        WHERE s.id = ?
-                    """, (service_id,))
+                    cursor.execute("SELECT activities_id FROM service WHERE id = ?", (service_id,))
                     activity_data = cursor.fetchone()
-                    activity_name_val = activity_data[0] if activity_data else "N/A"
+                    activity_name_val = dimensions.get("activities").name_for(activity_data[0]) if activity_data else "N/A"
                     
                     # Prepare values with defaults
                     if emp_data:
@@ -3326,6 +4109,12 @@ Department: {emp_data[4] or 'N/A'}
                          remark) = (None, None, None, None, None, None, None, None,
                                    0.00, 0.00, 0.00, 0.00, 0, 0, 0.00, 0.00, None)
                     
+                    # The dialog plans the booking: its hours and rate are priced as the forecast
+                    # (booking_cost_forecast); actual hours and costs stay empty until work is reported
+                    planned_hours = hours or estimated_internal_hours
+                    if rate:
+                        unit_rate_usd = rate
+                    
                     cursor.execute("""
                         INSERT INTO project_bookings 
                         (employee_id, technical_unit_id, project_id, service_id, 
@@ -3353,7 +4142,7 @@ Department: {emp_data[4] or 'N/A'}
                           saabu_rate_eur, saabu_rate_usd, local_agency_rate_usd, unit_rate_usd,
                           monthly_hours, annual_hours, workload_2025_planned, workload_2025_actual,
                           remark, project_name_val, tu_name_val, activity_name_val,
-                          estimated_internal_hours, estimated_internal_hours, estimated_external_hours))
+                          planned_hours, estimated_internal_hours, estimated_external_hours))
                 
                 conn.commit()
                 conn.close()
@@ -3484,8 +4273,9 @@ Department: {emp_data[4] or 'N/A'}
     def export_report(self):
         """Export booking report to Excel with proper formatting like Fabsi app"""
         try:
-            # Check if there's data to export
-            if not hasattr(self, 'employee_tree') or not self.employee_tree.get_children():
+            # Export straight from the data model behind the grid (current filters applied)
+            df = self.df
+            if not hasattr(self, 'employee_tree') or df.empty:
                 messagebox.showwarning("Warning", "No data to export")
                 return
             
@@ -3498,86 +4288,289 @@ Department: {emp_data[4] or 'N/A'}
             if not file_path:
                 return
             
-            # Get data from the current table view
-            all_data = []
-            columns = []
-            
-            # Get column headers
-            if hasattr(self, 'employee_tree'):
-                columns = list(self.employee_tree['columns'])
-                
-                # Get all rows from the tree
-                for item in self.employee_tree.get_children():
-                    values = self.employee_tree.item(item)['values']
-                    all_data.append(values)
-            
-            if not all_data:
-                messagebox.showwarning("Warning", "No data to export")
-                return
-            
-            # Create DataFrame
-            df = pd.DataFrame(all_data, columns=columns)
-            
-            # Remove the Select checkbox column from export
-            if 'Select' in df.columns:
-                df = df.drop('Select', axis=1)
-            
-            # Create Excel file with formatting
-            with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-                df.to_excel(writer, index=False, sheet_name='Project Bookings')
-                ws = writer.sheets['Project Bookings']
-                
-                # Apply formatting similar to Fabsi app
-                from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
-                
-                border = Border(left=Side(style='thin'), right=Side(style='thin'),
-                               top=Side(style='thin'), bottom=Side(style='thin'))
-                header_fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
-                
-                # Format header row
-                for cell in ws[1]:
-                    cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-                    cell.fill = header_fill
-                    cell.border = border
-                    cell.font = Font(bold=True)
-                
-                # Format data cells and auto-size columns
-                for col in ws.columns:
-                    max_length = max((len(str(cell.value)) for cell in col if cell.value), default=10)
-                    col_letter = col[0].column_letter
-                    ws.column_dimensions[col_letter].width = min(max_length + 2, 25)
-                    
-                    for cell in col:
-                        cell.alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)
-                        cell.border = border
-                
-                # Add auto-filter
-                ws.auto_filter.ref = ws.dimensions
-                ws.row_dimensions[1].height = 48
+            # Grid column order, without the Select checkbox column
+            columns = [col for col in self.employee_tree['columns'] if col != 'Select' and col in df.columns]
             
-            # Open the file automatically
-            import subprocess
-            subprocess.Popen(['start', '', file_path], shell=True)
-            messagebox.showinfo("Success", f"Report exported to:\n{file_path}")
+            # Stream the workbook in the background - progress and cancel via the busy indicator
+            self.executor.submit(
+                "export_report", export_bookings_to_excel, file_path, df, columns, pass_task=True,
+                on_success=self.on_report_exported,
+                on_error=self.on_report_export_error,
+                message="Exporting report..."
+            )
             
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to export report: {e}")
-            logging.error(f"Export error: {e}")
-            import traceback
-            traceback.print_exc()
+            self.on_report_export_error(e)
+    
+    def on_report_exported(self, file_path):
+        """Open the exported report once the background export finished"""
+        # Open the file automatically
+        subprocess.Popen(['start', '', file_path], shell=True)
+        messagebox.showinfo("Success", f"Report exported to:\n{file_path}")
+    
+    def on_report_export_error(self, e):
+        """Report a failed export"""
+        messagebox.showerror("Error", f"Failed to export report: {e}")
+        logging.error(f"Export error: {e}")
+        traceback.print_exception(type(e), e, e.__traceback__)
+    
+    def export_raw_data(self):
+        """Export all project bookings as CSV, JSON lines or a columnar file for analytics"""
+        from data_export import export_data, export_filetypes, format_for_path
+        
+        file_path = filedialog.asksaveasfilename(
+            title="Export raw booking data",
+            defaultextension=".csv",
+            filetypes=export_filetypes()
+        )
+        if not file_path:
+            return
+        
+        fmt = format_for_path(file_path)
+        if fmt is None:
+            messagebox.showerror("Error", "Unsupported file type - use .csv, .ndjson, .parquet or .npz")
+            return
+        
+        def run_export(task):
+            return export_data(self.db_path, "bookings", fmt, file_path,
+                               progress=task.report_progress, check_cancelled=task.check_cancelled)
+        
+        self.executor.submit(
+            "export_raw_data", run_export, pass_task=True,
+            on_success=lambda rows: messagebox.showinfo("Success", f"Exported {rows} bookings to:\n{file_path}"),
+            on_error=self.on_report_export_error,
+            message="Exporting raw data..."
+        )
     
     def schedule_auto_refresh(self):
-        """Schedule automatic refresh of employee data grid"""
+        """Start watching the database - booking changes from any process are patched in within a second"""
+        self.db_watcher.start()
+        # Employee changes made while the app was closed
+        self.on_employee_attributes_changed(("employee_extended",), None)
+        self.refresh_overbookings()
+    
+    def on_booking_tables_changed(self, tables, versions):
+        """Watcher callback: pull the changed bookings in if auto-refresh is on"""
         if self.auto_refresh_enabled:
-            try:
-                # FIXED: Use smart refresh that preserves filters and selections
-                self.smart_refresh_with_preservation()
-                # Schedule next refresh in 30 seconds (30000 milliseconds)
-                self.root.after(30000, self.schedule_auto_refresh)
-            except Exception as e:
-                logging.error(f"Auto-refresh error: {e}")
-                # Continue scheduling even if refresh fails
-                self.root.after(30000, self.schedule_auto_refresh)
+            self.poll_booking_changes()
+    
+    def on_selection_tables_changed(self, tables, versions):
+        """Watcher callback: services or employees changed elsewhere - refresh the dropdowns and the services panel"""
+        self.load_data_indexes()
+        if "service" in tables and self.selected_employee.get():
+            self.load_employee_services()
+    
+    def on_dimension_tables_changed(self, tables, versions):
+        """Watcher callback: drop the cached lookup tables that changed"""
+        dimensions = get_dimension_cache(self.db_path)
+        for table in tables:
+            dimensions.invalidate(table)
+    
+    def on_employee_attributes_changed(self, tables, versions):
+        """Watcher callback: copy changed employee rates and attributes into their bookings in the background
+        
+        The updated bookings reach the grid through the change log like any other change.
+        """
+        def on_done(report):
+            if report["changes"]:
+                logging.info("Employee attributes propagated: " + format_report(report, limit=20))
+        
+        self.executor.submit(
+            "rate_propagation", propagate_employee_attributes, self.db_path,
+            on_success=on_done,
+            on_error=lambda e: logging.error(f"Employee attribute propagation failed: {e}"),
+            message="Updating bookings from employee data..."
+        )
+    
+    def on_booking_periods_changed(self, tables, versions):
+        """Watcher callback: parse the period text of bookings that have no period dates yet, in the background
+        
+        Editing a period text clears its dates (a trigger), so every writer ends up here.
+        """
+        self.executor.submit(
+            "booking_periods", sync_booking_periods, self.db_path,
+            on_error=lambda e: logging.error(f"Booking period parsing failed: {e}")
+        )
+    
+    def on_booking_allocation_changed(self, tables, versions):
+        """Watcher callback: re-spread the hours of changed bookings over their months in the background"""
+        self.executor.submit(
+            "booking_allocation", sync_booking_allocation, self.db_path,
+            on_error=lambda e: logging.error(f"Booking allocation update failed: {e}")
+        )
+    
+    def on_cost_cube_changed(self, tables, versions):
+        """Watcher callback: bring the hours and cost cube up to date with the changed bookings in the background"""
+        self.executor.submit(
+            "cost_cube", sync_cost_cube, self.db_path,
+            on_error=lambda e: logging.error(f"Cost cube update failed: {e}")
+        )
+    
+    def on_overbooking_inputs_changed(self, tables, versions):
+        """Watcher callback: bookings or capacities changed - re-run the overbooking check"""
+        self.refresh_overbookings()
+    
+    def refresh_overbookings(self, employee_ids=None, warn=False):
+        """Check all employees (or only employee_ids) for overbookings in the background and flag them in the grid
+        
+        With warn, conflicts found are also reported in a message box.
+        """
+        key = "overbooking" if employee_ids is None else f"overbooking_{sorted(employee_ids)}"
+        
+        def on_done(conflicts):
+            if employee_ids is None:
+                self.overbooked = conflicting_bookings(conflicts)
+            else:
+                for employee_id in employee_ids:
+                    self.overbooked.pop(employee_id, None)
+                self.overbooked.update(conflicting_bookings(conflicts))
+            self.flag_overbooked_rows()
+            if warn and conflicts:
+                messagebox.showwarning("Overbooking", "The bookings exceed the employee's monthly hours:\n\n"
+                                       + format_overbooking_report(conflicts, limit=10))
+        
+        self.executor.submit(
+            key, check_overbookings, self.db_path, employee_ids,
+            on_success=on_done,
+            on_error=lambda e: logging.error(f"Overbooking check failed: {e}")
+        )
+    
+    def flag_overbooked_rows(self):
+        """Highlight the grid rows of bookings in an overbooking conflict"""
+        if not hasattr(self, 'employee_tree'):
+            return
+        tree = self.employee_tree
+        tree.tag_configure("overbooked", background="#f8d7da")
+        if "ID" not in tree["columns"]:
+            return
+        flagged = {str(booking_id) for booking_ids in self.overbooked.values() for booking_id in booking_ids}
+        for item in tree.get_children():
+            overbooked = tree.set(item, "ID") in flagged
+            if overbooked != tree.tag_has("overbooked", item):
+                tree.item(item, tags=("overbooked",) if overbooked else ())
+    
+    def show_overbooking_report(self):
+        """Check every employee and list the overbooking conflicts"""
+        def on_done(conflicts):
+            self.overbooked = conflicting_bookings(conflicts)
+            self.flag_overbooked_rows()
+            if conflicts:
+                messagebox.showwarning("Overbookings", format_overbooking_report(conflicts, limit=25))
+            else:
+                messagebox.showinfo("Overbookings", "No employee is booked beyond their monthly hours.")
+        
+        self.executor.submit(
+            "overbooking", check_overbookings, self.db_path,
+            on_success=on_done,
+            on_error=lambda e: messagebox.showerror("Error", f"Overbooking check failed: {e}"),
+            message="Checking for overbookings..."
+        )
+    
+    def poll_booking_changes(self):
+        """Read the change log from the grid's position in the background (one poll at a time)"""
+        if self.change_seq is None or self.change_poll_pending or self.booking_edits.busy:
+            # Still loading, a poll is running or own edits are unsaved - poll again once that is done
+            self.change_poll_again = True
+            return
+        self.change_poll_pending = True
+        self.change_poll_again = False
+        self.executor.submit(
+            "booking_changes", fetch_booking_changes, self.db_path, self.change_seq,
+            on_success=self.apply_booking_changes,
+            on_error=self.on_booking_changes_error
+        )
+    
+    def resume_change_polling(self, seq):
+        """Continue from change log position seq, catching up with changes announced meanwhile"""
+        self.change_seq = seq
+        if self.change_poll_again:
+            self.poll_booking_changes()
+    
+    def on_booking_changes_error(self, e):
+        """Log a failed change poll - the next announced change retries from the same position"""
+        self.change_poll_pending = False
+        self.change_poll_again = True
+        logging.error(f"Auto-refresh error: {e}")
+    
+    def apply_booking_changes(self, result):
+        """Patch the data model and the grid with the bookings changed since the last poll (Tk thread)"""
+        self.change_poll_pending = False
+        if result is None:
+            print("Too many booking changes to patch - reloading the grid")
+            self.load_employee_data_grid(on_loaded=self.restore_view_state)
+            return
+        seq, versions, rows, deleted_ids = result
+        if self.change_seq is None or self.booking_grid_result is None:
+            return  # A reload started meanwhile
+        self.resume_change_polling(seq)
+        if versions == self.booking_grid_versions:
+            return
+        
+        display_rows, df = self.booking_grid_result
+        changed_rows, changed_df = format_booking_rows(rows)
+        touched = {str(booking_id) for booking_id in deleted_ids} | {row[1] for row in changed_rows}
+        if touched:
+            display_rows = sorted([row for row in display_rows if row[1] not in touched] + changed_rows,
+                                  key=lambda row: int(row[1]))
+            if not df.empty:
+                changed_df = pd.concat([df[~df["ID"].isin(touched)], changed_df], ignore_index=True)
+            df = changed_df.sort_values("ID", key=lambda ids: pd.to_numeric(ids, errors='coerce'),
+                                        ignore_index=True) if not changed_df.empty else changed_df
+        was_empty = self.original_df.empty
+        
+        result = (display_rows, df)
+        booking_cache.put(QueryResultCache.key("booking_grid", self.db_path, versions=versions), result)
+        self.booking_grid_result = result
+        self.booking_grid_versions = versions
+        self.booking_snapshot_dirty = True
+        if not touched:
+            return
+        
+        if was_empty or df.empty:
+            # Nothing to patch - build the grid (headers, filter arrows) from scratch
+            self.populate_employee_data_grid(result, on_loaded=self.restore_view_state)
+            return
+        self.original_df = df.copy()
+        self.df = self.filtered_bookings()
+        if self.current_sort_column in self.df.columns:
+            self.df = self.df.sort_values(by=self.current_sort_column, ascending=self.current_sort_ascending,
+                                          na_position='last')
+        self.patch_booking_rows(changed_rows, deleted_ids)
+        print(f"Auto-refresh: {len(changed_rows)} bookings updated, {len(deleted_ids)} removed")
+    
+    def patch_booking_rows(self, changed_rows, deleted_ids):
+        """Update, insert or remove only the grid items of changed bookings, keeping their checkboxes"""
+        tree = self.employee_tree
+        self.booking_item(None)  # make sure the id -> item index matches the grid
+        items = self.booking_items
+        order = None
+        visible = set(self.df["ID"]) if "ID" in self.df.columns else set()
+        
+        for booking_id in deleted_ids:
+            item = items.get(str(booking_id))
+            if item is not None:
+                self.selected_rows.discard(item)
+                tree.delete(item)
+        
+        for row in changed_rows:
+            booking_id = row[1]
+            item = items.get(booking_id)
+            if booking_id not in visible:
+                # Filtered out by its new values
+                if item is not None:
+                    self.selected_rows.discard(item)
+                    tree.delete(item)
+                continue
+            values = list(row)
+            if item is not None:
+                values[0] = tree.set(item, "Select")
+                tree.item(item, values=values)
+            else:
+                # New booking - insert it where the current filter and sort put it
+                if order is None:
+                    order = {value: pos for pos, value in enumerate(self.df["ID"])}
+                tree.insert("", order.get(booking_id, "end"), values=values)
+        self.flag_overbooked_rows()
     
     def refresh_employee_data(self):
         """Refresh employee data grid and related displays - PRESERVES FILTERS"""
@@ -3643,90 +4636,61 @@ Department: {emp_data[4] or 'N/A'}
         if self.auto_refresh_enabled:
             # Restart auto-refresh
             self.schedule_auto_refresh()
-            messagebox.showinfo("Auto-Refresh", "Automatic refresh enabled (every 30 seconds)")
+            messagebox.showinfo("Auto-Refresh", "Automatic refresh enabled (every second)")
         else:
             messagebox.showinfo("Auto-Refresh", "Automatic refresh disabled")
     
     def smart_refresh(self):
         """Smart refresh that deletes rows with all zero values in specified fields"""
-        try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Define the fields to check - all must be 0 for deletion
-            fields_to_check = [
-                'monthly_hours', 
-                'annual_hours', 
-                'workload_2025_planned', 
-                'workload_2025_actual',
-                'booking_hours', 
-                'booking_period',  # This might be text, so we'll treat it differently
-                'booking_hours_accepted', 
-                'booking_period_accepted',  # This might be text, so we'll treat it differently
-                'booking_hours_extra'
-            ]
-            
-            # Build the WHERE clause to find rows where all numeric fields are 0 or NULL
-            # For period fields, we check if they are NULL, empty, or contain only '0'
-            numeric_conditions = []
-            for field in fields_to_check:
-                if 'period' in field:
-                    # For period fields, check if NULL, empty, or just '0'
-                    numeric_conditions.append(f"({field} IS NULL OR {field} = '' OR {field} = '0')")
-                else:
-                    # For numeric fields, check if 0 or NULL
-                    numeric_conditions.append(f"({field} IS NULL OR {field} = 0)")
+        self.executor.submit(
+            "smart_refresh", find_zero_bookings, self.db_path,
+            on_success=self.confirm_smart_refresh_deletion,
+            on_error=self.on_smart_refresh_error,
+            message="Checking bookings..."
+        )
+    
+    def confirm_smart_refresh_deletion(self, rows_to_delete):
+        """Ask before deleting the all-zero rows found by smart refresh"""
+        if rows_to_delete:
+            # Ask for confirmation
+            message = f"Found {len(rows_to_delete)} rows where all specified fields are zero.\n"
+            message += "These rows will be deleted:\n\n"
             
-            where_clause = " AND ".join(numeric_conditions)
+            for i, row in enumerate(rows_to_delete[:5]):  # Show first 5 rows
+                message += f"- ID: {row[0]}, Employee: {row[1]}, Project: {row[2]}\n"
             
-            # Find rows that match the deletion criteria
-            query = f"""
-                SELECT id, employee_name, project_name, technical_unit_name
-                FROM project_bookings 
-                WHERE {where_clause}
-            """
+            if len(rows_to_delete) > 5:
+                message += f"... and {len(rows_to_delete) - 5} more rows\n"
             
-            cursor.execute(query)
-            rows_to_delete = cursor.fetchall()
+            message += "\nDo you want to proceed with deletion?"
             
-            if rows_to_delete:
-                # Ask for confirmation
-                message = f"Found {len(rows_to_delete)} rows where all specified fields are zero.\n"
-                message += "These rows will be deleted:\n\n"
-                
-                for i, row in enumerate(rows_to_delete[:5]):  # Show first 5 rows
-                    message += f"- ID: {row[0]}, Employee: {row[1]}, Project: {row[2]}\n"
-                
-                if len(rows_to_delete) > 5:
-                    message += f"... and {len(rows_to_delete) - 5} more rows\n"
-                
-                message += "\nDo you want to proceed with deletion?"
+            if messagebox.askyesno("Confirm Deletion", message):
+                # Delete the identified rows
+                ids_to_delete = [row[0] for row in rows_to_delete]
                 
-                if messagebox.askyesno("Confirm Deletion", message):
-                    # Delete the identified rows
-                    ids_to_delete = [str(row[0]) for row in rows_to_delete]
-                    cursor.execute(f"DELETE FROM project_bookings WHERE id IN ({','.join(ids_to_delete)})")
-                    
-                    conn.commit()
-                    
+                def on_deleted(deleted_count):
                     # Refresh the data display
                     self.load_employee_data_grid()
-                    
-                    messagebox.showinfo("Success", f"Deleted {len(rows_to_delete)} rows with all zero values.")
-                else:
-                    messagebox.showinfo("Cancelled", "Deletion cancelled by user.")
+                    messagebox.showinfo("Success", f"Deleted {deleted_count} rows with all zero values.")
+                
+                self.executor.submit(
+                    "smart_refresh", delete_bookings, self.db_path, ids_to_delete,
+                    on_success=on_deleted,
+                    on_error=self.on_smart_refresh_error,
+                    message="Deleting bookings..."
+                )
             else:
-                # Just do regular refresh
-                self.load_employee_data_grid()
-                messagebox.showinfo("Refresh Complete", "No rows found with all zero values. Data refreshed.")
-            
-            conn.close()
-            
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to perform smart refresh: {e}")
-            logging.error(f"Smart refresh error: {e}")
-            import traceback
-            traceback.print_exc()
+                messagebox.showinfo("Cancelled", "Deletion cancelled by user.")
+        else:
+            # Just do regular refresh
+            self.load_employee_data_grid(on_loaded=lambda: messagebox.showinfo(
+                "Refresh Complete", "No rows found with all zero values. Data refreshed."))
+    
+    def on_smart_refresh_error(self, e):
+        """Report a failed smart refresh"""
+        messagebox.showerror("Error", f"Failed to perform smart refresh: {e}")
+        logging.error(f"Smart refresh error: {e}")
+        traceback.print_exception(type(e), e, e.__traceback__)
     
     def toggle_row_selection(self, event):
         """Toggle row selection when clicking on the Select column"""
@@ -3950,6 +4914,7 @@ Department: {emp_data[4] or 'N/A'}
                 
             for row_data in data:
                 self.employee_tree.insert("", "end", values=row_data)
+            self.flag_overbooked_rows()
             
             # Update column header to show sort direction
             for col in columns:
@@ -4204,6 +5169,8 @@ Department: {emp_data[4] or 'N/A'}
             if hasattr(self, 'df') and column in self.df.columns:
                 self.df = self.df.sort_values(by=column, ascending=ascending, na_position='last')
                 self.render_employee_table()
+                self.current_sort_column = column
+                self.current_sort_ascending = ascending
             else:
                 # Fallback sorting using treeview
                 self.sort_employee_data_column(column, ascending)
@@ -4226,9 +5193,14 @@ Department: {emp_data[4] or 'N/A'}
                 self.clear_filter(column)
                 return
             
-            # Apply filter to DataFrame if available
+            # Apply filter to DataFrame if available - all active filters start from the
+            # full data, so a filter can be widened again and repeat filter sets come from the cache
             if hasattr(self, 'df') and column in self.df.columns:
-                self.df = self.df[self.df[column].astype(str).isin(selected_values)]
+                self.active_column_filters[column] = selected_values
+                self.df = self.filtered_bookings()
+                if self.current_sort_column in self.df.columns:
+                    self.df = self.df.sort_values(by=self.current_sort_column, ascending=self.current_sort_ascending,
+                                                  na_position='last')
                 self.render_employee_table()
             else:
                 # Fallback: filter the treeview directly
@@ -4251,13 +5223,9 @@ Department: {emp_data[4] or 'N/A'}
             if column in self.active_column_filters:
                 del self.active_column_filters[column]
             
-            # Reset data to original
+            # Reset data to original and re-apply any remaining filters
             if hasattr(self, 'original_df') and not self.original_df.empty:
-                self.df = self.original_df.copy()
-                # Re-apply any remaining filters
-                for col, values in self.active_column_filters.items():
-                    if col in self.df.columns:
-                        self.df = self.df[self.df[col].astype(str).isin(values)]
+                self.df = self.filtered_bookings()
                 self.render_employee_table()
             else:
                 # Fallback: reload all data
@@ -4319,6 +5287,7 @@ Department: {emp_data[4] or 'N/A'}
                             row_values.append("")
                     
                     self.employee_tree.insert('', 'end', iid=str(i), values=row_values)
+            self.flag_overbooked_rows()
             
         except Exception as e:
             print(f"Error rendering employee table: {e}")
@@ -4328,8 +5297,9 @@ Department: {emp_data[4] or 'N/A'}
         try:
             from functools import partial
             
-            # Clear all active filters
+            # Clear all active filters and the sort order
             self.active_column_filters.clear()
+            self.current_sort_column = None
             
             # Reset to original data
             if hasattr(self, 'original_df') and not self.original_df.empty:
@@ -4369,6 +5339,54 @@ Department: {emp_data[4] or 'N/A'}
         except Exception as e:
             logging.error(f"Toggle edit mode error: {e}")
     
+    def on_busy_change(self, tasks):
+        """Show or hide the busy indicator as background tasks start and finish"""
+        if not hasattr(self, 'busy_bar'):
+            return
+        if tasks:
+            self.busy_label.configure(text=tasks[-1].message or "Working...")
+            if not self.busy_bar.winfo_ismapped():
+                self.busy_bar.configure(mode="indeterminate")
+                self.busy_bar.pack(side='left', padx=3)
+                self.busy_bar.start()
+                self.busy_cancel_btn.pack(side='left', padx=3)
+        else:
+            self.busy_bar.stop()
+            self.busy_bar.pack_forget()
+            self.busy_cancel_btn.pack_forget()
+            self.busy_label.configure(text="")
+    
+    def on_task_progress(self, task, done, total=None, message=None):
+        """Show determinate progress reported by a background task"""
+        if not hasattr(self, 'busy_bar'):
+            return
+        text = message or task.message or "Working..."
+        if total:
+            if self.busy_bar.cget("mode") != "determinate":
+                self.busy_bar.stop()
+                self.busy_bar.configure(mode="determinate")
+            self.busy_bar.set(min(done / total, 1.0))
+            text = f"{text} {done:,}/{total:,}"
+        self.busy_label.configure(text=text)
+    
+    def on_close(self):
+        """Stop background work and close the window"""
+        try:
+            saved, conflicts, invalid = self.booking_edits.flush_now()
+            if conflicts or invalid:
+                logging.warning(f"Edits not saved on close - conflicts: {conflicts}, invalid: {invalid}")
+        except Exception as e:
+            logging.error(f"Saving pending edits on close failed: {e}")
+            messagebox.showerror("Error", f"Pending edits could not be saved: {e}")
+        try:
+            self.save_warm_start()
+        except Exception as e:
+            logging.error(f"Warm-start save error: {e}")
+        booking_cache.log_stats()
+        self.db_watcher.stop()
+        self.executor.shutdown()
+        self.root.destroy()
+    
     def run(self):
         """Run the application"""
         self.root.mainloop()
@@ -4376,6 +5394,8 @@ Department: {emp_data[4] or 'N/A'}
 def main():
     """Main function to run the Project Booking Application"""
     try:
+        # Start importing pandas while the window is being built
+        preload("pandas")
         app = ProjectBookingApp()
         app.run()
     except Exception as e:
@@ -4383,4 +5403,5 @@ def main():
         logging.error(f"Application error: {e}")
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Worker processes in the packaged executable
     main()
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Effective-dated history of employee rates.
+
+``employee_rate_history`` holds one row per employee and period in which
+the rates were constant: valid_from inclusive, valid_to exclusive (NULL =
+still valid). Periods are contiguous: each one ends where the employee's
+next one begins. Triggers on employee_extended split the period in effect
+today whenever a rate changes there, keeping periods that start later;
+``set_rates`` enters a change with any effective date and keeps the rates in
+employee_extended equal to those in effect today. ``rate_as_of`` looks a
+single rate up through the (employee_id, valid_from) index.
+
+``RateHistory`` costs many bookings at once: each booking's monthly hours
+are spread evenly over the working days of the month, as in
+booking_allocation, and priced with the rate of each day, using the running
+integral of the rate over working days and ``numpy.searchsorted`` - no
+Python loop per booking, month or period.
+
+    python rate_history.py --benchmark --bookings 100000 --months 12
+"""
+
+import argparse
+import sqlite3
+import time
+
+from booking_allocation import working_days
+from startup import LazyModule
+
+np = LazyModule("numpy")
+
+HISTORY_TABLE = "employee_rate_history"
+RATE_COLUMNS = ("saabu_rate_eur", "saabu_rate_usd", "local_agency_rate_usd", "unit_rate_usd")
+BEGINNING = "1900-01-01"  # valid_from of the rates known before the history was kept
+
+DAY_BITS = 22  # employee id and day number packed into one sortable int64 key
+DAY_OFFSET = 1 << (DAY_BITS - 1)
+
+
+def ensure_rate_history(conn):
+    """Create the history table, its index and the employee_extended triggers; seed employees without history"""
+    if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='employee_extended'").fetchone():
+        return
+    rates = ", ".join(RATE_COLUMNS)
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {HISTORY_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            employee_id INTEGER NOT NULL,
+            valid_from DATE NOT NULL,
+            valid_to DATE,
+            {', '.join(f'{column} DECIMAL(10,2)' for column in RATE_COLUMNS)},
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{HISTORY_TABLE}_as_of "
+                 f"ON {HISTORY_TABLE}(employee_id, valid_from)")
+    new_rates = ", ".join(f"NEW.{column}" for column in RATE_COLUMNS)
+    changed = " OR ".join(f"NEW.{column} IS NOT OLD.{column}" for column in RATE_COLUMNS)
+    today = "valid_from <= date('now') AND (valid_to IS NULL OR valid_to > date('now'))"
+    same_rates = " AND ".join(f"{column} IS NEW.{column}" for column in RATE_COLUMNS)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_employee_extended_rates_insert AFTER INSERT ON employee_extended
+        BEGIN
+            INSERT INTO {HISTORY_TABLE} (employee_id, valid_from, {rates}) VALUES (NEW.id, date('now'), {new_rates});
+        END
+    """)
+    # Splits the period in effect today, up to the next period (later ones are kept); a second
+    # change on the same day replaces the first one. Rates already in effect today (written by
+    # sync_current_rates) are not recorded again. Recreated so databases get the current version.
+    conn.execute("DROP TRIGGER IF EXISTS trg_employee_extended_rates_update")
+    conn.execute(f"""
+        CREATE TRIGGER trg_employee_extended_rates_update
+        AFTER UPDATE OF {rates} ON employee_extended
+        WHEN ({changed})
+          AND NOT EXISTS (SELECT 1 FROM {HISTORY_TABLE} WHERE employee_id = NEW.id AND {today} AND {same_rates})
+        BEGIN
+            UPDATE {HISTORY_TABLE} SET {', '.join(f'{column} = NEW.{column}' for column in RATE_COLUMNS)}
+            WHERE employee_id = NEW.id AND valid_from = date('now');
+            INSERT INTO {HISTORY_TABLE} (employee_id, valid_from, valid_to, {rates})
+            SELECT NEW.id, date('now'),
+                   (SELECT MIN(valid_from) FROM {HISTORY_TABLE} WHERE employee_id = NEW.id AND valid_from > date('now')),
+                   {new_rates}
+            WHERE NOT EXISTS (SELECT 1 FROM {HISTORY_TABLE} WHERE employee_id = NEW.id AND valid_from = date('now'));
+            UPDATE {HISTORY_TABLE} SET valid_to = date('now')
+            WHERE employee_id = NEW.id AND valid_from < date('now') AND (valid_to IS NULL OR valid_to > date('now'));
+        END
+    """)
+    conn.execute(f"""
+        INSERT INTO {HISTORY_TABLE} (employee_id, valid_from, {rates})
+        SELECT id, ?, {rates} FROM employee_extended ee
+        WHERE NOT EXISTS (SELECT 1 FROM {HISTORY_TABLE} h WHERE h.employee_id = ee.id)
+    """, (BEGINNING,))
+    # Earlier versions of the update trigger closed periods starting in the future and left overlaps
+    conn.execute(f"""
+        UPDATE {HISTORY_TABLE} AS h SET valid_to = n.next_from
+        FROM (SELECT id, LEAD(valid_from) OVER (PARTITION BY employee_id ORDER BY valid_from) AS next_from
+              FROM {HISTORY_TABLE}) n
+        WHERE n.id = h.id AND h.valid_to IS NOT n.next_from
+    """)
+    # Periods set ahead with set_rates that have started since
+    sync_current_rates(conn)
+    conn.commit()
+
+
+def rate_as_of(conn, employee_id, day, column="unit_rate_usd"):
+    """Rate of an employee on day (YYYY-MM-DD), or None"""
+    if column not in RATE_COLUMNS:
+        raise ValueError(f"Unknown rate column '{column}'")
+    row = conn.execute(f"""
+        SELECT {column} FROM {HISTORY_TABLE}
+        WHERE employee_id = ? AND valid_from <= ? AND (valid_to IS NULL OR valid_to > ?)
+        ORDER BY valid_from DESC LIMIT 1
+    """, (employee_id, day, day)).fetchone()
+    return row[0] if row else None
+
+
+def set_rates(conn, employee_id, valid_from, **rates):
+    """Change rates from valid_from (YYYY-MM-DD) on, splitting the period it falls in; later periods are kept
+
+    Rates not given keep their value of that period. When the change is in
+    effect today, employee_extended gets the new rates as well. Not committed.
+    """
+    unknown = set(rates) - set(RATE_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown rate column(s): {', '.join(sorted(unknown))}")
+    current = conn.execute(f"""
+        SELECT id, valid_from, valid_to, {', '.join(RATE_COLUMNS)} FROM {HISTORY_TABLE}
+        WHERE employee_id = ? AND valid_from <= ? ORDER BY valid_from DESC LIMIT 1
+    """, (employee_id, valid_from)).fetchone()
+    if current is None:
+        # Before the first period: the new one runs up to it
+        first = conn.execute(f"SELECT MIN(valid_from) FROM {HISTORY_TABLE} WHERE employee_id = ?",
+                             (employee_id,)).fetchone()[0]
+        values = {column: rates.get(column) for column in RATE_COLUMNS}
+        valid_to = first
+    else:
+        row_id, period_from, valid_to = current[:3]
+        values = dict(zip(RATE_COLUMNS, current[3:]))
+        values.update(rates)
+        if period_from == valid_from:
+            conn.execute(f"UPDATE {HISTORY_TABLE} SET {', '.join(f'{column} = ?' for column in RATE_COLUMNS)} "
+                         f"WHERE id = ?", [values[column] for column in RATE_COLUMNS] + [row_id])
+            sync_current_rates(conn, employee_id)
+            return
+        conn.execute(f"UPDATE {HISTORY_TABLE} SET valid_to = ? WHERE id = ?", (valid_from, row_id))
+    conn.execute(f"INSERT INTO {HISTORY_TABLE} (employee_id, valid_from, valid_to, {', '.join(RATE_COLUMNS)}) "
+                 f"VALUES (?, ?, ?, {', '.join('?' for _ in RATE_COLUMNS)})",
+                 [employee_id, valid_from, valid_to] + [values[column] for column in RATE_COLUMNS])
+    sync_current_rates(conn, employee_id)
+
+
+def sync_current_rates(conn, employee_id=None):
+    """Copy the rates in effect today into employee_extended where they differ; returns employees updated
+
+    The update trigger sees the rates already in effect and records nothing. Not committed.
+    """
+    differs = " OR ".join(f"ee.{column} IS NOT h.{column}" for column in RATE_COLUMNS)
+    query = f"""
+        UPDATE employee_extended AS ee SET {', '.join(f'{column} = h.{column}' for column in RATE_COLUMNS)}
+        FROM {HISTORY_TABLE} h
+        WHERE h.employee_id = ee.id AND h.valid_from <= date('now') AND (h.valid_to IS NULL OR h.valid_to > date('now'))
+          AND ({differs})
+    """
+    if employee_id is not None:
+        return conn.execute(query + " AND ee.id = ?", (employee_id,)).rowcount
+    return conn.execute(query).rowcount
+
+
+def _keys(employee_ids, days):
+    return (np.asarray(employee_ids, dtype=np.int64) << DAY_BITS) + (days + DAY_OFFSET)
+
+
+class RateHistory:
+    """One rate column of the history as sorted arrays, for vectorized lookups and costing.
+
+    Periods are taken as contiguous (each one lasts until the next begins);
+    before an employee's first period its earliest rate applies. A missing
+    rate counts as 0.
+    """
+
+    def __init__(self, employee_ids, valid_from, rates):
+        order = np.lexsort((valid_from, employee_ids))
+        self.employee_ids = np.asarray(employee_ids, dtype=np.int64)[order]
+        self.starts = np.asarray(valid_from, dtype='datetime64[D]')[order].astype(np.int64)
+        self.rates = np.nan_to_num(np.asarray(rates, dtype=float)[order])
+        self.keys = _keys(self.employee_ids, self.starts)
+        # Integral of the rate over working days from each employee's first period start up to each period start
+        spans = working_days(self.starts[:-1].astype('datetime64[D]'),
+                             self.starts[1:].astype('datetime64[D]')) * self.rates[:-1]
+        spans[self.employee_ids[1:] != self.employee_ids[:-1]] = 0
+        self.integral = np.concatenate(([0.0], np.cumsum(spans)))
+        first = np.searchsorted(self.keys, _keys(self.employee_ids, -DAY_OFFSET))
+        self.integral -= self.integral[first]
+
+    @classmethod
+    def load(cls, conn, column="unit_rate_usd"):
+        """Read the history of one rate column"""
+        if column not in RATE_COLUMNS:
+            raise ValueError(f"Unknown rate column '{column}'")
+        rows = conn.execute(f"SELECT employee_id, valid_from, {column} FROM {HISTORY_TABLE}").fetchall()
+        if not rows:
+            return cls(np.empty(0, dtype=np.int64), np.empty(0, dtype='datetime64[D]'), np.empty(0))
+        employee_ids, valid_from, rates = zip(*rows)
+        return cls(employee_ids, [str(day)[:10] for day in valid_from],
+                   [np.nan if rate is None else rate for rate in rates])
+
+    def _periods(self, employee_ids, days):
+        """Index of the period in effect per (employee, day), and whether the employee has any history"""
+        employee_ids = np.asarray(employee_ids, dtype=np.int64)
+        index = np.searchsorted(self.keys, _keys(employee_ids, days), side='right') - 1
+        first = np.searchsorted(self.keys, _keys(employee_ids, -DAY_OFFSET))
+        known = (first < len(self.keys)) & (self.employee_ids[np.minimum(first, len(self.keys) - 1)] == employee_ids)
+        own = (index >= 0) & (self.employee_ids[np.maximum(index, 0)] == employee_ids)
+        return np.where(own, index, np.minimum(first, len(self.keys) - 1)), known
+
+    def rate_at(self, employee_ids, days):
+        """Rate per employee on the given days (datetime64[D] or YYYY-MM-DD); NaN without history"""
+        days = np.asarray(days, dtype='datetime64[D]').astype(np.int64)
+        if not len(self.keys):
+            return np.full(np.broadcast(np.asarray(employee_ids), days).shape, np.nan)
+        index, known = self._periods(employee_ids, days)
+        return np.where(known, self.rates[index], np.nan)
+
+    def _integral_at(self, employee_ids, days):
+        index, known = self._periods(employee_ids, days)
+        elapsed = working_days(self.starts[index].astype('datetime64[D]'), np.asarray(days).astype('datetime64[D]'))
+        return np.where(known, self.integral[index] + self.rates[index] * elapsed, np.nan)
+
+    def cost(self, employee_ids, hours, months):
+        """Cost of monthly hours: hours is (bookings x months), months the first days of its columns.
+
+        Each month's hours are spread evenly over its working days and priced
+        per day, so a rate change in the middle of a month is split by the
+        working days on either side. Returns an array shaped like hours; NaN
+        for employees without rate history.
+        """
+        hours = np.asarray(hours, dtype=float)
+        if not len(self.keys):
+            return np.full(hours.shape, np.nan)
+        months = np.asarray(months, dtype='datetime64[M]')
+        starts = months.astype('datetime64[D]').astype(np.int64)
+        ends = (months + 1).astype('datetime64[D]').astype(np.int64)
+        employee_ids = np.asarray(employee_ids, dtype=np.int64)[:, None]
+        rate_days = self._integral_at(employee_ids, ends[None, :]) - self._integral_at(employee_ids, starts[None, :])
+        return hours * rate_days / working_days(starts.astype('datetime64[D]'), ends.astype('datetime64[D]'))[None, :]
+
+
+def benchmark(bookings=100000, months=12, employees=2000, changes=3, runs=5, seed=1):
+    """Seconds to cost bookings x months of hours against a synthetic history (fastest of runs)"""
+    rng = np.random.default_rng(seed)
+    employee_ids = np.repeat(np.arange(1, employees + 1), changes + 1)
+    # Each employee: a period since BEGINNING and `changes` changes on random days of the costed year
+    change_days = np.sort(rng.integers(0, 365, size=(employees, changes)), axis=1)
+    valid_from = np.concatenate(
+        [np.full((employees, 1), np.datetime64(BEGINNING)),
+         np.datetime64("2025-01-01") + change_days.astype('timedelta64[D]')], axis=1).ravel()
+    history = RateHistory(employee_ids, valid_from, rng.uniform(40, 120, size=len(employee_ids)))
+    booking_employees = rng.integers(1, employees + 1, size=bookings)
+    hours = rng.uniform(0, 160, size=(bookings, months))
+    month_starts = np.datetime64("2025-01") + np.arange(months)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        costs = history.cost(booking_employees, hours, month_starts)
+        timings.append(time.perf_counter() - started)
+    return min(timings), float(np.nansum(costs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Set up the rate history or benchmark the vectorized costing")
+    parser.add_argument("db_path", nargs="?", default="workload.db", help="database (default: workload.db)")
+    parser.add_argument("--benchmark", action="store_true", help="time the costing on synthetic data")
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--months", type=int, default=12)
+    parser.add_argument("--employees", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        seconds, total = benchmark(args.bookings, args.months, args.employees)
+        print(f"Costed {args.bookings:,} bookings x {args.months} months in {seconds * 1000:.0f} ms "
+              f"(total {total:,.0f})")
+        return 0
+    conn = sqlite3.connect(args.db_path)
+    try:
+        ensure_rate_history(conn)
+        count = conn.execute(f"SELECT COUNT(*) FROM {HISTORY_TABLE}").fetchone()[0]
+    finally:
+        conn.close()
+    print(f"{count} rate periods in {HISTORY_TABLE}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
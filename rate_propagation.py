@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Propagation of employee attributes from employee_extended to project_bookings.
+
+Bookings keep the employee's cost center, rates, hours and so on as they
+were when the booking was created (as employee snapshot versions, see
+booking_storage), and single bookings can be edited in the grid. The values
+last propagated are stored per employee and column in ``employee_sync``.
+When an employee_extended value differs from it, only that column is
+rewritten, and only on bookings that still hold the old value - a remark or
+rate edited on a booking is left alone. All of it is one set-based UPDATE;
+the cost triggers (see booking_costs) recompute the forecast cost of every
+updated booking in the same statement.
+
+Employees without a stored baseline (all of them on the first run) only get
+their current values recorded; their bookings are not touched.
+
+    python rate_propagation.py              # dry run: report what would change
+    python rate_propagation.py --apply
+"""
+
+import argparse
+import sqlite3
+
+from booking_costs import ensure_booking_costs
+from booking_storage import BOOKINGS_VIEW, ensure_booking_storage
+
+SYNC_TABLE = "employee_sync"
+
+# Booking column -> employee_extended expression it is copied from
+PROPAGATED_COLUMNS = {
+    "cost_center": "ee.cost_center",
+    "ghrs_id": "ee.ghrs_id",
+    "employee_name": "COALESCE(ee.first_name || ' ' || ee.last_name, ee.last_name, ee.first_name)",
+    "dept_description": "ee.dept_description",
+    "work_location": "ee.work_location",
+    "business_unit": "ee.business_unit",
+    "tipo": "ee.tipo",
+    "tipo_description": "ee.tipo_description",
+    "sap_tipo": "ee.sap_tipo",
+    "saabu_rate_eur": "ee.saabu_rate_eur",
+    "saabu_rate_usd": "ee.saabu_rate_usd",
+    "local_agency_rate_usd": "ee.local_agency_rate_usd",
+    "unit_rate_usd": "ee.unit_rate_usd",
+    "monthly_hours": "ee.monthly_hours",
+    "annual_hours": "ee.annual_hours",
+    "workload_2025_planned": "ee.workload_2025_planned",
+    "workload_2025_actual": "ee.workload_2025_actual",
+    "remark": "ee.remark",
+}
+# A missing name is not copied over the name the booking already has
+KEEP_WHEN_NULL = ("employee_name",)
+
+
+def ensure_sync_state(conn):
+    """Create the table of values last propagated per employee (replacing the older hash-only table)"""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({SYNC_TABLE})")}
+    if columns and not set(PROPAGATED_COLUMNS) <= columns:
+        conn.execute(f"DROP TABLE {SYNC_TABLE}")
+    # Untyped columns keep the values exactly as employee_extended has them
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {SYNC_TABLE} (
+            employee_id INTEGER PRIMARY KEY,
+            {', '.join(PROPAGATED_COLUMNS)},
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def record_baseline(conn):
+    """Store the current values of employees that have none stored yet; returns how many"""
+    columns = ", ".join(PROPAGATED_COLUMNS)
+    cursor = conn.execute(f"""
+        INSERT INTO {SYNC_TABLE} (employee_id, {columns})
+        SELECT ee.id, {', '.join(PROPAGATED_COLUMNS.values())} FROM employee_extended ee
+        WHERE ee.id NOT IN (SELECT employee_id FROM {SYNC_TABLE})
+    """)
+    return cursor.rowcount
+
+
+def _changed(column):
+    """The employee's value of column differs from the one last propagated"""
+    changed = f"{PROPAGATED_COLUMNS[column]} IS NOT s.{column}"
+    if column in KEEP_WHEN_NULL:
+        changed += f" AND {PROPAGATED_COLUMNS[column]} IS NOT NULL"
+    return changed
+
+
+def _pending(column):
+    """Column is to be rewritten on booking pb: it changed and the booking still holds the old value"""
+    return f"({_changed(column)} AND pb.{column} IS s.{column})"
+
+
+def _any_pending():
+    return " OR ".join(_pending(column) for column in PROPAGATED_COLUMNS)
+
+
+def _any_changed():
+    return " OR ".join(f"({_changed(column)})" for column in PROPAGATED_COLUMNS)
+
+
+def changed_employees(conn):
+    """{employee id: [columns whose value changed since they were last propagated]}"""
+    flags = ", ".join(f"({_changed(column)})" for column in PROPAGATED_COLUMNS)
+    changed = {}
+    for row in conn.execute(f"SELECT ee.id, {flags} FROM employee_extended ee "
+                            f"JOIN {SYNC_TABLE} s ON s.employee_id = ee.id WHERE {_any_changed()}"):
+        changed[row[0]] = [column for column, flag in zip(PROPAGATED_COLUMNS, row[1:]) if flag]
+    return changed
+
+
+def diff_bookings(conn):
+    """[(booking id, employee id, column, old, new)] that propagating would write"""
+    columns = list(PROPAGATED_COLUMNS)
+    selected = ", ".join(f"{_pending(column)}, pb.{column}, {PROPAGATED_COLUMNS[column]}" for column in columns)
+    changes = []
+    for row in conn.execute(f"""
+            SELECT pb.id, pb.employee_id, {selected}
+            FROM {BOOKINGS_VIEW} pb
+            JOIN employee_extended ee ON ee.id = pb.employee_id
+            JOIN {SYNC_TABLE} s ON s.employee_id = ee.id
+            WHERE {_any_pending()}
+            ORDER BY pb.id
+        """):
+        for index, column in enumerate(columns):
+            pending, before, after = row[2 + 3 * index:5 + 3 * index]
+            if pending:
+                changes.append((row[0], row[1], column, before, after))
+    return changes
+
+
+def forecast_changes(conn, changes):
+    """[(booking id, old forecast, new forecast)] caused by unit rate changes"""
+    new_rates = {booking_id: new for booking_id, _, column, _, new in changes if column == "unit_rate_usd"}
+    result = []
+    booking_ids = sorted(new_rates)
+    for start in range(0, len(booking_ids), 500):
+        batch = booking_ids[start:start + 500]
+        for booking_id, hours, forecast in conn.execute(
+                f"SELECT id, booking_hours, booking_cost_forecast FROM project_bookings "
+                f"WHERE id IN ({','.join('?' for _ in batch)})", batch):
+            rate = new_rates[booking_id]
+            new_forecast = round(hours * rate, 2) if hours is not None and rate is not None else forecast
+            if new_forecast != forecast:
+                result.append((booking_id, forecast, new_forecast))
+    return result
+
+
+def propagate_employee_attributes(db_path, dry_run=False):
+    """Copy changed employee values into the bookings still holding the old ones (runs on an I/O thread)
+
+    Returns a report {"employees", "bookings", "changes", "forecasts",
+    "baseline"}; with dry_run nothing is written.
+    """
+    conn = sqlite3.connect(db_path, timeout=5)
+    try:
+        if not conn.execute("SELECT 1 FROM sqlite_master WHERE type='view' AND name=?", (BOOKINGS_VIEW,)).fetchone():
+            # Not migrated yet (e.g. the command line on a database the app never opened)
+            ensure_booking_storage(conn)
+            ensure_booking_costs(conn)
+        ensure_sync_state(conn)
+        conn.commit()
+        conn.execute("BEGIN IMMEDIATE")
+        baseline = record_baseline(conn)
+        changed = changed_employees(conn)
+        changes = diff_bookings(conn)
+        report = {
+            "employees": len(changed),
+            "bookings": len({change[0] for change in changes}),
+            "changes": changes,
+            "forecasts": forecast_changes(conn, changes),
+            "baseline": baseline,
+        }
+        if dry_run:
+            conn.rollback()
+            return report
+        if changes:
+            assignments = ", ".join(
+                f"{column} = CASE WHEN {_pending(column)} THEN {PROPAGATED_COLUMNS[column]} ELSE pb.{column} END"
+                for column in PROPAGATED_COLUMNS)
+            conn.execute(f"""
+                UPDATE {BOOKINGS_VIEW} AS pb SET {assignments}, updated_at = CURRENT_TIMESTAMP
+                FROM employee_extended ee JOIN {SYNC_TABLE} s ON s.employee_id = ee.id
+                WHERE ee.id = pb.employee_id AND ({_any_pending()})
+            """)
+        if changed:
+            # The new values are the baseline now, also where a booking kept its own value
+            conn.execute(f"""
+                UPDATE {SYNC_TABLE} AS s SET
+                    {', '.join(f"{column} = CASE WHEN {_changed(column)} THEN {PROPAGATED_COLUMNS[column]} ELSE s.{column} END"
+                               for column in PROPAGATED_COLUMNS)},
+                    synced_at = CURRENT_TIMESTAMP
+                FROM employee_extended ee WHERE ee.id = s.employee_id AND ({_any_changed()})
+            """)
+        conn.execute(f"DELETE FROM {SYNC_TABLE} WHERE employee_id NOT IN (SELECT id FROM employee_extended)")
+        conn.commit()
+        return report
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def format_report(report, limit=50):
+    """Readable diff of a propagation report"""
+    lines = [f"{report['employees']} employees changed, {report['bookings']} bookings "
+             f"with {len(report['changes'])} differing values, {len(report['forecasts'])} forecast costs"]
+    if report.get("baseline"):
+        lines.append(f"  values of {report['baseline']} employees recorded as the baseline (bookings not changed)")
+    for booking_id, employee_id, column, old, new in report["changes"][:limit]:
+        lines.append(f"  booking {booking_id} (employee {employee_id}) {column}: {old!r} -> {new!r}")
+    if len(report["changes"]) > limit:
+        lines.append(f"  ... and {len(report['changes']) - limit} more")
+    for booking_id, old, new in report["forecasts"][:limit]:
+        lines.append(f"  booking {booking_id} booking_cost_forecast: {old!r} -> {new!r}")
+    if len(report["forecasts"]) > limit:
+        lines.append(f"  ... and {len(report['forecasts']) - limit} more")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Copy changed employee attributes into their bookings")
+    parser.add_argument("db_path", nargs="?", default="workload.db", help="database (default: workload.db)")
+    parser.add_argument("--apply", action="store_true", help="write the changes (default: dry run)")
+    parser.add_argument("--limit", type=int, default=50, help="changes to list")
+    args = parser.parse_args(argv)
+
+    report = propagate_employee_attributes(args.db_path, dry_run=not args.apply)
+    print(format_report(report, args.limit))
+    print("Applied." if args.apply else "Dry run - nothing written (use --apply).")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
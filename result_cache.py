@@ -0,0 +1,127 @@
+"""
+Bounded LRU cache of query results.
+
+Entries are keyed by (query id, parameters, filter signature, data version),
+so a result is reused for as long as the tables it was read from are
+unchanged and is simply never hit again once they change. The cache keeps
+its estimated size under a byte budget and counts hits, misses and evictions.
+"""
+
+import logging
+import sys
+import threading
+from collections import OrderedDict
+
+SIZE_SAMPLE = 200  # items measured when estimating the size of a long sequence
+
+
+def estimate_size(value):
+    """Approximate memory held by a cached value in bytes"""
+    if hasattr(value, 'memory_usage') and hasattr(value, 'columns'):  # DataFrame
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (list, tuple)):
+        size = sys.getsizeof(value)
+        if not value:
+            return size
+        sample = value[:SIZE_SAMPLE]
+        sampled = sum(estimate_size(item) for item in sample)
+        return size + sampled * len(value) // len(sample)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def freeze(value):
+    """Hashable, order-independent form of parameters, filters or table versions"""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), freeze(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(map(str, value)))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def filter_signature(filters):
+    """Signature of {column: selected values}; the order of columns and values does not matter"""
+    return tuple(sorted((str(col), tuple(sorted(map(str, values)))) for col, values in (filters or {}).items()
+                        if values))
+
+
+class QueryResultCache:
+    """Thread-safe LRU of query results under a byte budget"""
+
+    def __init__(self, name, max_bytes=64 * 1024 * 1024):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(query_id, params=(), filters=None, versions=None):
+        """Cache key for a query run with params, filtered by filters, at the given table versions"""
+        return (query_id, freeze(params), filter_signature(filters), freeze(versions))
+
+    def get(self, key):
+        """Return the cached value for key (and mark it recently used), or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def contains(self, key):
+        """True if key is cached (does not count as a lookup or mark the entry as used)"""
+        with self._lock:
+            return key in self._entries
+
+    def put(self, key, value, size=None):
+        """Store value, evicting least recently used entries to stay within the budget"""
+        size = estimate_size(value) if size is None else size
+        if size > self.max_bytes:
+            logging.debug(f"{self.name} cache: result of {size:,} bytes exceeds the budget, not cached")
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (the counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def log_stats(self):
+        """Write the counters to the log"""
+        s = self.stats()
+        logging.info(f"{self.name} cache: {s['hits']} hits, {s['misses']} misses ({s['hit_rate']:.0%}), "
+                     f"{s['evictions']} evictions, {s['entries']} entries, "
+                     f"{s['bytes'] / 1e6:.1f}/{s['max_bytes'] / 1e6:.0f} MB")
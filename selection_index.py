@@ -0,0 +1,146 @@
+"""
+Adjacency index of valid (technical_unit, project, employee) combinations
+from the service table, used to cascade the booking selection dropdowns.
+
+Refreshing follows the change log (see change_log): the services inserted,
+updated or deleted since the last refresh are re-read and their old triple
+replaced by the current one, so reassigning a service's technical unit or
+employee reaches the dropdowns without a full reload.
+"""
+
+import sqlite3
+import threading
+from collections import Counter
+from itertools import combinations
+
+from change_log import ensure_logged, latest_seq, read_changes
+
+DIMENSIONS = ("technical_unit", "project", "employee")
+
+# Changed services patched in place; more than that rebuild the index
+MAX_PATCHED_SERVICES = 5000
+SQL_CHUNK = 500
+
+
+class ServiceAdjacencyIndex:
+    """Precomputed service counts for every partial (technical_unit, project, employee) selection.
+
+    For each dimension and each combination of the other two dimensions the
+    index keeps a Counter of option -> number of services, so narrowing a
+    dropdown is a dictionary lookup instead of a query.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.triples = Counter()   # (technical_unit_id, project_id, employee_id) -> services
+        self._adjacency = {}       # (dimension, fixed dims) -> {fixed values: Counter(option -> services)}
+        self._service_triples = {}  # service id -> triple counted for it (complete triples only)
+        self._seq = 0              # change log position the index reflects
+        self._loaded = False
+
+    def _empty_adjacency(self):
+        adjacency = {}
+        for pos, dim in enumerate(DIMENSIONS):
+            others = tuple(i for i in range(len(DIMENSIONS)) if i != pos)
+            for size in range(len(others) + 1):
+                for fixed in combinations(others, size):
+                    adjacency[(pos, fixed)] = {}
+        return adjacency
+
+    def _add(self, triple, count):
+        """Add count services for one triple to every adjacency counter"""
+        self.triples[triple] += count
+        if self.triples[triple] <= 0:
+            del self.triples[triple]
+        for (pos, fixed), buckets in self._adjacency.items():
+            key = tuple(triple[i] for i in fixed)
+            counter = buckets.setdefault(key, Counter())
+            counter[triple[pos]] += count
+            if counter[triple[pos]] <= 0:
+                del counter[triple[pos]]
+
+    def load(self):
+        """Rebuild the whole index from the service table"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ensure_logged(conn, self.db_path)
+            conn.execute("BEGIN")
+            seq = latest_seq(conn)
+            rows = conn.execute("""
+                SELECT id, technical_unit_id, project_id, employee_id
+                FROM service
+                WHERE technical_unit_id IS NOT NULL AND project_id IS NOT NULL AND employee_id IS NOT NULL
+            """).fetchall()
+            conn.rollback()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.triples = Counter()
+            self._adjacency = self._empty_adjacency()
+            self._service_triples = {service_id: tuple(triple) for service_id, *triple in rows}
+            for triple, count in Counter(self._service_triples.values()).items():
+                self._add(triple, count)
+            self._seq = seq
+            self._loaded = True
+
+    def refresh(self):
+        """Bring the index up to date, patching only the services changed since the last refresh"""
+        if not self._loaded:
+            self.load()
+            return
+
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ensure_logged(conn, self.db_path)
+            conn.execute("BEGIN")
+            pending = read_changes(conn, self._seq)
+            service_ids = list(pending[1].get("service", {})) if pending else []
+            if pending is None or len(service_ids) > MAX_PATCHED_SERVICES:
+                conn.rollback()
+                current = None
+            else:
+                current = {}
+                for start in range(0, len(service_ids), SQL_CHUNK):
+                    chunk = service_ids[start:start + SQL_CHUNK]
+                    current.update((service_id, tuple(triple)) for service_id, *triple in conn.execute(
+                        f"SELECT id, technical_unit_id, project_id, employee_id FROM service "
+                        f"WHERE id IN ({','.join('?' for _ in chunk)})", chunk))
+                conn.rollback()
+        finally:
+            conn.close()
+
+        # Changes no longer logged, or too many to patch
+        if current is None:
+            self.load()
+            return
+
+        with self._lock:
+            for service_id in service_ids:
+                old = self._service_triples.pop(service_id, None)
+                if old is not None:
+                    self._add(old, -1)
+                new = current.get(service_id)  # None: deleted
+                if new is not None and None not in new:
+                    self._service_triples[service_id] = new
+                    self._add(new, 1)
+            self._seq = pending[0]
+
+    def options(self, dimension, technical_unit=None, project=None, employee=None):
+        """Return Counter(option id -> services) for dimension given the other selections"""
+        if not self._loaded:
+            self.load()
+        selection = {"technical_unit": technical_unit, "project": project, "employee": employee}
+        pos = DIMENSIONS.index(dimension)
+        fixed = tuple(i for i, dim in enumerate(DIMENSIONS)
+                      if i != pos and selection[dim] is not None)
+        key = tuple(selection[DIMENSIONS[i]] for i in fixed)
+        with self._lock:
+            return Counter(self._adjacency[(pos, fixed)].get(key, {}))
+
+    def count(self, technical_unit, project, employee):
+        """Return the number of services for one full selection"""
+        if not self._loaded:
+            self.load()
+        return self.triples.get((technical_unit, project, employee), 0)
@@ -0,0 +1,60 @@
+"""
+Startup helpers: lazily imported modules, background preloading and startup probes
+"""
+
+import importlib
+import logging
+import os
+import threading
+
+# Set by startup_benchmark.py when it launches an app to time it
+PROBE_ENV = "FABSI_STARTUP_PROBE"
+
+
+class LazyModule:
+    """Stand-in for a module that is only imported on first attribute access.
+
+    ``pd = LazyModule("pandas")`` keeps ``pd.DataFrame(...)`` call sites
+    unchanged while taking the import off the startup path.
+    """
+
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__['_module'] is not None else "not loaded"
+        return f"<lazy module '{self.__dict__['_name']}' ({state})>"
+
+
+def preload(*names):
+    """Import modules on a daemon thread so they are ready by the time they are first used"""
+    def run():
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                logging.warning(f"Preloading {name} failed: {e}")
+
+    thread = threading.Thread(target=run, name="preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def mark_startup(event):
+    """Report a startup milestone to startup_benchmark.py (no-op in normal runs)"""
+    if os.environ.get(PROBE_ENV):
+        print(f"STARTUP {event}", flush=True)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the booking app and FABSI.
+
+For each app it records the -X importtime breakdown of importing the module
+and the wall-clock time from process launch to first paint and to the first
+data load (reported by startup.mark_startup), then stops the app.
+
+    python startup_benchmark.py
+    python startup_benchmark.py fabsi --runs 5 --top 15
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from startup import PROBE_ENV
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+TARGETS = {
+    "booking": {
+        "module": "project_booking_app",
+        "command": [sys.executable, "-c", "import project_booking_app; project_booking_app.main()"],
+    },
+    "fabsi": {
+        "module": "Fabsi_List_of_Service",
+        "command": [sys.executable, "Fabsi_List_of_Service.py"],
+    },
+}
+
+EVENTS = ("first_paint", "data_ready")
+
+
+def import_time_breakdown(module):
+    """Return (total_us, [(cumulative_us, self_us, name)]) for importing module"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=SCRIPT_DIR, capture_output=True, text=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append((int(cumulative_us), int(self_us), name.rstrip()))
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+    total = sum(self_us for _, self_us, _ in entries)
+    return total, entries
+
+
+def time_startup(command, timeout=60.0):
+    """Launch an app and return {event: seconds since launch} for EVENTS"""
+    env = dict(os.environ, **{PROBE_ENV: "1"})
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=SCRIPT_DIR, env=env, stdout=subprocess.PIPE,
+                            stderr=subprocess.DEVNULL, text=True)
+    timings = {}
+    done = threading.Event()
+
+    def read_events():
+        for line in proc.stdout:
+            if line.startswith("STARTUP "):
+                event = line.split()[1]
+                timings.setdefault(event, time.perf_counter() - start)
+                if all(e in timings for e in EVENTS):
+                    break
+        done.set()
+
+    reader = threading.Thread(target=read_events, daemon=True)
+    reader.start()
+    done.wait(timeout)
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time and time-to-first-paint of the apps")
+    parser.add_argument("targets", nargs="*", metavar="target",
+                        help=f"apps to measure: {', '.join(sorted(TARGETS))} (default: all)")
+    parser.add_argument("--runs", type=int, default=3, help="launches per app (median is reported)")
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for each launch")
+    args = parser.parse_args(argv)
+    unknown = [t for t in args.targets if t not in TARGETS]
+    if unknown:
+        parser.error(f"unknown target(s): {', '.join(unknown)}")
+
+    for name in args.targets or sorted(TARGETS):
+        target = TARGETS[name]
+        print(f"== {name} ({target['module']}) ==")
+
+        total, entries = import_time_breakdown(target["module"])
+        print(f"import {target['module']}: {total / 1000:.1f} ms")
+        print(f"  {'cumulative ms':>14}{'self ms':>10}  module")
+        for cumulative_us, self_us, module in sorted(entries, reverse=True)[:args.top]:
+            print(f"  {cumulative_us / 1000:>14.1f}{self_us / 1000:>10.1f}  {module}")
+
+        runs = [time_startup(target["command"], args.timeout) for _ in range(args.runs)]
+        for event in EVENTS:
+            values = [run[event] for run in runs if event in run]
+            if values:
+                print(f"{event}: median {statistics.median(values) * 1000:.0f} ms "
+                      f"(min {min(values) * 1000:.0f}, max {max(values) * 1000:.0f}, {len(values)}/{len(runs)} runs)")
+            else:
+                print(f"{event}: not reached within {args.timeout:.0f}s")
+        print()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+"""
+On-disk warm-start cache: UI state and a snapshot of the last result set.
+
+The state (last selection, filters, sort, column widths) is a small JSON file
+read before the window is built. The snapshot is the last loaded result,
+pickled and compressed together with the table versions it was read at
+(see data_versions), so it can be painted straight away on the next launch
+and then checked against the database in the background.
+"""
+
+import json
+import logging
+import os
+import pickle
+import tempfile
+import zlib
+
+SNAPSHOT_FORMAT = 2  # bump when the cached data changes shape
+
+
+def write_atomic(path, data):
+    """Write bytes to path via a temporary file so a crash never leaves a half-written cache"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".warm-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class WarmStartCache:
+    """State file and result snapshot stored next to each other (``<base>.state.json``, ``<base>.snapshot``)"""
+
+    def __init__(self, base_path):
+        self.state_path = base_path + ".state.json"
+        self.snapshot_path = base_path + ".snapshot"
+
+    def load_state(self):
+        """Return the saved UI state, or {} if there is none or it cannot be read"""
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable warm-start state {self.state_path}: {e}")
+            return {}
+
+    def save_state(self, state):
+        """Persist the UI state (must be JSON serializable)"""
+        try:
+            write_atomic(self.state_path, json.dumps(state, indent=1, default=str).encode('utf-8'))
+        except Exception as e:
+            logging.error(f"Saving warm-start state failed: {e}")
+
+    def load_snapshot(self, key):
+        """Return (versions, data) saved under key, or None (runs on an I/O thread)"""
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.loads(zlib.decompress(f.read()))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable warm-start snapshot {self.snapshot_path}: {e}")
+            return None
+        if snapshot.get("format") != SNAPSHOT_FORMAT or snapshot.get("key") != key:
+            return None
+        return snapshot["versions"], snapshot["data"]
+
+    def save_snapshot(self, key, versions, data):
+        """Replace the snapshot with data read at the given table versions"""
+        try:
+            payload = pickle.dumps({"format": SNAPSHOT_FORMAT, "key": key, "versions": versions, "data": data},
+                                   protocol=pickle.HIGHEST_PROTOCOL)
+            write_atomic(self.snapshot_path, zlib.compress(payload, 1))
+        except Exception as e:
+            logging.error(f"Saving warm-start snapshot failed: {e}")